@@ -0,0 +1,126 @@
+"""Concurrent /balance latency against a local stand-in for Binance's REST API
+
+N accounts fetch their balance at once. With REST calls on the I/O
+executor this takes about one round trip and the event loop stays
+responsive; calling python-binance directly on the loop (the old path)
+takes N round trips and stalls every other handler meanwhile.
+
+    python -m bench.balance_latency [--users 8] [--delay 0.2]
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from aiohttp import web
+from binance.client import Client
+
+from services.binance_client import BinanceClient
+
+
+class FakeBinance(threading.Thread):
+    """Serves ping, account and ticker endpoints after ``delay`` seconds, on its own loop"""
+
+    def __init__(self, delay: float):
+        super().__init__(daemon=True)
+        self.delay = delay
+        self.url = ""
+        self._ready = threading.Event()
+
+    def run(self) -> None:
+        asyncio.run(self._serve())
+
+    async def _serve(self) -> None:
+        app = web.Application()
+        app.router.add_get("/api/v3/ping", self._ping)
+        app.router.add_get("/api/v3/account", self._account)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        self.url = f"http://127.0.0.1:{runner.addresses[0][1]}/api"
+        self._ready.set()
+        await asyncio.Event().wait()
+
+    def wait_ready(self) -> None:
+        self._ready.wait()
+
+    async def _ping(self, request: web.Request) -> web.Response:
+        return web.json_response({})
+
+    async def _account(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.delay)
+        balances = [{"asset": "USDT", "free": "1000.0", "locked": "0.0"}]
+        balances += [{"asset": f"DUST{i}", "free": "0.001", "locked": "0.0"} for i in range(50)]
+        return web.json_response({"balances": balances})
+
+
+async def _timed_with_lag(coro) -> Tuple[float, float]:
+    """Wall time of coro and the worst event-loop stall seen while it ran"""
+    worst = 0.0
+    running = True
+
+    async def probe() -> None:
+        nonlocal worst
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            worst = max(worst, time.perf_counter() - started - 0.01)
+
+    prober = asyncio.create_task(probe())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await coro
+    elapsed = time.perf_counter() - started
+    running = False
+    await prober
+    return elapsed, worst
+
+
+async def run(users: int, delay: float) -> None:
+    executor = ThreadPoolExecutor(max_workers=users, thread_name_prefix="bench-io")
+    clients: List[BinanceClient] = [
+        BinanceClient(f"key{i}", f"secret{i}", executor=executor)
+        for i in range(users)
+    ]
+
+    async def via_executor() -> None:
+        results = await asyncio.gather(*(client.get_wallet_balance() for client in clients))
+        assert all(result["status"] == "success" for result in results), results[0]
+
+    async def on_loop() -> None:
+        # The pre-executor path: the blocking call runs on the event loop
+        async def balance(client: BinanceClient) -> None:
+            client.client.get_account()
+        await asyncio.gather(*(balance(client) for client in clients))
+
+    await via_executor()  # warm up connections
+    elapsed, lag = await _timed_with_lag(via_executor())
+    print(f"executor: {users} concurrent /balance in {elapsed:.3f}s ({elapsed / delay:.1f} round trips), max loop stall {lag * 1000:.1f}ms")
+    assert elapsed < 2 * delay, f"expected about one round trip ({delay}s), took {elapsed:.3f}s"
+
+    elapsed, lag = await _timed_with_lag(on_loop())
+    print(f"on loop:  {users} concurrent /balance in {elapsed:.3f}s ({elapsed / delay:.1f} round trips), max loop stall {lag * 1000:.1f}ms")
+
+    for client in clients:
+        client.close()
+    executor.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.2, help="server round trip in seconds")
+    args = parser.parse_args()
+
+    server = FakeBinance(args.delay)
+    server.start()
+    server.wait_ready()
+    # Testnet clients talk to the stand-in instead of testnet.binance.vision
+    Client.API_TESTNET_URL = server.url
+    asyncio.run(run(args.users, args.delay))
+
+
+if __name__ == "__main__":
+    main()
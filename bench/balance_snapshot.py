@@ -0,0 +1,102 @@
+"""Micro-benchmark: BalanceSnapshot against the original get_wallet_balance path
+
+The original path (reproduced below from before the change) parsed every
+balance's floats twice, rendered every page up front and scanned again
+for USDT. The snapshot parses once, renders only the page shown and
+looks USDT up by asset.
+
+    python -m bench.balance_snapshot [--assets 20 500 2000]
+"""
+import argparse
+import random
+import timeit
+import tracemalloc
+from typing import Dict, List
+
+from services.balance_snapshot import BalanceSnapshot
+
+
+def _format_balance(balance: Dict[str, str]) -> str:
+    free = float(balance['free'])
+    locked = float(balance['locked'])
+    if free == 0 and locked == 0:
+        return ""
+    return (
+        f"🪙 {balance['asset']}:\n"
+        f"   Available: {free:.4f}\n"
+        f"   Locked: {locked:.4f}\n"
+    )
+
+
+def _chunk_balances(balances: List[Dict[str, str]], chunk_size: int = 10) -> List[str]:
+    messages = []
+    current_chunk = []
+    current_length = 0
+    for balance in balances:
+        formatted = _format_balance(balance)
+        if not formatted:
+            continue
+        if current_length >= chunk_size:
+            messages.append("💰 Testnet Wallet Balance:\n\n" + "\n".join(current_chunk))
+            current_chunk = []
+            current_length = 0
+        current_chunk.append(formatted)
+        current_length += 1
+    if current_chunk:
+        messages.append("💰 Testnet Wallet Balance:\n\n" + "\n".join(current_chunk))
+    return messages
+
+
+def original(rows: List[Dict[str, str]]) -> Dict:
+    non_zero = [b for b in rows if float(b['free']) > 0 or float(b['locked']) > 0]
+    messages = _chunk_balances(non_zero)
+    usdt = next((b for b in non_zero if b['asset'] == 'USDT'), {'free': '0'})
+    return {"message": messages[0], "pages": len(messages), "available_amount": usdt['free']}
+
+
+def snapshot(rows: List[Dict[str, str]]) -> Dict:
+    snap = BalanceSnapshot.from_rows(rows)
+    return {"message": snap.render_page(0), "pages": snap.page_count, "available_amount": snap.available('USDT')}
+
+
+def account(assets: int, seed: int = 1) -> List[Dict[str, str]]:
+    """get_account rows: most assets zero, some dust, USDT near the end"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(assets - 1):
+        kind = rng.random()
+        free = "0.00000000" if kind < 0.7 else f"{rng.uniform(0, 0.01):.8f}" if kind < 0.95 else f"{rng.uniform(1, 100):.8f}"
+        rows.append({"asset": f"COIN{i}", "free": free, "locked": "0.00000000"})
+    rows.append({"asset": "USDT", "free": "1234.56780000", "locked": "10.00000000"})
+    return rows
+
+
+def peak_bytes(func, rows) -> int:
+    tracemalloc.start()
+    result = func(rows)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", type=int, nargs="+", default=[20, 500, 2000])
+    args = parser.parse_args()
+
+    print(f"{'assets':>7} {'original':>12} {'snapshot':>12} {'speedup':>8} {'orig peak':>10} {'snap peak':>10}")
+    for assets in args.assets:
+        rows = account(assets)
+        assert original(rows) == snapshot(rows), "outputs differ"
+        number = max(10, 20000 // assets)
+        t_original = min(timeit.repeat(lambda: original(rows), number=number, repeat=5)) / number
+        t_snapshot = min(timeit.repeat(lambda: snapshot(rows), number=number, repeat=5)) / number
+        print(
+            f"{assets:>7} {t_original * 1e6:>10.1f}us {t_snapshot * 1e6:>10.1f}us {t_original / t_snapshot:>7.1f}x "
+            f"{peak_bytes(original, rows) / 1024:>8.1f}KB {peak_bytes(snapshot, rows) / 1024:>8.1f}KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Check: ClockOffsetTracker against skewed local time servers
+
+Runs FakeTimeServer instances with different skews and samples them
+through the tracker the way the bot does: Binance and Bybit server time
+over HTTP, and NTP. Another NTP source points at a dead address. Asserts
+that the offset settles on the median of the live sources, that a large
+jump is stepped at once, that a small drift is smoothed in, that slow
+samples are discarded, and that attached clients and pybit timestamps
+follow the offset.
+
+    python -m bench.clock_sync
+"""
+import asyncio
+import socket
+import statistics
+import time
+
+import requests
+
+from utils.fake_time_server import FakeTimeServer
+from utils.time_sync import ClockOffsetTracker, install_pybit_clock, ntp_source
+
+# Loopback round trips are well under a millisecond; allow for scheduling
+TOLERANCE_MS = 15.0
+
+
+def http_source(url: str, parse):
+    def fetch() -> float:
+        return parse(requests.get(url, timeout=2).json())
+    return fetch
+
+
+def dead_address() -> str:
+    """A local UDP port nothing listens on"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f"127.0.0.1:{port}"
+
+
+class Client:
+    """Stands in for a python-binance client"""
+    timestamp_offset = 0
+
+
+def check(name: str, ok: bool, detail: str) -> None:
+    print(f"{name}: {detail}: {'ok' if ok else 'FAILED'}")
+    assert ok, name
+
+
+async def main() -> None:
+    skews = {"binance": 2500.0, "bybit": 2520.0, "ntp": 2480.0}
+    servers = {name: FakeTimeServer(skew_ms=skew) for name, skew in skews.items()}
+    slow = FakeTimeServer(skew_ms=9000.0, delay=1.2)
+    for server in (*servers.values(), slow):
+        await server.start()
+
+    tracker = ClockOffsetTracker(timeout=2.0, max_rtt=1000.0)
+    tracker.add_source("binance", http_source(
+        f"{servers['binance'].http_url}/api/v3/time",
+        lambda body: body["serverTime"]
+    ))
+    tracker.add_source("bybit", http_source(
+        f"{servers['bybit'].http_url}/v5/market/time",
+        lambda body: int(body["result"]["timeNano"]) / 1e6
+    ))
+    tracker.add_source("ntp", ntp_source(servers["ntp"].ntp_address, timeout=0.5))
+    tracker.add_source("dead", ntp_source(dead_address(), timeout=0.5))
+    client = Client()
+    tracker.attach(client)
+
+    def set_skew(skew: float) -> None:
+        for server in servers.values():
+            server.skew_ms = skew
+
+    try:
+        # Convergence: the first round takes the median of the live sources
+        await tracker.sample()
+        expected = statistics.median(skews.values())
+        check(
+            "median",
+            tracker.synced and abs(tracker.offset_ms - expected) < TOLERANCE_MS,
+            f"offset {tracker.offset_ms:.1f}ms, expected {expected:.0f}ms (skews {sorted(skews.values())})"
+        )
+        check("dead source", tracker.failures.get("dead") == 1, f"failures {tracker.failures}")
+        check("attached client", client.timestamp_offset == round(tracker.offset_ms),
+              f"timestamp_offset {client.timestamp_offset}")
+
+        # Step: a jump beyond step_threshold is applied at once
+        set_skew(5000.0)
+        await tracker.sample()
+        check("step", abs(tracker.offset_ms - 5000.0) < TOLERANCE_MS, f"offset {tracker.offset_ms:.1f}ms after a 2.5s jump")
+
+        # Smoothing: a small drift is blended in with weight alpha
+        set_skew(5100.0)
+        before = tracker.offset_ms
+        measured = await tracker.sample()
+        expected = before + tracker.alpha * (measured - before)
+        check(
+            "smoothing",
+            abs(tracker.offset_ms - expected) < 1.0 and tracker.offset_ms < 5100.0 - 50.0,
+            f"offset {before:.1f}ms -> {tracker.offset_ms:.1f}ms for a 100ms drift"
+        )
+        rounds = 1
+        while abs(tracker.offset_ms - 5100.0) > 5.0 and rounds < 30:
+            await tracker.sample()
+            rounds += 1
+        check("convergence", abs(tracker.offset_ms - 5100.0) <= 5.0,
+              f"offset {tracker.offset_ms:.1f}ms after {rounds} rounds")
+
+        # Slow samples are discarded instead of skewing the median
+        tracker.add_source("slow", http_source(f"{slow.http_url}/api/v3/time", lambda body: body["serverTime"]))
+        before = tracker.offset_ms
+        await tracker.sample()
+        del tracker.sources["slow"]
+        check(
+            "max_rtt",
+            tracker.failures.get("slow") == 1 and abs(tracker.offset_ms - before) < TOLERANCE_MS,
+            f"1.2s sample dropped, offset {tracker.offset_ms:.1f}ms"
+        )
+
+        # pybit signs with the corrected clock
+        install_pybit_clock(tracker)
+        from pybit import _helpers
+        started = time.perf_counter()
+        for _ in range(100000):
+            _helpers.generate_timestamp()
+        per_call = (time.perf_counter() - started) / 100000
+        drift = _helpers.generate_timestamp() - servers["bybit"].now() * 1000
+        check("pybit", abs(drift) < TOLERANCE_MS, f"timestamp {drift:+.1f}ms from server time, {per_call * 1e6:.2f}us per call")
+
+        print(f"metrics: {tracker.metrics()}")
+    finally:
+        await tracker.stop()
+        for server in (*servers.values(), slow):
+            await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
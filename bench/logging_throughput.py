@@ -0,0 +1,156 @@
+"""Benchmark: log calls per second and event-loop lag per logging setup
+
+Compares the original handlers (a StreamHandler and a FileHandler,
+formatting and writing on the calling thread) with the queue handler and
+batching writer from utils.logging_config, in text and json mode.
+Console output goes to a sink that takes --sink-ms per write, standing in
+for a slow terminal, pipe or disk.
+
+- tight: --calls log calls back to back; reports calls/s as seen by the
+  caller and including the final flush, and records dropped because the
+  queue (--queue-size, like LOG_QUEUE_SIZE) was full
+- paced: log calls at about 1 kHz from a coroutine while a probe
+  coroutine measures how late its 1 ms sleeps wake up (p50/p99)
+
+    python -m bench.logging_throughput [--calls 100000] [--paced-calls 2000] [--sink-ms 5]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import queue
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from utils.logging_config import TEXT_FORMAT, BatchingLogWriter, JsonFormatter, LazyQueueHandler
+
+MODES = ("old", "queue-text", "queue-json")
+
+
+class SlowSink:
+    """A console stand-in whose writes take a fixed time"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def install(
+        mode: str,
+        logger: logging.Logger,
+        log_dir: Path,
+        sink: SlowSink,
+        queue_size: int
+) -> Callable[[], int]:
+    """Attach mode's handlers to logger; returns a function that flushes and detaches them
+
+    The function returns the number of dropped records.
+    """
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    path = log_dir / f"{mode}.log"
+
+    if mode == "old":
+        formatter = logging.Formatter(TEXT_FORMAT)
+        handlers: List[logging.Handler] = [logging.StreamHandler(sink), logging.FileHandler(path, encoding="utf-8")]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+
+        def close() -> int:
+            for handler in handlers:
+                handler.close()
+            logger.handlers.clear()
+            return 0
+        return close
+
+    log_queue: queue.Queue = queue.Queue(queue_size)
+    handler = LazyQueueHandler(log_queue)
+    formatter = JsonFormatter() if mode == "queue-json" else logging.Formatter(TEXT_FORMAT)
+    writer = BatchingLogWriter(log_queue, handler, formatter, path, stream=sink, max_bytes=1 << 40)
+    writer.start()
+    logger.addHandler(handler)
+
+    def close() -> int:
+        writer.stop(timeout=300)
+        logger.handlers.clear()
+        return handler.dropped
+    return close
+
+
+def tight(logger: logging.Logger, calls: int, close: Callable[[], int]) -> Tuple[float, float, int]:
+    started = time.perf_counter()
+    for i in range(calls):
+        logger.info("Order %s filled: %s BTCUSDT at %s", i, "0.001", "64000.12")
+    returned = time.perf_counter() - started
+    dropped = close()
+    return calls / returned, calls / (time.perf_counter() - started), dropped
+
+
+async def paced(logger: logging.Logger, calls: int) -> Tuple[float, float, float]:
+    lags: List[float] = []
+    done = asyncio.Event()
+
+    async def probe() -> None:
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - started - 0.001)
+
+    async def produce() -> None:
+        for i in range(calls):
+            logger.info(f"Price update {i}: BTCUSDT 64000.12")
+            await asyncio.sleep(0.001)
+        done.set()
+
+    started = time.perf_counter()
+    await asyncio.gather(probe(), produce())
+    lags.sort()
+    return time.perf_counter() - started, statistics.median(lags), lags[int(len(lags) * 0.99)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--paced-calls", type=int, default=2000)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--sink-ms", type=float, default=5.0, help="console write time in the paced run")
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench.logging")
+    with tempfile.TemporaryDirectory() as tmp:
+        log_dir = Path(tmp)
+        print(f"{os.cpu_count()} CPUs")
+        print(f"tight: {args.calls} calls, instant console")
+        for mode in MODES:
+            close = install(mode, logger, log_dir, SlowSink(0.0), args.queue_size)
+            returned, flushed, dropped = tight(logger, args.calls, close)
+            print(
+                f"  {mode:<11} {returned:>9,.0f} calls/s returned  {flushed:>9,.0f} calls/s flushed  "
+                f"{dropped} dropped"
+            )
+
+        print(f"paced: {args.paced_calls} calls at ~1 kHz, console write {args.sink_ms}ms")
+        for mode in MODES:
+            close = install(mode, logger, log_dir, SlowSink(args.sink_ms / 1000), args.queue_size)
+            total, p50, p99 = asyncio.run(paced(logger, args.paced_calls))
+            dropped = close()
+            print(
+                f"  {mode:<11} {total:>6.2f}s total  loop lag p50 {p50 * 1000:.2f}ms  p99 {p99 * 1000:.2f}ms  "
+                f"{dropped} dropped"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Market data feeds against a local WebSocket stand-in for Binance and Bybit
+
+The stand-in speaks both exchanges' subscribe protocols and pushes
+tickers for subscribed symbols. Checks that touching a symbol
+subscribes it, that prices go stale without updates, that idle symbols
+are unsubscribed and that a dropped connection resubscribes; then
+measures the cost of a last-price lookup.
+
+    python -m bench.market_data_stream
+"""
+import asyncio
+import json
+import time
+from decimal import Decimal
+from typing import Set
+
+from aiohttp import web
+
+from services.market_data import BinanceMarketDataFeed, BybitMarketDataFeed, MarketDataFeed
+
+
+class StreamStandIn:
+    """Pushes a ticker for every subscribed symbol every ``interval`` seconds"""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.url = ""
+        self.subscribed: Set[str] = set()
+        self.connections = 0
+        self.paused = False
+        self._sockets: Set[web.WebSocketResponse] = set()
+        self._runner = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/ws", self._binance)
+        app.router.add_get("/v5/public/spot", self._bybit)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        self.url = f"ws://127.0.0.1:{self._runner.addresses[0][1]}"
+
+    async def stop(self) -> None:
+        await self.drop_connections()
+        await self._runner.cleanup()
+
+    async def drop_connections(self) -> None:
+        for ws in list(self._sockets):
+            await ws.close()
+
+    async def _serve(self, request: web.Request, handle, tick) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self.subscribed.clear()
+        self._sockets.add(ws)
+        pusher = asyncio.create_task(self._push(ws, tick))
+        try:
+            async for msg in ws:
+                await handle(ws, json.loads(msg.data))
+        finally:
+            pusher.cancel()
+            self._sockets.discard(ws)
+        return ws
+
+    async def _push(self, ws: web.WebSocketResponse, tick) -> None:
+        price = 100.0
+        while not ws.closed:
+            await asyncio.sleep(self.interval)
+            if self.paused:
+                continue
+            price += 0.01
+            for symbol in list(self.subscribed):
+                for message in tick(symbol, price):
+                    await ws.send_str(json.dumps(message))
+
+    async def _binance(self, request: web.Request) -> web.WebSocketResponse:
+        async def handle(ws, data):
+            symbols = {stream.split("@")[0].upper() for stream in data["params"]}
+            if data["method"] == "SUBSCRIBE":
+                self.subscribed |= symbols
+            else:
+                self.subscribed -= symbols
+            await ws.send_str(json.dumps({"result": None, "id": data["id"]}))
+
+        def tick(symbol, price):
+            return [
+                {"e": "24hrMiniTicker", "s": symbol, "c": f"{price:.2f}"},
+                {"u": 1, "s": symbol, "b": f"{price - 0.01:.2f}", "a": f"{price + 0.01:.2f}"}
+            ]
+
+        return await self._serve(request, handle, tick)
+
+    async def _bybit(self, request: web.Request) -> web.WebSocketResponse:
+        async def handle(ws, data):
+            if data["op"] == "ping":
+                await ws.send_str(json.dumps({"op": "pong"}))
+                return
+            symbols = {arg.split(".", 1)[1] for arg in data["args"]}
+            if data["op"] == "subscribe":
+                self.subscribed |= symbols
+            else:
+                self.subscribed -= symbols
+
+        def tick(symbol, price):
+            return [{"topic": f"tickers.{symbol}", "data": {"symbol": symbol, "lastPrice": f"{price:.2f}"}}]
+
+        return await self._serve(request, handle, tick)
+
+
+async def wait_for(condition, timeout: float = 3.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for condition")
+        await asyncio.sleep(0.01)
+
+
+async def check_feed(name: str, server: StreamStandIn, feed: MarketDataFeed) -> None:
+    assert feed.get_price("BTCUSDT") is None
+    feed.touch("BTCUSDT")
+    await wait_for(lambda: feed.get_price("BTCUSDT") is not None)
+    assert server.subscribed == {"BTCUSDT"}
+    print(f"{name}: touch subscribes and streams prices: ok")
+
+    server.paused = True
+    await asyncio.sleep(feed.max_age + 0.1)
+    assert feed.get_price("BTCUSDT") is None, "stale price served"
+    server.paused = False
+    await wait_for(lambda: feed.get_price("BTCUSDT") is not None)
+    print(f"{name}: stale prices are not served (REST fallback takes over): ok")
+
+    connections = server.connections
+    await server.drop_connections()
+    await wait_for(lambda: server.connections > connections and server.subscribed == {"BTCUSDT"})
+    print(f"{name}: reconnect resubscribes: ok")
+
+    # Nobody reads BTCUSDT any more; the janitor unsubscribes it
+    await wait_for(lambda: not server.subscribed, timeout=feed.idle_timeout * 4 + 1)
+    assert "BTCUSDT" not in feed.prices
+    print(f"{name}: idle symbols are unsubscribed: ok")
+
+
+async def bench_lookup(feed: MarketDataFeed) -> None:
+    feed.update_price("ETHUSDT", Decimal("2500"))
+    lookups = 200000
+    started = time.perf_counter()
+    for _ in range(lookups):
+        feed.get_price("ETHUSDT")
+    elapsed = time.perf_counter() - started
+    print(f"get_price: {elapsed / lookups * 1e9:.0f}ns per lookup")
+
+
+async def main() -> None:
+    server = StreamStandIn()
+    await server.start()
+    try:
+        options = dict(max_age=0.3, idle_timeout=0.5, reconnect_delay=0.1)
+        binance = BinanceMarketDataFeed(f"{server.url}/ws", **options)
+        await check_feed("binance", server, binance)
+        await bench_lookup(binance)
+        await binance.stop()
+
+        bybit = BybitMarketDataFeed(f"{server.url}/v5/public/spot", **options)
+        await check_feed("bybit", server, bybit)
+        await bybit.stop()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
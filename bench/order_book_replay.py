@@ -0,0 +1,142 @@
+"""Replay a synthetic diff-depth stream through OrderBook
+
+Checks Binance's snapshot+diff procedure (diffs buffered while the
+snapshot is in flight, stale snapshots rejected, gaps detected) against
+a plain dict reference book, then measures update and fill-query
+throughput.
+
+    python -m bench.order_book_replay [--events 200000] [--levels 1000]
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from services.order_book import OrderBook
+
+Book = Tuple[Dict[str, str], Dict[str, str]]
+
+
+def generate(events: int, levels: int, seed: int = 1) -> Tuple[List[Dict], Dict[int, Book]]:
+    """Diff events with consecutive update IDs, plus reference books after some of them"""
+    rng = random.Random(seed)
+    bids: Dict[str, str] = {}
+    asks: Dict[str, str] = {}
+    for i in range(levels):
+        bids[f"{100 - (i + 1) * 0.01:.2f}"] = f"{rng.uniform(0.1, 5):.4f}"
+        asks[f"{100 + (i + 1) * 0.01:.2f}"] = f"{rng.uniform(0.1, 5):.4f}"
+
+    stream: List[Dict] = []
+    keep = {0, 150, 200, 300, 450, 500, 1000, events}
+    books: Dict[int, Book] = {0: (dict(bids), dict(asks))}
+    update_id = 1000
+    for _ in range(events):
+        event_bids, event_asks = [], []
+        for _ in range(rng.randint(1, 10)):
+            side, changes = (bids, event_bids) if rng.random() < 0.5 else (asks, event_asks)
+            offset = rng.randint(1, levels) * 0.01
+            price = f"{100 - offset if side is bids else 100 + offset:.2f}"
+            qty = "0" if rng.random() < 0.2 else f"{rng.uniform(0.1, 5):.4f}"
+            changes.append([price, qty])
+            if qty == "0":
+                side.pop(price, None)
+            else:
+                side[price] = qty
+        first = update_id + 1
+        update_id += rng.randint(1, 3)  # one event may cover several update IDs
+        stream.append({"e": "depthUpdate", "s": "BTCUSDT", "U": first, "u": update_id, "b": event_bids, "a": event_asks})
+        if len(stream) in keep:
+            books[len(stream)] = (dict(bids), dict(asks))
+    return stream, books
+
+
+def snapshot(stream: List[Dict], books: Dict[int, Book], index: int) -> Dict:
+    """REST snapshot as of the index-th event"""
+    bids, asks = books[index]
+    return {
+        "lastUpdateId": stream[index - 1]["u"] if index else 1000,
+        "bids": [[p, q] for p, q in bids.items()],
+        "asks": [[p, q] for p, q in asks.items()]
+    }
+
+
+def matches(book: OrderBook, reference: Book) -> bool:
+    bids, asks = reference
+    expected_bids = sorted(((float(p), float(q)) for p, q in bids.items()), reverse=True)
+    expected_asks = sorted((float(p), float(q)) for p, q in asks.items())
+    actual_bids = [(-k, q) for k, q in zip(book.bids.keys, book.bids.qtys)]
+    actual_asks = list(zip(book.asks.keys, book.asks.qtys))
+    return actual_bids == expected_bids and actual_asks == expected_asks
+
+
+def check_sync(stream: List[Dict], books: Dict[int, Book]) -> None:
+    # Snapshot taken at event 300 arrives after event 500: 301..500 were buffered
+    book = OrderBook("BTCUSDT")
+    for event in stream[:500]:
+        assert book.apply_diff(event)
+    assert not book.synced
+    assert book.apply_snapshot(snapshot(stream, books, 300))
+    assert book.synced and book.last_update_id == stream[499]["u"]
+    assert matches(book, books[500]), "replayed book differs from reference"
+    for event in stream[500:1000]:
+        assert book.apply_diff(event)
+    assert matches(book, books[1000]), "live book differs from reference"
+    print("buffered replay: ok")
+
+    # A snapshot older than everything buffered is rejected and buffering continues
+    book = OrderBook("BTCUSDT", buffer_size=100)
+    for event in stream[:500]:
+        book.apply_diff(event)
+    assert not book.apply_snapshot(snapshot(stream, books, 300))
+    assert not book.synced
+    assert book.apply_snapshot(snapshot(stream, books, 450))
+    assert matches(book, books[500])
+    print("stale snapshot rejected: ok")
+
+    # A missed event is a gap; events after it are kept for the next snapshot
+    book = OrderBook("BTCUSDT")
+    book.apply_snapshot(snapshot(stream, books, 0))
+    for event in stream[:100]:
+        assert book.apply_diff(event)
+    assert not book.apply_diff(stream[101])
+    assert not book.synced
+    for event in stream[102:200]:
+        book.apply_diff(event)
+    assert book.apply_snapshot(snapshot(stream, books, 150))
+    assert matches(book, books[200])
+    print("gap detected and recovered: ok")
+
+
+def bench(stream: List[Dict], books: Dict[int, Book]) -> None:
+    book = OrderBook("BTCUSDT")
+    book.apply_snapshot(snapshot(stream, books, 0))
+    started = time.perf_counter()
+    for event in stream:
+        book.apply_diff(event)
+    elapsed = time.perf_counter() - started
+    assert matches(book, books[len(stream)])
+    print(f"apply_diff: {len(stream) / elapsed:,.0f} events/s ({len(stream)} events, {elapsed:.2f}s)")
+
+    # Queries between updates reuse the cumulative arrays: O(log n) each
+    quantities = [Decimal(str(q)) for q in (0.5, 5, 50, 500)] * 25000
+    started = time.perf_counter()
+    for quantity in quantities:
+        book.estimate_fill("BUY", quantity)
+    elapsed = time.perf_counter() - started
+    print(f"estimate_fill: {elapsed / len(quantities) * 1e6:.1f}us per query")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--levels", type=int, default=1000)
+    args = parser.parse_args()
+
+    stream, books = generate(max(args.events, 1000), args.levels)
+    check_sync(stream, books)
+    bench(stream, books)
+
+
+if __name__ == "__main__":
+    main()
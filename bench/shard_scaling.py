@@ -0,0 +1,96 @@
+"""Load test: update throughput with the bot sharded over processes
+
+Routes synthetic raw updates through ShardSupervisor to N shard
+processes. The per-update work stands in for a handler: decode a ticker
+list, do Decimal math, format text. Throughput is measured from the
+first update routed to the last shard exiting after draining its
+queue, and compared with the same work done in-process. Scaling is
+bounded by the CPU count printed first.
+
+    python -m bench.shard_scaling [--updates 20000] [--shards 1 2 4]
+"""
+import argparse
+import asyncio
+import functools
+import json
+import multiprocessing
+import os
+import time
+from decimal import Decimal
+from typing import Any, Dict
+
+from services.shard_supervisor import ShardSupervisor
+
+PAYLOAD = json.dumps([{"s": f"S{i}USDT", "p": "123.456", "q": "0.01"} for i in range(60)])
+
+
+def make_update(update_id: int) -> Dict[str, Any]:
+    return {"update_id": update_id, "message": {"chat": {"id": update_id * 7919}}, "payload": PAYLOAD}
+
+
+def handle(update: Dict[str, Any]) -> str:
+    rows = json.loads(update["payload"])
+    total = sum(Decimal(row["p"]) * Decimal(row["q"]) for row in rows)
+    return "\n".join(f"{row['s']}: {Decimal(row['p']):.4f}" for row in rows) + f"\n{total}"
+
+
+def shard_main(report, index: int, updates) -> None:
+    """Shard process: signal readiness, handle updates until None, report the count"""
+    report.put(("ready", index))
+    handled = 0
+    while True:
+        update = updates.get()
+        if update is None:
+            break
+        handle(update)
+        handled += 1
+    report.put(("done", handled))
+
+
+def in_process(total: int) -> float:
+    started = time.perf_counter()
+    for update_id in range(total):
+        handle(make_update(update_id))
+    return total / (time.perf_counter() - started)
+
+
+async def sharded(shards: int, total: int, queue_size: int) -> float:
+    report = multiprocessing.get_context("spawn").Queue()
+    supervisor = ShardSupervisor(functools.partial(shard_main, report), shards, queue_size=queue_size)
+    supervisor.start()
+    # Don't count interpreter start-up
+    for _ in range(shards):
+        await asyncio.to_thread(report.get, True, 60)
+
+    started = time.perf_counter()
+    update_id = 0
+    while update_id < total:
+        if supervisor.dispatch(make_update(update_id)):
+            update_id += 1
+        else:
+            await asyncio.sleep(0.001)
+    await supervisor.stop(timeout=300)
+    elapsed = time.perf_counter() - started
+
+    handled = sum(report.get(True, 10)[1] for _ in range(shards))
+    assert handled == total, f"shards handled {handled} of {total} updates"
+    return total / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--queue-size", type=int, default=4000)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.updates} updates")
+    baseline = in_process(args.updates)
+    print(f"in-process  {baseline:>8,.0f} updates/s")
+    for shards in args.shards:
+        rate = asyncio.run(sharded(shards, args.updates, args.queue_size))
+        print(f"{shards} shard{'s' if shards > 1 else ' '}    {rate:>8,.0f} updates/s  ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
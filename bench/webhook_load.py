@@ -0,0 +1,127 @@
+"""Load test: post synthetic Telegram updates to the webhook app
+
+Serves build_webhook_app on a local port with a dispatcher whose only
+handler sleeps for --handler-ms, then posts updates for --chats chats
+over --connections concurrent connections. Reports accepted and
+handled updates per second, 503s, and checks that each chat's updates
+were handled in the order they were posted.
+
+    python -m bench.webhook_load [--updates 5000] [--workers 8] [--handler-ms 5]
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import aiohttp
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+from aiohttp import web
+
+from services.update_pipeline import SECRET_HEADER, UpdatePipeline, build_webhook_app
+
+PATH = "/webhook"
+SECRET = "bench-secret"
+
+
+def make_update(update_id: int, chat_id: int) -> Dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+            "text": f"/balance {update_id}"
+        }
+    }
+
+
+def build_dispatcher(handled: Dict[int, List[int]], handler_delay: float) -> Dispatcher:
+    router = Router()
+
+    @router.message()
+    async def handle(message: Message) -> None:
+        await asyncio.sleep(handler_delay)
+        handled[message.chat.id].append(message.message_id)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+async def run(args: argparse.Namespace) -> None:
+    handled: Dict[int, List[int]] = defaultdict(list)
+    # Handlers never call the Bot API, so the token is never used
+    bot = Bot(token="123456:bench")
+    pipeline = UpdatePipeline(
+        build_dispatcher(handled, args.handler_ms / 1000),
+        bot,
+        workers=args.workers,
+        queue_size=args.queue_size
+    )
+    runner = web.AppRunner(build_webhook_app(pipeline, PATH, SECRET))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{runner.addresses[0][1]}{PATH}"
+
+    # Each connection owns a set of chats and posts them one at a time, like
+    # Telegram does per chat, so the posting order per chat is well defined
+    posted: Dict[int, List[int]] = defaultdict(list)
+    statuses: Dict[int, int] = defaultdict(int)
+    plan: List[List[Dict]] = [[] for _ in range(args.connections)]
+    for update_id in range(1, args.updates + 1):
+        chat_id = 1000 + update_id % args.chats
+        plan[chat_id % args.connections].append(make_update(update_id, chat_id))
+
+    async def sender(session: aiohttp.ClientSession, updates: List[Dict]) -> None:
+        for update in updates:
+            while True:
+                async with session.post(url, json=update, headers={SECRET_HEADER: SECRET}) as response:
+                    statuses[response.status] += 1
+                if response.status != 503:
+                    break
+                # Telegram retries rejected updates; keep this chat's order
+                await asyncio.sleep(0.05)
+            if response.status == 200:
+                posted[update["message"]["chat"]["id"]].append(update["update_id"])
+
+    connector = aiohttp.TCPConnector(limit=args.connections)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            started = time.perf_counter()
+            await asyncio.gather(*(sender(session, updates) for updates in plan))
+            accepted = time.perf_counter() - started
+            await pipeline.drain()
+            finished = time.perf_counter() - started
+    finally:
+        await runner.cleanup()
+        await bot.session.close()
+
+    total = sum(len(ids) for ids in handled.values())
+    assert total == args.updates, f"handled {total} of {args.updates} updates"
+    assert handled == posted, "per-chat order was not kept"
+    print(
+        f"{args.updates} updates, {args.chats} chats, {args.connections} connections, "
+        f"{args.workers} workers, {args.handler_ms}ms handler"
+    )
+    print(f"accepted: {args.updates / accepted:,.0f} updates/s ({accepted:.2f}s)")
+    print(f"handled:  {args.updates / finished:,.0f} updates/s ({finished:.2f}s)")
+    print(f"responses: {dict(statuses)}; failed handlers: {pipeline.failed}; per-chat order kept")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--connections", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    parser.add_argument("--handler-ms", type=float, default=5.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -19,4 +19,93 @@ BINANCE_API_SECRET = os.getenv('BINANCE_API_SECRET')
 
 if not BINANCE_API_KEY or not BINANCE_API_SECRET:
     logger.error("Binance API credentials not found in environment variables")
-    raise ValueError("BINANCE_API_KEY and BINANCE_API_SECRET environment variables are required")
\ No newline at end of file
+    raise ValueError("BINANCE_API_KEY and BINANCE_API_SECRET environment variables are required")
+
+# Bybit API configuration (optional; used by the Bybit trading and investment services)
+BYBIT_API_KEY = os.getenv('BYBIT_API_KEY')
+BYBIT_API_SECRET = os.getenv('BYBIT_API_SECRET')
+
+# Exchange I/O configuration
+BINANCE_IO_WORKERS = int(os.getenv('BINANCE_IO_WORKERS', '8'))
+BINANCE_POOL_SIZE = int(os.getenv('BINANCE_POOL_SIZE', '10'))
+
+# Market data stream configuration
+BINANCE_WS_URL = os.getenv('BINANCE_WS_URL', 'wss://stream.testnet.binance.vision/ws')
+MARKET_DATA_MAX_AGE = float(os.getenv('MARKET_DATA_MAX_AGE', '5'))
+MARKET_DATA_IDLE_TIMEOUT = float(os.getenv('MARKET_DATA_IDLE_TIMEOUT', '300'))
+
+# Rate limit configuration (request weight per minute)
+BINANCE_WEIGHT_LIMIT = int(os.getenv('BINANCE_WEIGHT_LIMIT', '6000'))
+
+# Local cache configuration
+DATA_DIR = os.getenv('DATA_DIR', 'data')
+SYMBOL_CATALOG_TTL = float(os.getenv('SYMBOL_CATALOG_TTL', '3600'))
+
+# Order submission configuration
+ORDER_PIPELINE_WORKERS = int(os.getenv('ORDER_PIPELINE_WORKERS', '4'))
+ORDER_DEDUPE_TTL = float(os.getenv('ORDER_DEDUPE_TTL', '86400'))
+ORDER_DEDUPE_DB = os.getenv('ORDER_DEDUPE_DB', '')
+
+# Resilience configuration
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
+
+# Investment analysis configuration
+INVESTMENT_SOURCE_TIMEOUT = float(os.getenv('INVESTMENT_SOURCE_TIMEOUT', '5'))
+PRODUCT_CATALOG_TTL = float(os.getenv('PRODUCT_CATALOG_TTL', '300'))
+PRODUCT_CATALOG_MAX_STALE = float(os.getenv('PRODUCT_CATALOG_MAX_STALE', '86400'))
+
+# Auto-invest scheduler configuration
+AUTO_INVEST_INTERVAL = float(os.getenv('AUTO_INVEST_INTERVAL', '900'))
+AUTO_INVEST_JITTER = float(os.getenv('AUTO_INVEST_JITTER', '0.1'))
+AUTO_INVEST_APY_IMPROVEMENT = os.getenv('AUTO_INVEST_APY_IMPROVEMENT', '0.5')
+AUTO_INVEST_MIN_IDLE_BALANCE = os.getenv('AUTO_INVEST_MIN_IDLE_BALANCE', '50')
+
+# Per-user account configuration
+USER_CREDENTIALS_FILE = os.getenv('USER_CREDENTIALS_FILE', '')
+ACCOUNT_MAX_CACHED = int(os.getenv('ACCOUNT_MAX_CACHED', '256'))
+ACCOUNT_SHARDS = int(os.getenv('ACCOUNT_SHARDS', '8'))
+ACCOUNT_IO_WORKERS = int(os.getenv('ACCOUNT_IO_WORKERS', '16'))
+
+# User-data stream configuration
+USER_DATA_STREAM = os.getenv('USER_DATA_STREAM', 'true').lower() == 'true'
+USER_DATA_RECONCILE_INTERVAL = float(os.getenv('USER_DATA_RECONCILE_INTERVAL', '300'))
+
+# Telegram delivery configuration (messages per second)
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', '30'))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', '1'))
+
+# Webhook configuration (polling is used when WEBHOOK_URL is empty)
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', '8'))
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000'))
+
+# FSM storage configuration ("memory", "sqlite" or "redis")
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'sqlite')
+FSM_SQLITE_PATH = os.getenv('FSM_SQLITE_PATH', os.path.join(DATA_DIR, 'fsm.sqlite3'))
+FSM_REDIS_URL = os.getenv('FSM_REDIS_URL', 'redis://localhost:6379/0')
+FSM_STATE_TTL = float(os.getenv('FSM_STATE_TTL', '3600'))
+FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', '0.05'))
+
+# Process sharding configuration (BOT_SHARDS > 1 runs one process per shard)
+BOT_SHARDS = int(os.getenv('BOT_SHARDS', '1'))
+BOT_SHARD_INDEX = int(os.getenv('BOT_SHARD_INDEX', '0'))
+MARKET_DATA_FEEDER = os.getenv('MARKET_DATA_FEEDER', '')
+
+# Logging configuration (LOG_FORMAT is "text" or "json")
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+# Metrics configuration (seconds between metrics log lines; 0 disables them)
+METRICS_INTERVAL = float(os.getenv('METRICS_INTERVAL', '60'))
+
+# Clock sync configuration (offset of the local clock from exchange/NTP time)
+CLOCK_SYNC_INTERVAL = float(os.getenv('CLOCK_SYNC_INTERVAL', '60'))
+CLOCK_SYNC_TIMEOUT = float(os.getenv('CLOCK_SYNC_TIMEOUT', '2'))
+NTP_SERVERS = [s.strip() for s in os.getenv('NTP_SERVERS', 'pool.ntp.org,time.google.com,time.windows.com').split(',') if s.strip()]
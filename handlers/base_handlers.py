@@ -1,15 +1,26 @@
 from aiogram import Router, types
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
-from services.binance_client import BinanceClient
-from config import BINANCE_API_KEY, BINANCE_API_SECRET
+from aiogram.filters.callback_data import CallbackData
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from collections import OrderedDict
+from services.balance_snapshot import BalanceSnapshot
 import logging
-from typing import Final
+from typing import Final, Optional
+from .investment_handlers import account_manager
 
 logger = logging.getLogger(__name__)
 
-# Initialize router and client
+# Initialize router
 router = Router()
-binance_client = BinanceClient(BINANCE_API_KEY, BINANCE_API_SECRET)
+
+# Latest balance snapshot per user, so page flips never call the exchange
+MAX_BALANCE_VIEWS: Final[int] = 1000
+balance_views: "OrderedDict[int, BalanceSnapshot]" = OrderedDict()
+
+
+class BalancePage(CallbackData, prefix="bal"):
+    page: int  # -1 for the page counter button
 
 # Command messages
 WELCOME_MESSAGE: Final[str] = """
@@ -48,6 +59,20 @@ async def cmd_help(message: types.Message) -> None:
     await message.answer(HELP_MESSAGE)
 
 
+def balance_keyboard(snapshot: BalanceSnapshot, page: int) -> Optional[types.InlineKeyboardMarkup]:
+    """Build prev/next buttons for a balance page"""
+    if snapshot.page_count <= 1:
+        return None
+
+    builder = InlineKeyboardBuilder()
+    if page > 0:
+        builder.button(text="◀️ Prev", callback_data=BalancePage(page=page - 1))
+    builder.button(text=f"{page + 1}/{snapshot.page_count}", callback_data=BalancePage(page=-1))
+    if page < snapshot.page_count - 1:
+        builder.button(text="Next ▶️", callback_data=BalancePage(page=page + 1))
+    return builder.as_markup()
+
+
 @router.message(Command("balance"))
 async def cmd_balance(message: types.Message) -> None:
     """Handle /balance command"""
@@ -56,27 +81,59 @@ async def cmd_balance(message: types.Message) -> None:
         logger.info(f"Fetching balance for user {user_id}")
 
         status_message = await message.answer("🔄 Fetching wallet balance...")
-        result = await binance_client.get_wallet_balance()
+        # The user's own account, or the bot's when they have no keys
+        async with account_manager.account(user_id) as account:
+            result = await account.client.get_wallet_balance()
 
-        # Send main balance message
-        await status_message.edit_text(result["message"])
+        snapshot = result.get("snapshot")
+        if snapshot is None:
+            await status_message.edit_text(result["message"])
+            return
+
+        balance_views[user_id] = snapshot
+        balance_views.move_to_end(user_id)
+        if len(balance_views) > MAX_BALANCE_VIEWS:
+            balance_views.popitem(last=False)
 
-        # Send additional balance messages if any
-        if result.get("additional_messages"):
-            for additional_msg in result["additional_messages"]:
-                await message.answer(additional_msg)
+        await status_message.edit_text(
+            snapshot.render_page(0),
+            reply_markup=balance_keyboard(snapshot, 0)
+        )
 
     except Exception as e:
         logger.error(f"Error in balance command: {str(e)}")
         await message.answer("❌ An error occurred. Please try again later.")
 
 
+@router.callback_query(BalancePage.filter())
+async def on_balance_page(callback: types.CallbackQuery, callback_data: BalancePage) -> None:
+    """Show another page of the cached balance snapshot"""
+    snapshot = balance_views.get(callback.from_user.id)
+    if snapshot is None:
+        await callback.answer("Balance view expired. Use /balance to refresh.", show_alert=True)
+        return
+    if not 0 <= callback_data.page < snapshot.page_count:
+        await callback.answer()
+        return
+
+    try:
+        await callback.message.edit_text(
+            snapshot.render_page(callback_data.page),
+            reply_markup=balance_keyboard(snapshot, callback_data.page)
+        )
+    except TelegramBadRequest as e:
+        # Double taps re-send the page that is already shown
+        logger.debug(f"Balance page not updated: {str(e)}")
+    await callback.answer()
+
+
 @router.message(Command("get_funds"))
 async def cmd_get_funds(message: types.Message) -> None:
     """Handle /get_funds command"""
     try:
         status_message = await message.answer("🔄 Requesting test funds...")
-        result = await binance_client.get_test_funds()
+        async with account_manager.account(message.from_user.id) as account:
+            result = await account.client.get_test_funds()
 
         await status_message.edit_text(result["message"])
 
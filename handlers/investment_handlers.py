@@ -2,18 +2,61 @@
 from aiogram import Router, types
 from aiogram.filters import Command
 from services.investment_analyzer import InvestmentAnalyzer
-from services.auto_investor import AutoInvestor
-from services.binance_client import BinanceClient
-from config import BINANCE_API_KEY, BINANCE_API_SECRET
+from services.account_manager import AccountManager, CredentialsStore
+from services.auto_invest_scheduler import AutoInvestScheduler
+from services.client_registry import ClientRegistry
+from config import (
+    BINANCE_API_KEY,
+    BINANCE_API_SECRET,
+    INVESTMENT_SOURCE_TIMEOUT,
+    DATA_DIR,
+    USER_CREDENTIALS_FILE,
+    ACCOUNT_MAX_CACHED,
+    ACCOUNT_SHARDS,
+    ACCOUNT_IO_WORKERS,
+    AUTO_INVEST_INTERVAL,
+    AUTO_INVEST_JITTER,
+    AUTO_INVEST_APY_IMPROVEMENT,
+    AUTO_INVEST_MIN_IDLE_BALANCE,
+    BOT_SHARDS,
+    BOT_SHARD_INDEX
+)
+from decimal import Decimal
+from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Initialize router and services
 router = Router()
-binance_client = BinanceClient(BINANCE_API_KEY, BINANCE_API_SECRET)
-investment_analyzer = InvestmentAnalyzer(binance_client)
-auto_investor = AutoInvestor(binance_client, investment_analyzer)
+binance_client = ClientRegistry().binance_client
+investment_analyzer = InvestmentAnalyzer(
+    binance_client,
+    source_timeout=INVESTMENT_SOURCE_TIMEOUT,
+    catalog=ClientRegistry().product_catalog
+)
+account_manager = AccountManager(
+    CredentialsStore(
+        Path(USER_CREDENTIALS_FILE) if USER_CREDENTIALS_FILE else None,
+        default=(BINANCE_API_KEY, BINANCE_API_SECRET)
+    ),
+    investment_analyzer,
+    max_accounts=ACCOUNT_MAX_CACHED,
+    shards=ACCOUNT_SHARDS,
+    io_workers=ACCOUNT_IO_WORKERS
+)
+sharded = BOT_SHARDS > 1
+auto_invest_scheduler = AutoInvestScheduler(
+    account_manager,
+    state_path=Path(DATA_DIR) / (f"auto_invest.shard{BOT_SHARD_INDEX}.json" if sharded else "auto_invest.json"),
+    interval=AUTO_INVEST_INTERVAL,
+    jitter=AUTO_INVEST_JITTER,
+    apy_improvement=Decimal(AUTO_INVEST_APY_IMPROVEMENT),
+    min_idle_balance=Decimal(AUTO_INVEST_MIN_IDLE_BALANCE),
+    # Each shard schedules only the chats routed to it
+    seed_path=Path(DATA_DIR) / "auto_invest.json" if sharded else None,
+    owns=(lambda chat_id: chat_id % BOT_SHARDS == BOT_SHARD_INDEX) if sharded else None
+)
 
 INVESTMENT_HELP_MESSAGE = """
 💰 Investment Commands:
@@ -38,7 +81,7 @@ async def cmd_analyze(message: types.Message):
     """Analyze investment opportunities"""
     try:
         status_message = await message.answer("🔄 Analyzing investment opportunities...")
-        result = await investment_analyzer.analyze_opportunities()
+        result = await investment_analyzer.analyze_opportunities(message.from_user.id)
 
         await status_message.edit_text(result["message"])
 
@@ -51,7 +94,7 @@ async def cmd_analyze(message: types.Message):
 async def cmd_auto_invest(message: types.Message):
     """Toggle auto-investment mode"""
     try:
-        is_enabled = auto_investor.toggle_auto_invest()
+        is_enabled = await auto_invest_scheduler.toggle(message.from_user.id, message.chat.id)
 
         if is_enabled:
             status_message = await message.answer(
@@ -59,7 +102,7 @@ async def cmd_auto_invest(message: types.Message):
                 "🔄 Checking investment opportunities..."
             )
 
-            result = await auto_investor.check_and_invest()
+            result = await auto_invest_scheduler.run_once(message.from_user.id)
             await status_message.edit_text(result["message"])
         else:
             await message.answer("❌ Auto-investment mode disabled")
@@ -74,7 +117,8 @@ async def cmd_investments(message: types.Message):
     """Show active investments"""
     try:
         status_message = await message.answer("🔄 Fetching your investments...")
-        result = await auto_investor.get_active_investments()
+        async with account_manager.account(message.from_user.id) as account:
+            result = await account.investor.get_active_investments()
 
         await status_message.edit_text(result["message"])
 
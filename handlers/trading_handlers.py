@@ -2,16 +2,22 @@ from aiogram import Router, F, types
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from services.binance_client import BinanceClient
-from config import BINANCE_API_KEY, BINANCE_API_SECRET
+from services.client_registry import ClientRegistry
+from services.order_dedupe import make_client_order_id
+from services.order_pipeline import OrderRequest
+from .investment_handlers import account_manager
 from decimal import Decimal, InvalidOperation
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
 # Initialize router and client
 router = Router()
-binance_client = BinanceClient(BINANCE_API_KEY, BINANCE_API_SECRET)
+binance_client = ClientRegistry().binance_client
+symbol_catalog = ClientRegistry().symbol_catalog
+order_books = ClientRegistry().order_books
+order_pipeline = ClientRegistry().order_pipeline
 
 
 class OrderStates(StatesGroup):
@@ -42,7 +48,7 @@ async def cmd_trading_help(message: types.Message):
 @router.message(Command("test_buy"))
 async def cmd_test_buy(message: types.Message, state: FSMContext):
     """Start test buy process"""
-    await state.update_data(order_type="BUY")
+    await state.update_data(order_type="BUY", flow_id=uuid.uuid4().hex)
     await state.set_state(OrderStates.waiting_for_symbol)
     await message.answer(
         "Enter the trading pair (e.g., BTCUSDT):"
@@ -52,7 +58,7 @@ async def cmd_test_buy(message: types.Message, state: FSMContext):
 @router.message(Command("test_sell"))
 async def cmd_test_sell(message: types.Message, state: FSMContext):
     """Start test sell process"""
-    await state.update_data(order_type="SELL")
+    await state.update_data(order_type="SELL", flow_id=uuid.uuid4().hex)
     await state.set_state(OrderStates.waiting_for_symbol)
     await message.answer(
         "Enter the trading pair (e.g., BTCUSDT):"
@@ -62,7 +68,15 @@ async def cmd_test_sell(message: types.Message, state: FSMContext):
 @router.message(OrderStates.waiting_for_symbol)
 async def process_symbol(message: types.Message, state: FSMContext):
     """Process trading pair input"""
-    symbol = message.text.upper()
+    symbol = message.text.upper().strip()
+
+    # Validate against the local catalog before touching the network
+    if await symbol_catalog.ensure_loaded() and not symbol_catalog.is_valid(symbol):
+        suggestions = symbol_catalog.suggest(symbol)
+        hint = f"\nDid you mean: {', '.join(suggestions)}?" if suggestions else ""
+        await message.answer(f"❌ Unknown trading pair {symbol}{hint}")
+        await state.clear()
+        return
 
     # Get current market price
     price = await binance_client.get_market_price(symbol)
@@ -71,6 +85,9 @@ async def process_symbol(message: types.Message, state: FSMContext):
         await state.clear()
         return
 
+    # Start mirroring the book so the quantity step can estimate slippage
+    order_books.touch(symbol)
+
     await state.update_data(symbol=symbol, price=price)
     await state.set_state(OrderStates.waiting_for_quantity)
 
@@ -96,7 +113,22 @@ async def process_quantity(message: types.Message, state: FSMContext):
         price = data["price"]
         order_type = data.get("order_type", "BUY")
 
+        quantity = symbol_catalog.round_quantity(symbol, quantity)
+        error = symbol_catalog.validate_order(symbol, quantity, price)
+        if error:
+            await message.answer(f"❌ {error}\nEnter a different quantity:")
+            return
+
         total_cost = quantity * price
+        fill_info = ""
+        estimate = order_books.estimate_fill(symbol, order_type, quantity)
+        if estimate:
+            avg_price, fillable = estimate
+            total_cost = quantity * avg_price
+            slippage = (avg_price - price) / price * 100
+            fill_info = f"Average Fill Price: {avg_price:.8f} ({slippage:+.3f}% vs last)\n"
+            if fillable < quantity:
+                fill_info += f"⚠️ Visible depth only covers {fillable} {symbol}\n"
 
         await state.update_data(quantity=quantity)
         await state.set_state(OrderStates.waiting_for_confirmation)
@@ -105,6 +137,7 @@ async def process_quantity(message: types.Message, state: FSMContext):
             f"📝 {order_type} Order Summary (TESTNET MODE):\n"
             f"Symbol: {symbol}\n"
             f"Quantity: {quantity}\n"
+            f"{fill_info}"
             f"Estimated Total: {total_cost:.2f} USDT\n\n"
             f"Send 'confirm' to place test order or 'cancel' to abort\n\n"
             "Note: This is a testnet order, no real funds will be used."
@@ -118,13 +151,27 @@ async def process_quantity(message: types.Message, state: FSMContext):
 async def process_confirmation(message: types.Message, state: FSMContext):
     """Process order confirmation"""
     data = await state.get_data()
-
-    result = await binance_client.place_test_order(
-        symbol=data["symbol"],
-        side=data.get("order_type", "BUY"),
-        quantity=data["quantity"]
+    side = data.get("order_type", "BUY")
+
+    # Same flow + same order => same ID, so a repeated 'confirm' is a no-op
+    client_order_id = make_client_order_id(
+        message.from_user.id,
+        data.get("flow_id"),
+        data["symbol"],
+        side,
+        data["quantity"]
     )
 
+    # Orders go to the user's own account (the bot's when they have no keys)
+    async with account_manager.account(message.from_user.id) as account:
+        result = await order_pipeline.place(OrderRequest(
+            symbol=data["symbol"],
+            side=side,
+            quantity=data["quantity"],
+            client_order_id=client_order_id,
+            backend=account.client
+        ))
+
     await message.answer(result["message"])
     await state.clear()
 
@@ -1,26 +1,135 @@
 import asyncio
 import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Tuple
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
-from config import TELEGRAM_BOT_TOKEN
+from aiogram.types import Update
+from aiogram.webhook.aiohttp_server import setup_application
+from aiohttp import web
+from config import (
+    TELEGRAM_BOT_TOKEN,
+    BINANCE_WS_URL,
+    MARKET_DATA_MAX_AGE,
+    MARKET_DATA_IDLE_TIMEOUT,
+    DATA_DIR,
+    FSM_STORAGE,
+    FSM_SQLITE_PATH,
+    FSM_REDIS_URL,
+    FSM_STATE_TTL,
+    FSM_FLUSH_INTERVAL,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_CHAT_RATE,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_HOST,
+    WEBHOOK_PORT,
+    WEBHOOK_WORKERS,
+    WEBHOOK_QUEUE_SIZE,
+    BOT_SHARDS,
+    MARKET_DATA_FEEDER,
+    LOG_FORMAT,
+    LOG_MAX_BYTES,
+    LOG_BACKUP_COUNT,
+    LOG_QUEUE_SIZE,
+    METRICS_INTERVAL
+)
 from handlers import router
+from handlers.investment_handlers import account_manager, auto_invest_scheduler
+from services.client_registry import ClientRegistry
+from services.fsm_storage import create_storage
+from services.market_data_relay import default_address, serve_feeder
+from services.metrics_reporter import MetricsReporter
+from services.shard_supervisor import ShardSupervisor, build_ingress_app, poll_updates
+from services.telegram_delivery import DeliveryMiddleware, Lane, delivery_lane
+from services.update_pipeline import UpdatePipeline, build_webhook_app
 from utils.logging_config import setup_logging
 
 
+def configure_logging(name: str = "bot") -> None:
+    setup_logging(
+        name,
+        log_format=LOG_FORMAT,
+        max_bytes=LOG_MAX_BYTES,
+        backup_count=LOG_BACKUP_COUNT,
+        queue_size=LOG_QUEUE_SIZE
+    )
+
+
+def create_bot() -> Tuple[Bot, Dispatcher]:
+    """Create the bot and a dispatcher with handlers and service hooks registered"""
+    # Initialize bot and dispatcher with FSM storage
+    bot = Bot(token=TELEGRAM_BOT_TOKEN)
+    storage = create_storage(
+        FSM_STORAGE,
+        sqlite_path=Path(FSM_SQLITE_PATH),
+        redis_url=FSM_REDIS_URL,
+        ttl=FSM_STATE_TTL,
+        flush_interval=FSM_FLUSH_INTERVAL
+    )
+    dp = Dispatcher(storage=storage)
+
+    # Queue outgoing messages behind Telegram's flood limits (shards split the global one)
+    delivery = DeliveryMiddleware(
+        global_rate=TELEGRAM_GLOBAL_RATE / BOT_SHARDS,
+        chat_rate=TELEGRAM_CHAT_RATE
+    )
+    bot.session.middleware(delivery)
+
+    async def notify(chat_id: int, text: str) -> None:
+        with delivery_lane(Lane.NOTIFICATION):
+            await bot.send_message(chat_id, text)
+
+    # Register handlers
+    dp.include_router(router)
+
+    # Run scheduled auto-investment and report results to users
+    auto_invest_scheduler.notify = notify
+    dp.startup.register(auto_invest_scheduler.start)
+    dp.shutdown.register(auto_invest_scheduler.stop)
+    dp.shutdown.register(account_manager.stop)
+    dp.shutdown.register(delivery.stop)
+
+    # Flush pending FSM writes
+    dp.shutdown.register(storage.close)
+
+    # Keep signed-request timestamps in step with exchange time
+    dp.startup.register(ClientRegistry().clock.start)
+
+    # Release shared exchange clients and streams on shutdown
+    dp.shutdown.register(ClientRegistry().close)
+
+    # Log service metrics periodically
+    metrics = MetricsReporter(METRICS_INTERVAL)
+    metrics.add_source("auto_invest", auto_invest_scheduler.metrics)
+    metrics.add_source("client_registry", ClientRegistry().stats)
+    metrics.add_source("binance_rate_limit", ClientRegistry().rate_limiter.metrics)
+    metrics.add_source("telegram_delivery", delivery.metrics)
+    metrics.add_source("order_pipeline", ClientRegistry().order_pipeline.metrics)
+    dp.startup.register(metrics.start)
+    dp.shutdown.register(metrics.stop)
+    return bot, dp
+
+
 async def main() -> None:
     """Main function to run the bot"""
     try:
         # Set up logging
-        setup_logging()
+        configure_logging()
         logger = logging.getLogger(__name__)
         logger.info("Starting bot...")
 
-        # Initialize bot and dispatcher with FSM storage
-        bot = Bot(token=TELEGRAM_BOT_TOKEN)
-        dp = Dispatcher(storage=MemoryStorage())
+        if BOT_SHARDS > 1:
+            await run_sharded()
+            return
 
-        # Register handlers
-        dp.include_router(router)
+        bot, dp = create_bot()
+
+        if WEBHOOK_URL:
+            await run_webhook(bot, dp)
+            return
 
         # Delete webhook before polling
         await bot.delete_webhook(drop_pending_updates=True)
@@ -34,5 +143,125 @@ async def main() -> None:
         raise
 
 
+async def run_webhook(bot: Bot, dp: Dispatcher) -> None:
+    """Serve updates from Telegram's webhook until cancelled"""
+    logger = logging.getLogger(__name__)
+    pipeline = UpdatePipeline(dp, bot, workers=WEBHOOK_WORKERS, queue_size=WEBHOOK_QUEUE_SIZE)
+    app = build_webhook_app(pipeline, WEBHOOK_PATH, WEBHOOK_SECRET or None)
+    # Runs the dispatcher's startup/shutdown hooks with the web app
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+        await bot.set_webhook(
+            WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET or None,
+            drop_pending_updates=True
+        )
+        logger.info(f"Bot is running (webhook on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH})...")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run_sharded() -> None:
+    """Receive updates in this process and handle them in BOT_SHARDS worker processes"""
+    logger = logging.getLogger(__name__)
+    address = MARKET_DATA_FEEDER or default_address(DATA_DIR)
+    supervisor = ShardSupervisor(
+        run_shard,
+        BOT_SHARDS,
+        feeder=(run_feeder, (address,)),
+        queue_size=WEBHOOK_QUEUE_SIZE,
+        env={"MARKET_DATA_FEEDER": address}
+    )
+    supervisor.start()
+
+    bot = Bot(token=TELEGRAM_BOT_TOKEN)
+    try:
+        if WEBHOOK_URL:
+            runner = web.AppRunner(build_ingress_app(supervisor, WEBHOOK_PATH, WEBHOOK_SECRET or None))
+            await runner.setup()
+            try:
+                await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+                await bot.set_webhook(
+                    WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                    secret_token=WEBHOOK_SECRET or None,
+                    drop_pending_updates=True
+                )
+                logger.info(f"Bot is running ({BOT_SHARDS} shards, webhook on {WEBHOOK_HOST}:{WEBHOOK_PORT})...")
+                await asyncio.Event().wait()
+            finally:
+                await runner.cleanup()
+        else:
+            await bot.delete_webhook(drop_pending_updates=True)
+            logger.info(f"Bot is running ({BOT_SHARDS} shards)...")
+            await poll_updates(supervisor, TELEGRAM_BOT_TOKEN, router.resolve_used_update_types())
+    finally:
+        await supervisor.stop()
+        await bot.session.close()
+
+
+def run_shard(index: int, updates) -> None:
+    """Shard process entry point: handle the updates routed to this shard"""
+    try:
+        asyncio.run(serve_shard(index, updates))
+    except KeyboardInterrupt:
+        pass
+
+
+async def serve_shard(index: int, updates) -> None:
+    # One log file per process; shards rotating a shared file would clash
+    configure_logging(f"bot.shard{index}")
+    logger = logging.getLogger(__name__)
+    bot, dp = create_bot()
+    # Blocks until the update is queued, so nothing routed here is dropped
+    pipeline = UpdatePipeline(dp, bot, workers=WEBHOOK_WORKERS, queue_size=WEBHOOK_QUEUE_SIZE, put_timeout=None)
+    intake = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"shard-{index}-intake")
+    loop = asyncio.get_running_loop()
+
+    def next_update():
+        # Time out now and then so the thread can exit at shutdown
+        try:
+            return updates.get(timeout=1.0)
+        except queue.Empty:
+            return False
+
+    await dp.emit_startup(bot=bot)
+    pipeline.start()
+    logger.info(f"Shard {index} is running...")
+    try:
+        while True:
+            data = await loop.run_in_executor(intake, next_update)
+            if data is None:
+                # The supervisor is stopping
+                await pipeline.drain()
+                break
+            if data is False:
+                continue
+            try:
+                update = Update.model_validate(data, context={"bot": bot})
+            except ValueError as e:
+                logger.warning(f"Shard {index} skipped a malformed update: {str(e)}")
+                continue
+            await pipeline.submit(update)
+    finally:
+        await pipeline.stop()
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+        intake.shutdown(wait=False)
+
+
+def run_feeder(address: str) -> None:
+    """Feeder process entry point: share one exchange price stream with the shards"""
+    configure_logging("feeder")
+    try:
+        asyncio.run(serve_feeder(address, BINANCE_WS_URL, MARKET_DATA_MAX_AGE, MARKET_DATA_IDLE_TIMEOUT))
+    except KeyboardInterrupt:
+        pass
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,222 @@
+"""Per-user exchange accounts with LRU eviction and sharded workers"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+from config import BINANCE_WS_URL, USER_DATA_STREAM, USER_DATA_RECONCILE_INTERVAL
+from utils.single_flight import SingleFlight
+from .auto_investor import AutoInvestor
+from .binance_client import BinanceClient
+from .client_registry import ClientRegistry
+from .investment_analyzer import InvestmentAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+class CredentialsStore:
+    """API keys per Telegram user, read from a JSON file
+
+    The file maps user IDs to ``{"api_key": ..., "api_secret": ...}`` and
+    is reloaded when it changes. Users without an entry fall back to the
+    bot's own account.
+    """
+
+    def __init__(self, path: Optional[Path], default: Tuple[str, str]):
+        self.path = path
+        self.default = default
+        self._credentials: Dict[int, Tuple[str, str]] = {}
+        self._mtime: Optional[float] = None
+
+    async def get(self, user_id: int) -> Tuple[str, str]:
+        if self.path:
+            await asyncio.to_thread(self._reload_if_changed)
+        return self._credentials.get(user_id, self.default)
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            self._credentials = {}
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._credentials = {
+                int(user_id): (item["api_key"], item["api_secret"])
+                for user_id, item in data.items()
+            }
+            self._mtime = mtime
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable credentials file: {str(e)}")
+
+
+@dataclass
+class UserAccount:
+    user_id: int
+    client: BinanceClient
+    investor: AutoInvestor
+    shared: bool  # the bot's own account; never closed on eviction
+    active: int = 0
+    evicted: bool = False
+
+
+class AccountManager:
+    """Lazily created per-user clients and investors
+
+    At most ``max_accounts`` accounts are kept; the least recently used
+    one is closed once nothing is using it. Background work for accounts
+    is routed to ``shards`` worker tasks by user ID, so periodic checks
+    for thousands of users run with bounded concurrency (and in order per
+    user) while command handlers keep the rest of the event loop.
+    """
+
+    def __init__(
+            self,
+            credentials: CredentialsStore,
+            analyzer: InvestmentAnalyzer,
+            max_accounts: int = 256,
+            shards: int = 8,
+            io_workers: int = 16
+    ):
+        self.credentials = credentials
+        self.analyzer = analyzer
+        self.max_accounts = max_accounts
+        self.shards = shards
+        # All per-user clients share one I/O pool instead of 8 threads each
+        self.executor = ThreadPoolExecutor(
+            max_workers=io_workers,
+            thread_name_prefix="account-io"
+        )
+
+        self._accounts: "OrderedDict[int, UserAccount]" = OrderedDict()
+        self._creating = SingleFlight()
+        self._queues: List[asyncio.Queue] = []
+        self._workers: List[asyncio.Task] = []
+
+        # Metrics
+        self.created = 0
+        self.evictions = 0
+        self.jobs = 0
+
+    @asynccontextmanager
+    async def account(self, user_id: int) -> AsyncIterator[UserAccount]:
+        """Use a user's account; it stays open until the block exits"""
+        account = await self._get(user_id)
+        account.active += 1
+        try:
+            yield account
+        finally:
+            account.active -= 1
+            if account.evicted and not account.active:
+                self._close(account)
+
+    async def _get(self, user_id: int) -> UserAccount:
+        account = self._accounts.get(user_id)
+        if account is not None:
+            self._accounts.move_to_end(user_id)
+            return account
+
+        account = await self._creating.do((user_id,), lambda: self._create(user_id))
+        if user_id not in self._accounts:
+            self._accounts[user_id] = account
+            self._evict()
+        return account
+
+    async def _create(self, user_id: int) -> UserAccount:
+        api_key, api_secret = await self.credentials.get(user_id)
+        registry = ClientRegistry()
+        if (api_key, api_secret) == self.credentials.default:
+            client = registry.binance_client
+            shared = True
+        else:
+            # python-binance pings the exchange in its constructor
+            client = await asyncio.to_thread(
+                BinanceClient,
+                api_key,
+                api_secret,
+                market_data=registry.market_data,
+                rate_limiter=registry.rate_limiter,
+                resilience=registry.resilience,
+                executor=self.executor,
+                user_data_url=BINANCE_WS_URL if USER_DATA_STREAM else None,
+                reconcile_interval=USER_DATA_RECONCILE_INTERVAL,
+                clock=registry.clock
+            )
+            shared = False
+        self.created += 1
+        return UserAccount(user_id, client, AutoInvestor(client, self.analyzer), shared)
+
+    def _evict(self) -> None:
+        while len(self._accounts) > self.max_accounts:
+            _, account = self._accounts.popitem(last=False)
+            self.evictions += 1
+            account.evicted = True
+            if not account.active:
+                self._close(account)
+
+    @staticmethod
+    def _close(account: UserAccount) -> None:
+        if not account.shared:
+            account.client.close()
+
+    def submit(
+            self,
+            user_id: int,
+            job: Callable[[UserAccount], Awaitable[Any]]
+    ) -> "asyncio.Future[Any]":
+        """Queue job(account) on the user's shard and return a future for its result"""
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        self._queues[user_id % self.shards].put_nowait((user_id, job, future))
+        return future
+
+    def _start(self) -> None:
+        if self._workers:
+            return
+        self._queues = [asyncio.Queue() for _ in range(self.shards)]
+        self._workers = [
+            asyncio.create_task(self._worker(queue))
+            for queue in self._queues
+        ]
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            user_id, job, future = await queue.get()
+            if future.cancelled():
+                continue
+            self.jobs += 1
+            try:
+                async with self.account(user_id) as account:
+                    result = await job(account)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for account in self._accounts.values():
+            self._close(account)
+        self._accounts.clear()
+        self.executor.shutdown(wait=False)
+
+    def metrics(self) -> Dict[str, int]:
+        """Get cache and shard queue metrics"""
+        return {
+            "accounts": len(self._accounts),
+            "created": self.created,
+            "evictions": self.evictions,
+            "jobs": self.jobs,
+            "queued": sum(queue.qsize() for queue in self._queues)
+        }
@@ -0,0 +1,239 @@
+"""Periodic auto-investment with per-user state"""
+from collections import deque
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from functools import partial
+from pathlib import Path
+from typing import Awaitable, Callable, Deque, Dict, Optional
+import asyncio
+import json
+import logging
+import random
+import time
+from utils.atomic_file import atomic_write_text
+from .account_manager import AccountManager, UserAccount
+
+logger = logging.getLogger(__name__)
+
+Notify = Callable[[int, str], Awaitable]
+
+
+@dataclass
+class AutoInvestState:
+    user_id: int
+    chat_id: int
+    enabled: bool = True
+    last_product: Optional[str] = None  # "TYPE:product_id" of the last investment
+    last_apy: Optional[str] = None
+    last_invested_at: Optional[float] = None
+
+
+class AutoInvestScheduler:
+    """Runs auto-investment for enabled users every ``interval`` seconds
+
+    Ticks are spread by +/- ``jitter`` (a fraction of the interval), and
+    each user is evaluated with their own account on the account
+    manager's shard workers. Opportunities come from the analyzer's cached product catalog, so a
+    tick only calls the exchange for the wallet balance. An investment
+    fires when the best product beats the user's last one by at least
+    ``apy_improvement`` points, or when at least ``min_idle_balance`` is
+    sitting idle. Per-user state is persisted to ``state_path``.
+
+    When the bot runs as several shards, each scheduler keeps only the
+    chats it ``owns`` and, on its first start, takes them from the shared
+    ``seed_path``.
+    """
+
+    def __init__(
+            self,
+            accounts: AccountManager,
+            state_path: Optional[Path] = None,
+            interval: float = 900.0,
+            jitter: float = 0.1,
+            apy_improvement: Decimal = Decimal("0.5"),
+            min_idle_balance: Decimal = Decimal("50"),
+            notify: Optional[Notify] = None,
+            seed_path: Optional[Path] = None,
+            owns: Optional[Callable[[int], bool]] = None
+    ):
+        self.accounts = accounts
+        self.state_path = state_path
+        self.interval = interval
+        self.jitter = jitter
+        self.apy_improvement = apy_improvement
+        self.min_idle_balance = min_idle_balance
+        self.notify = notify
+        self.seed_path = seed_path
+        self.owns = owns
+
+        self.users: Dict[int, AutoInvestState] = self._load_state()
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.ticks = 0
+        self.investments = 0
+        self.skipped = 0
+        self.errors = 0
+        self._tick_costs: Deque[float] = deque(maxlen=1000)
+        self._decision_latencies: Deque[float] = deque(maxlen=1000)
+
+    def is_enabled(self, user_id: int) -> bool:
+        state = self.users.get(user_id)
+        return state is not None and state.enabled
+
+    async def toggle(self, user_id: int, chat_id: int) -> bool:
+        """Flip a user's auto-invest state; returns the new state"""
+        state = self.users.get(user_id)
+        if state is None:
+            state = AutoInvestState(user_id, chat_id, enabled=False)
+            self.users[user_id] = state
+        state.enabled = not state.enabled
+        state.chat_id = chat_id
+        await self._save_state()
+        return state.enabled
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            await asyncio.sleep(delay)
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Auto-invest tick failed: {str(e)}")
+
+    async def tick(self) -> None:
+        """Evaluate every enabled user once"""
+        started = time.monotonic()
+        self.ticks += 1
+        states = [s for s in self.users.values() if s.enabled]
+        results = await asyncio.gather(
+            *(
+                self.accounts.submit(state.user_id, partial(self._evaluate, state))
+                for state in states
+            ),
+            return_exceptions=True
+        )
+
+        for state, result in zip(states, results):
+            if isinstance(result, Exception):
+                self.errors += 1
+                logger.error(f"Auto-invest for user {state.user_id} failed: {str(result)}")
+                continue
+
+            if result["status"] == "success" and self.notify:
+                try:
+                    await self.notify(state.chat_id, result["message"])
+                except Exception as e:
+                    logger.warning(f"Failed to notify user {state.user_id}: {str(e)}")
+        self._tick_costs.append(time.monotonic() - started)
+
+    async def run_once(self, user_id: int) -> Dict[str, str]:
+        """Evaluate one enabled user right away"""
+        state = self.users.get(user_id)
+        if state is None or not state.enabled:
+            return {
+                "status": "info",
+                "message": "Auto-invest is disabled. Use /auto_invest to enable."
+            }
+        async with self.accounts.account(user_id) as account:
+            return await self._evaluate(state, account)
+
+    async def _evaluate(self, state: AutoInvestState, account: UserAccount) -> Dict[str, str]:
+        """Invest for one user if a better product or enough idle balance shows up"""
+        started = time.monotonic()
+        opportunity = await account.investor.find_opportunity()
+        if opportunity["status"] != "success":
+            self._decided(started, invested=False)
+            return opportunity
+
+        best_option = opportunity["best_option"]
+        available = opportunity["available_amount"]
+        product_key = f"{best_option.type}:{best_option.product_id}"
+        better = state.last_product is None or (
+            product_key != state.last_product
+            and best_option.apy >= Decimal(state.last_apy) + self.apy_improvement
+        )
+        idle = available >= self.min_idle_balance
+
+        if available >= best_option.min_amount and not (better or idle):
+            self._decided(started, invested=False)
+            return {
+                "status": "info",
+                "message": (
+                    "No better product or idle balance right now.\n"
+                    f"Checking again in about {round(self.interval / 60)} minutes."
+                )
+            }
+
+        result = await account.investor.invest(best_option, available)
+        invested = result["status"] == "success"
+        self._decided(started, invested=invested)
+        if invested:
+            state.last_product = product_key
+            state.last_apy = str(best_option.apy)
+            state.last_invested_at = time.time()
+            await self._save_state()
+        return result
+
+    def _decided(self, started: float, invested: bool) -> None:
+        self._decision_latencies.append(time.monotonic() - started)
+        if invested:
+            self.investments += 1
+        else:
+            self.skipped += 1
+
+    def metrics(self) -> Dict[str, float]:
+        """Get tick cost and decision latency metrics"""
+        def p99(samples: Deque[float]) -> float:
+            ordered = sorted(samples)
+            return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] if ordered else 0.0
+
+        return {
+            "enabled_users": sum(1 for s in self.users.values() if s.enabled),
+            "ticks": self.ticks,
+            "investments": self.investments,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "last_tick_cost": self._tick_costs[-1] if self._tick_costs else 0.0,
+            "p99_tick_cost": p99(self._tick_costs),
+            "p99_decision_latency": p99(self._decision_latencies)
+        }
+
+    def _load_state(self) -> Dict[int, AutoInvestState]:
+        path = self.state_path
+        if path and not path.exists():
+            path = self.seed_path
+        if not path or not path.exists():
+            return {}
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return {
+                int(item["user_id"]): AutoInvestState(**item) for item in data
+                if self.owns is None or self.owns(item["chat_id"])
+            }
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable auto-invest state: {str(e)}")
+            return {}
+
+    async def _save_state(self) -> None:
+        if not self.state_path:
+            return
+        snapshot = [asdict(state) for state in self.users.values()]
+        await asyncio.to_thread(self._write_state, snapshot)
+
+    def _write_state(self, snapshot) -> None:
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.state_path, json.dumps(snapshot))
+        except OSError as e:
+            logger.warning(f"Failed to save auto-invest state: {str(e)}")
@@ -1,6 +1,6 @@
 """Service for automatic investment management"""
 from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import Dict
 import logging
 from .investment_analyzer import InvestmentAnalyzer, InvestmentOption
 
@@ -11,70 +11,68 @@ class AutoInvestor:
     def __init__(self, binance_client, investment_analyzer: InvestmentAnalyzer):
         self.client = binance_client
         self.analyzer = investment_analyzer
-        self.auto_invest_enabled = False
 
-    def toggle_auto_invest(self) -> bool:
-        """Toggle auto-investment mode"""
-        self.auto_invest_enabled = not self.auto_invest_enabled
-        return self.auto_invest_enabled
-
-    async def check_and_invest(self) -> Dict[str, str]:
-        """Check for investment opportunities and invest if auto-invest is enabled"""
-        if not self.auto_invest_enabled:
+    async def find_opportunity(self) -> Dict:
+        """Get the best option and the idle balance available for it"""
+        analysis = await self.analyzer.analyze_opportunities()
+        if analysis["status"] != "success" or not analysis.get("best_option"):
+            return analysis
+
+        balance = await self.client.get_wallet_balance()
+        if balance["status"] != "success":
+            return balance
+
+        return {
+            "status": "success",
+            "best_option": analysis["best_option"],
+            "available_amount": Decimal(balance.get("available_amount", 0))
+        }
+
+    async def invest(self, best_option: InvestmentOption, available_amount: Decimal) -> Dict[str, str]:
+        """Invest as much of available_amount as best_option accepts"""
+        if available_amount < best_option.min_amount:
             return {
                 "status": "info",
-                "message": "Auto-invest is disabled. Use /auto_invest to enable."
+                "message": (
+                    f"Insufficient balance for auto-investment.\n"
+                    f"Required: {best_option.min_amount} {best_option.coin}\n"
+                    f"Available: {available_amount} {best_option.coin}"
+                )
             }
 
-        try:
-            # Analyze opportunities
-            analysis = await self.analyzer.analyze_opportunities()
-            if analysis["status"] != "success" or not analysis.get("best_option"):
-                return analysis
-
-            best_option = analysis["best_option"]
-
-            # Get available balance
-            balance = await self.client.get_wallet_balance()
-            if balance["status"] != "success":
-                return balance
-
-            available_amount = Decimal(balance.get("available_amount", 0))
-            if available_amount < best_option.min_amount:
-                return {
-                    "status": "info",
-                    "message": (
-                        f"Insufficient balance for auto-investment.\n"
-                        f"Required: {best_option.min_amount} {best_option.coin}\n"
-                        f"Available: {available_amount} {best_option.coin}"
-                    )
-                }
+        # Calculate investment amount
+        invest_amount = min(
+            available_amount,
+            best_option.max_amount or available_amount
+        )
 
-            # Calculate investment amount
-            invest_amount = min(
-                available_amount,
-                best_option.max_amount or available_amount
-            )
+        # Place investment
+        result = await self.client.stake_coins(
+            product_id=best_option.product_id,
+            amount=invest_amount
+        )
 
-            # Place investment
-            result = await self.client.stake_coins(
-                product_id=best_option.product_id,
-                amount=invest_amount
-            )
+        if result["status"] == "success":
+            return {
+                "status": "success",
+                "message": (
+                    "✅ Auto-investment successful!\n\n"
+                    f"Product: {best_option.coin} {best_option.type}\n"
+                    f"Amount: {invest_amount} {best_option.coin}\n"
+                    f"APY: {best_option.apy}%\n"
+                    f"Duration: {best_option.duration} days"
+                )
+            }
+        else:
+            return result
 
-            if result["status"] == "success":
-                return {
-                    "status": "success",
-                    "message": (
-                        "✅ Auto-investment successful!\n\n"
-                        f"Product: {best_option.coin} {best_option.type}\n"
-                        f"Amount: {invest_amount} {best_option.coin}\n"
-                        f"APY: {best_option.apy}%\n"
-                        f"Duration: {best_option.duration} days"
-                    )
-                }
-            else:
-                return result
+    async def check_and_invest(self) -> Dict[str, str]:
+        """Check for investment opportunities and invest in the best one"""
+        try:
+            opportunity = await self.find_opportunity()
+            if opportunity["status"] != "success":
+                return opportunity
+            return await self.invest(opportunity["best_option"], opportunity["available_amount"])
 
         except Exception as e:
             logger.error(f"Error in auto-investment: {str(e)}")
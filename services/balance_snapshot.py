@@ -0,0 +1,60 @@
+"""Compact wallet balance snapshots with lazily rendered pages"""
+from array import array
+from typing import Dict, Iterable, List
+
+
+class BalanceSnapshot:
+    """Non-zero balances parsed once into parallel arrays
+
+    Zero balances are dropped while parsing, so accounts full of dust
+    entries keep only what is shown. Pages are rendered on demand.
+    """
+
+    __slots__ = ("assets", "free", "locked", "raw_free", "page_size", "_index")
+
+    def __init__(self, page_size: int = 10):
+        self.assets: List[str] = []
+        self.free = array("d")
+        self.locked = array("d")
+        self.raw_free: List[str] = []  # exact exchange strings for amount math
+        self.page_size = page_size
+        self._index: Dict[str, int] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, str]], page_size: int = 10) -> "BalanceSnapshot":
+        """Build from get_account-style rows in a single pass"""
+        snapshot = cls(page_size)
+        for row in rows:
+            free = float(row['free'])
+            locked = float(row['locked'])
+            if free == 0 and locked == 0:
+                continue
+            snapshot._index[row['asset']] = len(snapshot.assets)
+            snapshot.assets.append(row['asset'])
+            snapshot.free.append(free)
+            snapshot.locked.append(locked)
+            snapshot.raw_free.append(row['free'])
+        return snapshot
+
+    def __len__(self) -> int:
+        return len(self.assets)
+
+    def available(self, asset: str) -> str:
+        """Get the free amount of an asset as the exchange reported it"""
+        i = self._index.get(asset)
+        return self.raw_free[i] if i is not None else "0"
+
+    @property
+    def page_count(self) -> int:
+        return -(-len(self.assets) // self.page_size)
+
+    def render_page(self, page: int) -> str:
+        """Render one page of balances as a message"""
+        start = page * self.page_size
+        lines = [
+            f"🪙 {self.assets[i]}:\n"
+            f"   Available: {self.free[i]:.4f}\n"
+            f"   Locked: {self.locked[i]:.4f}\n"
+            for i in range(start, min(start + self.page_size, len(self.assets)))
+        ]
+        return "💰 Testnet Wallet Balance:\n\n" + "\n".join(lines)
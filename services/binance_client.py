@@ -1,71 +1,168 @@
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
+from functools import partial
+from requests.adapters import HTTPAdapter
+import asyncio
 import logging
-from typing import Dict, Optional, List
+from typing import Any, Callable, Dict, Optional, List, Tuple
+from utils.single_flight import SingleFlight
+from utils.time_sync import ClockOffsetTracker
+from .balance_snapshot import BalanceSnapshot
+from .market_data import BinanceMarketDataFeed
+from .rate_limiter import Priority, RateLimiter
+from .resilience import Resilience
+from .user_data_stream import UserDataStream
 
 logger = logging.getLogger(__name__)
 
 
 class BinanceClient:
-    def __init__(self, api_key: str, api_secret: str):
+    def __init__(
+            self,
+            api_key: str,
+            api_secret: str,
+            max_workers: int = 8,
+            pool_size: int = 10,
+            market_data: Optional[BinanceMarketDataFeed] = None,
+            rate_limiter: Optional[RateLimiter] = None,
+            resilience: Optional[Resilience] = None,
+            executor: Optional[ThreadPoolExecutor] = None,
+            user_data_url: Optional[str] = None,
+            reconcile_interval: float = 300.0,
+            clock: Optional[ClockOffsetTracker] = None
+    ):
         self.client = Client(
             api_key=api_key,
             api_secret=api_secret,
-            testnet=True  # Using testnet for testing
+            testnet=True,  # Using testnet for testing
+            requests_params={"timeout": 15}  # Hard cap so stuck threads are freed
         )
+        # Keep-alive connection pool shared by all executor threads
+        self.http_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.client.session.mount("https://", self.http_adapter)
+        # Signed requests carry a timestamp corrected by the tracker's offset
+        self.clock = clock
+        if clock:
+            clock.attach(self.client)
+        self.market_data = market_data
+        self.single_flight = SingleFlight()
+        self.rate_limiter = rate_limiter
+        if rate_limiter:
+            rate_limiter.attach(self.client.session)
+        self.resilience = resilience
+        # Last-good results are scoped by API key so they never leak
+        # between accounts
+        self.cache_scope = api_key
+        # python-binance is synchronous, so REST calls run on a bounded
+        # thread pool instead of blocking the event loop. Per-user clients
+        # share one pool owned by their AccountManager.
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="binance-io"
+        )
+        # Balances are served from the user-data stream once it has synced
+        self.user_data = UserDataStream(
+            self,
+            user_data_url,
+            reconcile_interval=reconcile_interval
+        ) if user_data_url else None
+        self._ledger_snapshot_cache: Optional[Tuple[float, BalanceSnapshot]] = None
 
-    def _format_balance(self, balance: Dict[str, str]) -> str:
-        """Format a single balance entry"""
-        free = float(balance['free'])
-        locked = float(balance['locked'])
-
-        if free == 0 and locked == 0:
-            return ""
-
-        return (
-            f"🪙 {balance['asset']}:\n"
-            f"   Available: {free:.4f}\n"
-            f"   Locked: {locked:.4f}\n"
+    async def _run(
+            self,
+            func: Callable[..., Any],
+            *args,
+            priority: Priority = Priority.MARKET_DATA,
+            **kwargs
+    ) -> Any:
+        """Run a blocking client call in the I/O executor"""
+        endpoint = func.__name__
+
+        async def attempt() -> Any:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(endpoint, priority)
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+            except BinanceAPIException as e:
+                if e.code == -1021 and self.clock:
+                    # Timestamp outside recvWindow: the clock has drifted
+                    self.clock.resync()
+                raise
+
+        if self.resilience is None:
+            return await attempt()
+        return await self.resilience.call(
+            endpoint,
+            attempt,
+            # Orders are never hedged, and never resent after a timeout or dropped connection
+            idempotent=priority is not Priority.ORDER,
+            cache_key=(self.cache_scope, endpoint, *args, *sorted(kwargs.items()))
         )
 
-    def _chunk_balances(self, balances: List[Dict[str, str]], chunk_size: int = 10) -> List[str]:
-        """Split balances into chunks to avoid message length limits"""
-        messages = []
-        current_chunk = []
-        current_length = 0
+    async def _shared(
+            self,
+            func: Callable[..., Any],
+            *args,
+            priority: Priority = Priority.MARKET_DATA,
+            **kwargs
+    ) -> Any:
+        """Run a read-only call, sharing it with identical concurrent callers"""
+        key = (func.__name__, *args, *sorted(kwargs.items()))
+        return await self.single_flight.do(
+            key,
+            lambda: self._run(func, *args, priority=priority, **kwargs)
+        )
 
-        for balance in balances:
-            formatted = self._format_balance(balance)
-            if not formatted:
+    def pool_stats(self) -> Dict[str, int]:
+        """Get connection pool reuse counters"""
+        requests_sent = 0
+        connections_opened = 0
+        pools = self.http_adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
                 continue
-
-            if current_length >= chunk_size:
-                messages.append("💰 Testnet Wallet Balance:\n\n" + "\n".join(current_chunk))
-                current_chunk = []
-                current_length = 0
-
-            current_chunk.append(formatted)
-            current_length += 1
-
-        if current_chunk:
-            messages.append("💰 Testnet Wallet Balance:\n\n" + "\n".join(current_chunk))
-
-        return messages
+            requests_sent += pool.num_requests
+            connections_opened += pool.num_connections
+
+        return {
+            "requests": requests_sent,
+            "hits": requests_sent - connections_opened,
+            "misses": connections_opened
+        }
+
+    def close(self) -> None:
+        """Release the I/O executor and HTTP session"""
+        if self.user_data:
+            self.user_data.close()
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
+        self.client.close_connection()
+
+    def _ledger_snapshot(self) -> BalanceSnapshot:
+        """Get a snapshot of the stream ledger, rebuilt only after it changes"""
+        ledger = self.user_data.ledger
+        if self._ledger_snapshot_cache is None or self._ledger_snapshot_cache[0] != ledger.updated_at:
+            self._ledger_snapshot_cache = (ledger.updated_at, BalanceSnapshot.from_rows(ledger.as_rows()))
+        return self._ledger_snapshot_cache[1]
 
     async def get_wallet_balance(self) -> Dict[str, str]:
         """Get testnet wallet balance"""
         try:
-            account = self.client.get_account()
-            balances = account['balances']
-
-            # Filter and sort balances
-            non_zero = [
-                b for b in balances
-                if float(b['free']) > 0 or float(b['locked']) > 0
-            ]
-
-            if not non_zero:
+            if self.user_data:
+                self.user_data.start()
+            # The stream's first snapshot serves the first call; no second get_account
+            if self.user_data and (self.user_data.ledger.synced or await self.user_data.wait_first_sync()):
+                snapshot = self._ledger_snapshot()
+            else:
+                account = await self._shared(self.client.get_account, priority=Priority.BALANCE)
+                snapshot = BalanceSnapshot.from_rows(account['balances'])
+
+            if not snapshot:
                 return {
                     "status": "success",
                     "message": (
@@ -75,24 +172,12 @@ class BinanceClient:
                     "available_amount": "0"
                 }
 
-            # Split balances into chunks
-            messages = self._chunk_balances(non_zero)
-
-            # Return first chunk with info about additional messages
-            if len(messages) > 1:
-                messages[0] += f"\n\n(Showing {len(messages)} parts. Additional balances in next messages)"
-
-            # Get USDT balance for investment calculations
-            usdt_balance = next(
-                (b for b in non_zero if b['asset'] == 'USDT'),
-                {'free': '0'}
-            )
-
+            # Only the first page is rendered here; the others render as the user pages
             return {
                 "status": "success",
-                "message": messages[0],
-                "additional_messages": messages[1:] if len(messages) > 1 else [],
-                "available_amount": usdt_balance['free']
+                "message": snapshot.render_page(0),
+                "available_amount": snapshot.available('USDT'),
+                "snapshot": snapshot
             }
 
         except BinanceAPIException as e:
@@ -110,26 +195,60 @@ class BinanceClient:
 
     async def get_market_price(self, symbol: str) -> Optional[Decimal]:
         """Get current market price for a symbol"""
+        if self.market_data:
+            price = self.market_data.get_price(symbol)
+            if price is not None:
+                return price
+
         try:
-            ticker = self.client.get_symbol_ticker(symbol=symbol)
-            return Decimal(ticker['price'])
+            ticker = await self._shared(self.client.get_symbol_ticker, symbol=symbol)
+            price = Decimal(ticker['price'])
+            if self.market_data:
+                # Valid symbol: stream it so the next lookups skip REST
+                self.market_data.update_price(symbol, price)
+                self.market_data.touch(symbol)
+            return price
         except Exception as e:
             logger.error(f"Error fetching price for {symbol}: {str(e)}")
             return None
 
+    async def get_order_book(self, symbol: str, limit: int = 1000) -> Optional[Dict]:
+        """Get an order book snapshot for a symbol"""
+        try:
+            return await self._shared(self.client.get_order_book, symbol=symbol, limit=limit)
+        except Exception as e:
+            logger.error(f"Error fetching order book for {symbol}: {str(e)}")
+            return None
+
+    async def get_exchange_info(self) -> Optional[Dict]:
+        """Get exchange trading rules and symbol filters"""
+        try:
+            return await self._shared(self.client.get_exchange_info, priority=Priority.ANALYTICS)
+        except Exception as e:
+            logger.error(f"Error fetching exchange info: {str(e)}")
+            return None
+
     async def place_test_order(
             self,
             symbol: str,
             side: str,
-            quantity: Decimal
+            quantity: Decimal,
+            client_order_id: Optional[str] = None
     ) -> Dict[str, str]:
         """Place a test order on Binance testnet"""
         try:
-            order = self.client.create_test_order(
+            params = {}
+            if client_order_id:
+                params['newClientOrderId'] = client_order_id
+
+            order = await self._run(
+                self.client.create_test_order,
+                priority=Priority.ORDER,
                 symbol=symbol,
                 side=side,
                 type='MARKET',
-                quantity=float(quantity)
+                quantity=float(quantity),
+                **params
             )
 
             return {
@@ -161,7 +280,9 @@ class BinanceClient:
         """Get test funds from Binance testnet"""
         try:
             # Create test orders to receive test funds
-            self.client.create_test_order(
+            await self._run(
+                self.client.create_test_order,
+                priority=Priority.ORDER,
                 symbol='BTCUSDT',
                 side='BUY',
                 type='MARKET',
@@ -0,0 +1,248 @@
+"""Process-wide registry of shared exchange clients"""
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from config import (
+    BINANCE_API_KEY,
+    BINANCE_API_SECRET,
+    BINANCE_IO_WORKERS,
+    BINANCE_POOL_SIZE,
+    BINANCE_WS_URL,
+    MARKET_DATA_MAX_AGE,
+    MARKET_DATA_IDLE_TIMEOUT,
+    BINANCE_WEIGHT_LIMIT,
+    DATA_DIR,
+    SYMBOL_CATALOG_TTL,
+    ORDER_PIPELINE_WORKERS,
+    ORDER_DEDUPE_TTL,
+    ORDER_DEDUPE_DB,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_TIMEOUT,
+    PRODUCT_CATALOG_TTL,
+    PRODUCT_CATALOG_MAX_STALE,
+    USER_DATA_STREAM,
+    USER_DATA_RECONCILE_INTERVAL,
+    BOT_SHARDS,
+    MARKET_DATA_FEEDER,
+    CLOCK_SYNC_INTERVAL,
+    CLOCK_SYNC_TIMEOUT,
+    NTP_SERVERS
+)
+from utils.time_sync import ClockOffsetTracker, ntp_source
+from .binance_client import BinanceClient
+from .market_data import BinanceMarketDataFeed, MarketDataFeed
+from .market_data_relay import RemoteMarketDataFeed
+from .order_book import OrderBookManager
+from .product_catalog import ProductCatalog
+from .order_dedupe import OrderDedupeStore
+from .order_pipeline import OrderPipeline
+from .rate_limiter import BINANCE_WEIGHTS, RateLimiter
+from .resilience import Resilience
+from .symbol_catalog import SymbolCatalog, SymbolFilters, parse_binance_exchange_info
+
+
+class ClientRegistry:
+    _instance = None
+    _lock = Lock()
+    _binance_clients: Dict[Tuple[str, str], BinanceClient] = {}
+    _market_data: Optional[MarketDataFeed] = None
+    _rate_limiter: Optional[RateLimiter] = None
+    _symbol_catalog: Optional[SymbolCatalog] = None
+    _order_books: Optional[OrderBookManager] = None
+    _order_pipeline: Optional[OrderPipeline] = None
+    _dedupe_store: Optional[OrderDedupeStore] = None
+    _resilience: Optional[Resilience] = None
+    _product_catalog: Optional[ProductCatalog] = None
+    _clock: Optional[ClockOffsetTracker] = None
+    _hits = 0
+    _misses = 0
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ClientRegistry, cls).__new__(cls)
+        return cls._instance
+
+    @property
+    def market_data(self) -> MarketDataFeed:
+        """Get the shared Binance price feed (market data is not per-account)"""
+        if ClientRegistry._market_data is None and MARKET_DATA_FEEDER:
+            # Sharded: one feeder process streams prices for every shard
+            ClientRegistry._market_data = RemoteMarketDataFeed(
+                MARKET_DATA_FEEDER,
+                max_age=MARKET_DATA_MAX_AGE,
+                idle_timeout=MARKET_DATA_IDLE_TIMEOUT
+            )
+        elif ClientRegistry._market_data is None:
+            ClientRegistry._market_data = BinanceMarketDataFeed(
+                BINANCE_WS_URL,
+                max_age=MARKET_DATA_MAX_AGE,
+                idle_timeout=MARKET_DATA_IDLE_TIMEOUT
+            )
+        return ClientRegistry._market_data
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Get the shared Binance weight limiter (limits are per IP, not per key)"""
+        if ClientRegistry._rate_limiter is None:
+            # Limits are per IP, so shards split them
+            ClientRegistry._rate_limiter = RateLimiter(
+                max(1, BINANCE_WEIGHT_LIMIT // BOT_SHARDS),
+                60.0,
+                weights=BINANCE_WEIGHTS,
+                name="binance"
+            )
+        return ClientRegistry._rate_limiter
+
+    @property
+    def order_books(self) -> OrderBookManager:
+        """Get the shared order book mirrors for actively traded symbols"""
+        if ClientRegistry._order_books is None:
+            ClientRegistry._order_books = OrderBookManager(
+                self.binance_client,
+                BINANCE_WS_URL,
+                idle_timeout=MARKET_DATA_IDLE_TIMEOUT
+            )
+        return ClientRegistry._order_books
+
+    @property
+    def order_pipeline(self) -> OrderPipeline:
+        """Get the shared order submission pipeline"""
+        if ClientRegistry._order_pipeline is None:
+            ClientRegistry._order_pipeline = OrderPipeline(
+                self.binance_client,
+                symbol_catalog=self.symbol_catalog,
+                dedupe_store=self.dedupe_store,
+                workers=ORDER_PIPELINE_WORKERS
+            )
+        return ClientRegistry._order_pipeline
+
+    @property
+    def dedupe_store(self) -> OrderDedupeStore:
+        """Get the shared store of already-submitted client order IDs"""
+        if ClientRegistry._dedupe_store is None:
+            ClientRegistry._dedupe_store = OrderDedupeStore(
+                ttl=ORDER_DEDUPE_TTL,
+                db_path=Path(ORDER_DEDUPE_DB) if ORDER_DEDUPE_DB else None
+            )
+        return ClientRegistry._dedupe_store
+
+    @property
+    def product_catalog(self) -> ProductCatalog:
+        """Get the investment product catalog shared by analyzers and services"""
+        if ClientRegistry._product_catalog is None:
+            ClientRegistry._product_catalog = ProductCatalog(
+                ttl=PRODUCT_CATALOG_TTL,
+                max_stale=PRODUCT_CATALOG_MAX_STALE,
+                cache_path=Path(DATA_DIR) / "investment_products.json"
+            )
+        return ClientRegistry._product_catalog
+
+    @property
+    def symbol_catalog(self) -> SymbolCatalog:
+        """Get the shared Binance symbol catalog built from exchangeInfo"""
+        if ClientRegistry._symbol_catalog is None:
+            ClientRegistry._symbol_catalog = SymbolCatalog(
+                self._load_symbol_filters,
+                cache_path=Path(DATA_DIR) / "binance_exchange_info.json",
+                ttl=SYMBOL_CATALOG_TTL
+            )
+        return ClientRegistry._symbol_catalog
+
+    async def _load_symbol_filters(self) -> Optional[List[SymbolFilters]]:
+        info = await self.binance_client.get_exchange_info()
+        return parse_binance_exchange_info(info) if info else None
+
+    @property
+    def resilience(self) -> Resilience:
+        """Get the shared Binance retry/circuit-breaker layer"""
+        if ClientRegistry._resilience is None:
+            ClientRegistry._resilience = Resilience(
+                failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=BREAKER_RESET_TIMEOUT
+            )
+        return ClientRegistry._resilience
+
+    @property
+    def clock(self) -> ClockOffsetTracker:
+        """Get the shared clock offset tracker used to timestamp signed requests"""
+        if ClientRegistry._clock is None:
+            clock = ClockOffsetTracker(interval=CLOCK_SYNC_INTERVAL, timeout=CLOCK_SYNC_TIMEOUT)
+            clock.add_source(
+                "binance",
+                lambda: self.binance_client.client.get_server_time()["serverTime"]
+            )
+            for server in NTP_SERVERS:
+                clock.add_source(f"ntp:{server}", ntp_source(server, CLOCK_SYNC_TIMEOUT))
+            ClientRegistry._clock = clock
+        return ClientRegistry._clock
+
+    @property
+    def binance_client(self) -> BinanceClient:
+        """Get the shared client for the bot's own Binance account"""
+        return self.get_binance_client(BINANCE_API_KEY, BINANCE_API_SECRET)
+
+    def get_binance_client(self, api_key: str, api_secret: str) -> BinanceClient:
+        """Get or create the pooled client for a set of credentials"""
+        key = (api_key, api_secret)
+        with self._lock:
+            client = self._binance_clients.get(key)
+            if client is not None:
+                ClientRegistry._hits += 1
+                return client
+
+            ClientRegistry._misses += 1
+            client = BinanceClient(
+                api_key,
+                api_secret,
+                max_workers=BINANCE_IO_WORKERS,
+                pool_size=BINANCE_POOL_SIZE,
+                market_data=self.market_data,
+                rate_limiter=self.rate_limiter,
+                resilience=self.resilience,
+                user_data_url=BINANCE_WS_URL if USER_DATA_STREAM else None,
+                reconcile_interval=USER_DATA_RECONCILE_INTERVAL,
+                clock=self.clock
+            )
+            self._binance_clients[key] = client
+            return client
+
+    def stats(self) -> Dict[str, int]:
+        """Get registry and connection pool hit/miss counters"""
+        result = {
+            "clients": len(self._binance_clients),
+            "registry_hits": self._hits,
+            "registry_misses": self._misses,
+            "pool_requests": 0,
+            "pool_hits": 0,
+            "pool_misses": 0
+        }
+        for client in list(self._binance_clients.values()):
+            pool = client.pool_stats()
+            result["pool_requests"] += pool["requests"]
+            result["pool_hits"] += pool["hits"]
+            result["pool_misses"] += pool["misses"]
+        return result
+
+    async def close(self) -> None:
+        """Stop shared streams and close every registered client"""
+        if ClientRegistry._market_data is not None:
+            await ClientRegistry._market_data.stop()
+        if ClientRegistry._order_pipeline is not None:
+            await ClientRegistry._order_pipeline.stop()
+        if ClientRegistry._order_books is not None:
+            await ClientRegistry._order_books.stop()
+        if ClientRegistry._symbol_catalog is not None:
+            await ClientRegistry._symbol_catalog.stop()
+        if ClientRegistry._product_catalog is not None:
+            await ClientRegistry._product_catalog.stop()
+        if ClientRegistry._dedupe_store is not None:
+            ClientRegistry._dedupe_store.close()
+        if ClientRegistry._clock is not None:
+            await ClientRegistry._clock.stop()
+        for client in list(self._binance_clients.values()):
+            if client.user_data:
+                await client.user_data.stop()
+        with self._lock:
+            for client in self._binance_clients.values():
+                client.close()
+            self._binance_clients.clear()
@@ -0,0 +1,382 @@
+"""Persistent FSM storage with a write-behind cache"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+from urllib.parse import urlparse
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+logger = logging.getLogger(__name__)
+
+# key -> (state, data, expires_at); None data means "delete"
+Batch = List[Tuple[str, Optional[str], Optional[Dict[str, Any]], float]]
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if "__decimal__" in obj and len(obj) == 1:
+        return Decimal(obj["__decimal__"])
+    return obj
+
+
+def dumps(data: Mapping[str, Any]) -> str:
+    """Serialize FSM data; Decimals (e.g. order quantities) survive the round trip"""
+    return json.dumps(data, default=_encode)
+
+
+def loads(raw: str) -> Dict[str, Any]:
+    return json.loads(raw, object_hook=_decode)
+
+
+class SQLiteBackend:
+    """FSM records in a local SQLite database (WAL mode)
+
+    Expired rows are never returned, so they are purged at most once every
+    ``purge_interval`` seconds rather than on every write.
+    """
+
+    def __init__(self, path: Path, purge_interval: float = 60.0):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.purge_interval = purge_interval
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fsm_state ("
+            "key TEXT PRIMARY KEY, "
+            "state TEXT, "
+            "data TEXT NOT NULL, "
+            "expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS fsm_state_expires_at ON fsm_state(expires_at)")
+        self._db.execute("DELETE FROM fsm_state WHERE expires_at < ?", (time.time(),))
+        self._db.commit()
+        self._purged_at = time.monotonic()
+
+    async def load(self, key: str) -> Optional[Tuple[Optional[str], Dict[str, Any], float]]:
+        return await asyncio.to_thread(self._load, key)
+
+    def _load(self, key: str) -> Optional[Tuple[Optional[str], Dict[str, Any], float]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state, data, expires_at FROM fsm_state WHERE key = ?",
+                (key,)
+            ).fetchone()
+        if row is None or row[2] < time.time():
+            return None
+        return row[0], loads(row[1]), row[2]
+
+    async def write(self, batch: Batch) -> None:
+        await asyncio.to_thread(self._write, batch)
+
+    def _write(self, batch: Batch) -> None:
+        # One transaction per batch
+        with self._lock, self._db:
+            self._db.executemany(
+                "DELETE FROM fsm_state WHERE key = ?",
+                [(key,) for key, _, data, _ in batch if data is None]
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO fsm_state VALUES (?, ?, ?, ?)",
+                [
+                    (key, state, dumps(data), expires_at)
+                    for key, state, data, expires_at in batch if data is not None
+                ]
+            )
+            if time.monotonic() - self._purged_at >= self.purge_interval:
+                self._purged_at = time.monotonic()
+                self._db.execute("DELETE FROM fsm_state WHERE expires_at < ?", (time.time(),))
+
+    async def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class RedisError(Exception):
+    """An error reply from the server; the connection is still usable"""
+
+
+class RedisBackend:
+    """FSM records in any server speaking the Redis protocol (RESP)
+
+    Only GET, SET ... PX and DEL are used, so a local stand-in for Redis
+    works as well as Redis itself.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "fsm"):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.password:
+                await self._execute_unlocked([["AUTH", self.password]])
+            if self.db:
+                await self._execute_unlocked([["SELECT", str(self.db)]])
+        except BaseException:
+            # Never reuse a connection that failed to authenticate
+            self._drop()
+            raise
+
+    async def _execute(self, commands: List[List[str]]) -> List[Any]:
+        """Send commands as one pipeline and read all replies"""
+        async with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._writer is None:
+                        await self._connect()
+                    return await self._execute_unlocked(commands)
+                except RedisError:
+                    raise
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    self._drop()
+                    if attempt:
+                        raise
+                except BaseException:
+                    # Replies left unread would be taken as answers to the next pipeline
+                    self._drop()
+                    raise
+
+    def _drop(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._writer = None
+
+    async def _execute_unlocked(self, commands: List[List[str]]) -> List[Any]:
+        payload = bytearray()
+        for command in commands:
+            payload += f"*{len(command)}\r\n".encode()
+            for arg in command:
+                encoded = arg.encode("utf-8")
+                payload += f"${len(encoded)}\r\n".encode() + encoded + b"\r\n"
+        self._writer.write(payload)
+        await self._writer.drain()
+        # Read every reply before raising so the connection stays in step
+        replies = [await self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    async def _read_reply(self) -> Any:
+        line = (await self._reader.readuntil(b"\r\n"))[:-2]
+        kind, rest = line[:1], line[1:]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            return RedisError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            return (await self._reader.readexactly(length + 2))[:-2].decode("utf-8")
+        if kind == b"*":
+            return [await self._read_reply() for _ in range(int(rest))]
+        raise RuntimeError(f"Unexpected Redis reply: {line!r}")
+
+    async def load(self, key: str) -> Optional[Tuple[Optional[str], Dict[str, Any], float]]:
+        raw = (await self._execute([["GET", f"{self.prefix}:{key}"]]))[0]
+        if raw is None:
+            return None
+        record = loads(raw)
+        return record["state"], record["data"], record["expires_at"]
+
+    async def write(self, batch: Batch) -> None:
+        now = time.time()
+        commands = []
+        for key, state, data, expires_at in batch:
+            if data is None or expires_at <= now:
+                commands.append(["DEL", f"{self.prefix}:{key}"])
+            else:
+                record = dumps({"state": state, "data": data, "expires_at": expires_at})
+                ttl_ms = str(int((expires_at - now) * 1000))
+                commands.append(["SET", f"{self.prefix}:{key}", record, "PX", ttl_ms])
+        await self._execute(commands)
+
+    async def close(self) -> None:
+        self._drop()
+
+
+@dataclass
+class _Record:
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    expires_at: float = 0.0
+
+
+class WriteBehindStorage(BaseStorage):
+    """aiogram FSM storage that serves reads from memory and batches writes
+
+    Writes land in the cache immediately and reach the backend at most
+    ``flush_interval`` seconds later, in one batch. Flows untouched for
+    ``ttl`` seconds expire. With several bot processes, route each chat
+    to one process so no two caches own the same key.
+    """
+
+    def __init__(
+            self,
+            backend,
+            ttl: float = 3600.0,
+            flush_interval: float = 0.05,
+            key_builder: Optional[DefaultKeyBuilder] = None,
+            retry_delay: float = 1.0
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self._cache: Dict[str, _Record] = {}
+        self._dirty: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._writes = 0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+
+    async def _record(self, key: StorageKey) -> Tuple[str, _Record]:
+        name = self.key_builder.build(key)
+        now = time.time()
+        record = self._cache.get(name)
+        if record is not None and (record.expires_at >= now or name in self._dirty):
+            self.hits += 1
+            return name, record
+
+        self.misses += 1
+        loaded = await self.backend.load(name)
+        # A concurrent write may have filled the cache while loading
+        record = self._cache.get(name)
+        if record is None or record.expires_at < now:
+            record = _Record(*loaded) if loaded else _Record(expires_at=now + self.ttl)
+            self._cache[name] = record
+        return name, record
+
+    def _touch(self, name: str, record: _Record) -> None:
+        record.expires_at = time.time() + self.ttl
+        self._dirty.add(name)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        name, record = await self._record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._touch(name, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        _, record = await self._record(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        name, record = await self._record(key)
+        record.data = dict(data)
+        self._touch(name, record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, record = await self._record(key)
+        return dict(record.data)
+
+    async def _flush_later(self, delay: Optional[float] = None) -> None:
+        await asyncio.sleep(self.flush_interval if delay is None else delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write every dirty record to the backend in one batch"""
+        if not self._dirty:
+            return
+        names, self._dirty = self._dirty, set()
+        batch: Batch = []
+        deleted = []
+        for name in names:
+            record = self._cache[name]
+            if record.state is None and not record.data:
+                # Finished or cancelled flow: nothing worth keeping
+                batch.append((name, None, None, 0.0))
+                deleted.append(name)
+            else:
+                batch.append((name, record.state, dict(record.data), record.expires_at))
+
+        try:
+            await self.backend.write(batch)
+            self.flushes += 1
+        except Exception as e:
+            logger.error(f"FSM storage flush failed, retrying in {self.retry_delay}s: {str(e)}")
+            self._dirty |= names
+            if not self._closing:
+                self._flush_task = asyncio.create_task(self._flush_later(self.retry_delay))
+            return
+
+        for name in deleted:
+            # Unless the flow restarted while the delete was being written
+            record = self._cache.get(name)
+            if record is not None and name not in self._dirty and record.state is None and not record.data:
+                del self._cache[name]
+
+        self._writes += len(batch)
+        if self._writes >= 1024:
+            # Amortised cleanup of expired, already persisted entries
+            self._writes = 0
+            now = time.time()
+            for name in [n for n, r in self._cache.items() if r.expires_at < now and n not in self._dirty]:
+                del self._cache[name]
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.flush()
+        await self.backend.close()
+
+    def metrics(self) -> Dict[str, int]:
+        """Get cache and flush metrics"""
+        return {
+            "cached": len(self._cache),
+            "dirty": len(self._dirty),
+            "hits": self.hits,
+            "misses": self.misses,
+            "flushes": self.flushes
+        }
+
+
+def create_storage(
+        kind: str,
+        sqlite_path: Optional[Path] = None,
+        redis_url: Optional[str] = None,
+        ttl: float = 3600.0,
+        flush_interval: float = 0.05
+) -> BaseStorage:
+    """Build the FSM storage selected in config ("memory", "sqlite" or "redis")"""
+    if kind == "sqlite":
+        return WriteBehindStorage(SQLiteBackend(sqlite_path), ttl=ttl, flush_interval=flush_interval)
+    if kind == "redis":
+        return WriteBehindStorage(RedisBackend(redis_url), ttl=ttl, flush_interval=flush_interval)
+    if kind != "memory":
+        logger.warning(f"Unknown FSM storage {kind!r}, using memory")
+    return MemoryStorage()
@@ -1,8 +1,12 @@
 """Service for analyzing investment opportunities"""
 from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from collections import deque
 from dataclasses import dataclass
+import asyncio
 import logging
+from .product_catalog import CatalogDiff, ProductCatalog
+from .product_index import ProductIndex
 
 logger = logging.getLogger(__name__)
 
@@ -18,42 +22,149 @@ class InvestmentOption:
     type: str  # 'STAKING', 'SAVINGS', 'LAUNCHPOOL'
 
 
+@dataclass
+class ProductSource:
+    name: str
+    fetch: Callable[[], Awaitable[List[Dict]]]
+    parse: Callable[[List[Dict]], List[InvestmentOption]]
+    timeout: float
+
+
 class InvestmentAnalyzer:
-    def __init__(self, binance_client):
+    def __init__(
+            self,
+            binance_client,
+            source_timeout: float = 5.0,
+            catalog: Optional[ProductCatalog] = None,
+            high_apy_threshold: Decimal = Decimal("10")
+    ):
         self.client = binance_client
+        self.source_timeout = source_timeout
+        self.sources: Dict[str, ProductSource] = {}
+        self.catalog = catalog
+        self.high_apy_threshold = high_apy_threshold
+        # High-APY products added by catalog updates, numbered in arrival order
+        self.new_high_apy: Deque[Tuple[int, InvestmentOption]] = deque(maxlen=100)
+        self._new_high_apy_seq = 0
+        # viewer -> number of the last new product shown to them
+        self._new_high_apy_seen: Dict[int, int] = {}
+        # Products of every source, grouped by source name
+        self.index = ProductIndex(id_of=lambda option: str(option.product_id))
+        self._indexed_versions: Dict[str, int] = {}
+        if catalog:
+            catalog.add_listener(self._on_catalog_change)
+
+        self.register_source("STAKING", binance_client.get_staking_products, self._parse_staking_products)
+        self.register_source("SAVINGS", binance_client.get_savings_products, self._parse_savings_products)
+        self.register_source("LAUNCHPOOL", binance_client.get_launchpool_products, self._parse_launchpool_products)
+
+    def register_source(
+            self,
+            name: str,
+            fetch: Callable[[], Awaitable[List[Dict]]],
+            parse: Callable[[List[Dict]], List[InvestmentOption]],
+            timeout: Optional[float] = None
+    ) -> None:
+        """Add a product source; all sources are fetched concurrently"""
+        self.sources[name] = ProductSource(name, fetch, parse, timeout or self.source_timeout)
+
+    async def _fetch_source(self, source: ProductSource) -> bool:
+        """Bring one source's products in the index up to date
 
-    async def analyze_opportunities(self) -> Dict[str, str]:
-        """Analyze current investment opportunities"""
+        Returns False if the source is slow or failing.
+        """
         try:
-            # Get staking products
-            staking_products = await self.client.get_staking_products()
-            # Get savings products
-            savings_products = await self.client.get_savings_products()
-            # Get launchpool products
-            launchpool_products = await self.client.get_launchpool_products()
-
-            # Combine all products
-            all_products = []
-            all_products.extend(self._parse_staking_products(staking_products))
-            all_products.extend(self._parse_savings_products(savings_products))
-            all_products.extend(self._parse_launchpool_products(launchpool_products))
-
-            if not all_products:
+            if self.catalog:
+                key = self._catalog_key(source.name)
+                rows = await asyncio.wait_for(self.catalog.get(key, source.fetch), timeout=source.timeout)
+                version = self.catalog.version(key)
+                if self._indexed_versions.get(source.name) != version:
+                    # Restored from disk or first seen: index the whole list once
+                    self.index.replace(source.name, source.parse(rows))
+                    self._indexed_versions[source.name] = version
+            else:
+                rows = await asyncio.wait_for(source.fetch(), timeout=source.timeout)
+                self.index.replace(source.name, source.parse(rows))
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"{source.name} products timed out after {source.timeout}s")
+        except Exception as e:
+            logger.error(f"Error fetching {source.name} products: {str(e)}")
+        return False
+
+    @staticmethod
+    def _catalog_key(source_name: str) -> str:
+        return f"binance:{source_name}"
+
+    def _on_catalog_change(self, diff: CatalogDiff, rows: List[Dict]) -> None:
+        """Apply a catalog update to the index and note new high-APY products"""
+        source = next(
+            (s for s in self.sources.values() if self._catalog_key(s.name) == diff.key),
+            None
+        )
+        if source is None:
+            return
+
+        if diff.version == 1:
+            # Initial load: nothing is "new" yet
+            self.index.replace(source.name, source.parse(rows))
+            self._indexed_versions[source.name] = diff.version
+            return
+
+        added = source.parse(diff.added)
+        changed = source.parse(diff.changed)
+        parsed_ids = {str(option.product_id) for option in changed}
+        unparseable = [str(row.get('id')) for row in diff.changed if str(row.get('id')) not in parsed_ids]
+        self.index.remove(source.name, diff.removed + unparseable)
+        self.index.upsert(source.name, added + changed)
+        self._indexed_versions[source.name] = diff.version
+
+        for option in added:
+            if option.apy >= self.high_apy_threshold:
+                self._new_high_apy_seq += 1
+                self.new_high_apy.append((self._new_high_apy_seq, option))
+                logger.info(f"New high-APY product: {option.coin} {option.type} {option.apy}%")
+
+    async def _refresh_sources(self) -> List[str]:
+        """Refresh every source concurrently; returns the unavailable ones"""
+        sources = list(self.sources.values())
+        results = await asyncio.gather(*(self._fetch_source(source) for source in sources))
+        return [source.name for source, available in zip(sources, results) if not available]
+
+    async def fetch_products(self) -> Tuple[List[InvestmentOption], List[str]]:
+        """Fetch every source concurrently; returns (products by APY, unavailable sources)"""
+        unavailable = await self._refresh_sources()
+        return self.index.top(len(self.index), exclude=set(unavailable)), unavailable
+
+    def best_for_amount(self, coin: str, amount: Decimal) -> Optional[InvestmentOption]:
+        """Get the highest-APY indexed product for coin that accepts amount"""
+        return self.index.best_for_amount(coin, amount)
+
+    def _unseen_high_apy(self, viewer: int) -> List[InvestmentOption]:
+        """Get the new high-APY products viewer hasn't been shown, and mark them shown"""
+        last_seen = self._new_high_apy_seen.get(viewer, 0)
+        self._new_high_apy_seen[viewer] = self._new_high_apy_seq
+        return [option for seq, option in self.new_high_apy if seq > last_seen]
+
+    async def analyze_opportunities(self, viewer: Optional[int] = None) -> Dict[str, str]:
+        """Analyze current investment opportunities
+
+        New high-APY products are listed once per viewer; without a viewer
+        they are left out.
+        """
+        try:
+            unavailable = await self._refresh_sources()
+            top_products = self.index.top(5, exclude=set(unavailable))
+
+            if not top_products:
                 return {
                     "status": "info",
                     "message": "No investment opportunities found at the moment"
                 }
 
-            # Sort by APY
-            sorted_products = sorted(
-                all_products,
-                key=lambda x: x.apy,
-                reverse=True
-            )
-
             # Format response message
             message = "📊 Best Investment Opportunities:\n\n"
-            for i, product in enumerate(sorted_products[:5], 1):
+            for i, product in enumerate(top_products, 1):
                 message += (
                     f"{i}. {product.coin} ({product.type})\n"
                     f"   APY: {product.apy}%\n"
@@ -62,10 +173,21 @@ class InvestmentAnalyzer:
                     f"   {'Max Amount: ' + str(product.max_amount) + ' ' + product.coin if product.max_amount else 'No max amount'}\n\n"
                 )
 
+            new_products = self._unseen_high_apy(viewer) if viewer is not None else []
+            if new_products:
+                message += "🆕 New high-APY products:\n"
+                for product in new_products:
+                    message += f"   {product.coin} ({product.type}) {product.apy}%\n"
+                message += "\n"
+
+            if unavailable:
+                message += f"⚠️ Not included (unavailable): {', '.join(unavailable)}"
+
             return {
                 "status": "success",
                 "message": message,
-                "best_option": sorted_products[0] if sorted_products else None
+                "best_option": top_products[0],
+                "unavailable_sources": unavailable
             }
 
         except Exception as e:
@@ -1,12 +1,22 @@
-from typing import List, Dict, Optional
+from typing import Any, AsyncIterator, Callable, List, Dict, Optional
+import asyncio
 import logging
+import time
 from decimal import Decimal
 from pybit.unified_trading import HTTP
 from dataclasses import dataclass
 from enum import Enum
+from .product_catalog import ProductCatalog
+from .product_index import ProductIndex
+from .rate_limiter import Priority, RateLimiter
+from .resilience import Resilience
 
 logger = logging.getLogger(__name__)
 
+# Bybit Earn categories scanned for products, all cached under one catalog key
+EARN_CATEGORIES = ("FlexibleSaving", "OnChain")
+EARN_CATALOG_KEY = "bybit:EARN"
+
 
 class InvestmentType(Enum):
     STAKING = "STAKING"
@@ -23,6 +33,7 @@ class InvestmentProduct:
     duration: int  # in days
     min_amount: Decimal
     max_amount: Optional[Decimal]
+    product_id: str = ""
 
 
 @dataclass
@@ -35,67 +46,161 @@ class InvestmentPosition:
     end_time: int
 
 
+@dataclass
+class DiscoveryStats:
+    coins: int = 0
+    scanned: int = 0
+    products: int = 0
+    wall_time: float = 0.0
+
+    @property
+    def coins_per_second(self) -> float:
+        return self.scanned / self.wall_time if self.wall_time else 0.0
+
+
 class InvestmentService:
-    def __init__(self, session: HTTP):
+    def __init__(
+            self,
+            session: HTTP,
+            resilience: Optional[Resilience] = None,
+            catalog: Optional[ProductCatalog] = None,
+            rate_limiter: Optional[RateLimiter] = None
+    ):
         self.session = session
+        self.resilience = resilience
+        self.catalog = catalog
+        # Shares the limiter with TradingService; its response hook is
+        # already attached to the session there
+        self.rate_limiter = rate_limiter
+        self.discovery_stats = DiscoveryStats()
+        # Earn products grouped by coin, regrouped only when the catalog changes
+        self._products_by_coin: Dict[str, List[InvestmentProduct]] = {}
+        self._grouped_version: Optional[int] = None
+        # Products grouped by coin, reindexed only when the catalog changes
+        self.index = ProductIndex(id_of=lambda product: (product.type, product.product_id))
+        self._indexed_versions: Dict[str, int] = {}
+
+    async def _call(self, func: Callable[..., Any], idempotent: bool = True, **kwargs) -> Any:
+        """Run a blocking pybit call off the event loop under the resilience policy"""
+        async def attempt() -> Any:
+            if self.rate_limiter:
+                priority = Priority.ANALYTICS if idempotent else Priority.ORDER
+                await self.rate_limiter.acquire(func.__name__, priority)
+            return await asyncio.to_thread(func, **kwargs)
+
+        if self.resilience is None:
+            return await attempt()
+        return await self.resilience.call(
+            func.__name__,
+            attempt,
+            idempotent=idempotent,
+            cache_key=(func.__name__, *sorted((k, str(v)) for k, v in kwargs.items()))
+        )
+
+    async def _fetch_earn_rows(self) -> List[Dict]:
+        """Fetch every available Bybit Earn product (one request per category)"""
+        rows: List[Dict] = []
+        for category in EARN_CATEGORIES:
+            response = await self._call(self.session.get_earn_product_info, category=category)
+            if not response or response.get('retCode') != 0:
+                continue
+            rows.extend(
+                row for row in response['result']['list']
+                if row.get('status') == 'Available'
+            )
+        return rows
+
+    async def _earn_rows(self) -> List[Dict]:
+        if self.catalog:
+            return await self.catalog.get(EARN_CATALOG_KEY, self._fetch_earn_rows)
+        return await self._fetch_earn_rows()
+
+    @staticmethod
+    def _parse_earn_row(row: Dict) -> InvestmentProduct:
+        return InvestmentProduct(
+            coin=row['coin'],
+            type=InvestmentType.STAKING,
+            apy=Decimal(row['estimateApr'].rstrip('%') or '0'),
+            duration=int(row.get('term') or 0),  # 0 for flexible products
+            min_amount=Decimal(row.get('minStakeAmount') or '0'),
+            max_amount=Decimal(row['maxStakeAmount']) if row.get('maxStakeAmount') else None,
+            product_id=str(row['productId'])
+        )
+
+    async def _products_by_coin_map(self) -> Dict[str, List[InvestmentProduct]]:
+        """Group every Earn product by coin in one pass over the list"""
+        rows = await self._earn_rows()
+        version = self.catalog.version(EARN_CATALOG_KEY) if self.catalog else None
+        if version is not None and version == self._grouped_version:
+            return self._products_by_coin
+
+        grouped: Dict[str, List[InvestmentProduct]] = {}
+        for row in rows:
+            try:
+                product = self._parse_earn_row(row)
+            except (KeyError, ValueError, ArithmeticError) as e:
+                logger.warning(f"Skipping malformed Earn product {row.get('productId')}: {e}")
+                continue
+            grouped.setdefault(product.coin, []).append(product)
+        self._products_by_coin = grouped
+        self._grouped_version = version
+        return grouped
 
     async def get_available_coins(self) -> List[str]:
         """Get list of available coins for investment"""
         try:
-            response = self.session.get_coins_info()
-            if not response or 'result' not in response:
-                return []
-
-            return [
-                coin['coin']
-                for coin in response['result']['list']
-                if coin.get('status') == 'LISTED'
-            ]
+            return sorted(await self._products_by_coin_map())
         except Exception as e:
             logger.error(f"Error fetching available coins: {e}")
             return []
 
     async def get_investment_products(self, coin: str) -> List[InvestmentProduct]:
         """Get available investment products for a specific coin"""
-        products = []
-
         try:
-            # Get staking products
-            staking = self.session.get_staking_products(coin=coin)
-            if staking and 'result' in staking:
-                for product in staking['result']['list']:
-                    products.append(InvestmentProduct(
-                        coin=coin,
-                        type=InvestmentType.STAKING,
-                        apy=Decimal(product['apy']),
-                        duration=int(product['duration']),
-                        min_amount=Decimal(product['minAmount']),
-                        max_amount=Decimal(product['maxAmount']) if product.get('maxAmount') else None
-                    ))
-
-            # Add other product types here as they become available in the API
-
+            return list((await self._products_by_coin_map()).get(coin, []))
         except Exception as e:
             logger.error(f"Error fetching investment products for {coin}: {e}")
+            return []
 
-        return products
+    async def discover_products(self, coins: Optional[List[str]] = None) -> AsyncIterator[InvestmentProduct]:
+        """Yield the products of every listed coin (or of ``coins``)
+
+        Bybit lists all Earn products in one response per category, so the
+        whole scan is those requests plus one grouping pass. Wall time and
+        throughput are recorded in ``discovery_stats``.
+        """
+        started = time.monotonic()
+        stats = DiscoveryStats()
+        self.discovery_stats = stats
+        try:
+            by_coin = await self._products_by_coin_map()
+            if coins is None:
+                coins = sorted(by_coin)
+            stats.coins = len(coins)
+            for coin in coins:
+                products = by_coin.get(coin, [])
+                stats.scanned += 1
+                stats.products += len(products)
+                for product in products:
+                    yield product
+        finally:
+            stats.wall_time = time.monotonic() - started
+            logger.info(
+                f"Scanned {stats.scanned}/{stats.coins} coins in {stats.wall_time:.2f}s "
+                f"({stats.coins_per_second:.1f} coins/s, {stats.products} products)"
+            )
 
     async def find_best_investment(self, coin: str, amount: Decimal) -> Optional[InvestmentProduct]:
         """Find the best investment product for a given coin and amount"""
         products = await self.get_investment_products(coin)
 
-        if not products:
-            return None
-
-        eligible_products = [
-            p for p in products
-            if p.min_amount <= amount and (not p.max_amount or amount <= p.max_amount)
-        ]
-
-        if not eligible_products:
-            return None
+        version = self.catalog.version(EARN_CATALOG_KEY) if self.catalog else None
+        if version is None or self._indexed_versions.get(coin) != version:
+            self.index.replace(coin, products)
+            if version is not None:
+                self._indexed_versions[coin] = version
 
-        return max(eligible_products, key=lambda p: p.apy)
+        return self.index.best_for_amount(coin, amount)
 
     async def auto_invest(self, coin: str, amount: Decimal) -> Dict[str, str]:
         """Automatically invest in the best available product"""
@@ -109,7 +214,9 @@ class InvestmentService:
 
             # Execute investment based on product type
             if best_product.type == InvestmentType.STAKING:
-                response = self.session.set_staking_position(
+                response = await self._call(
+                    self.session.set_staking_position,
+                    idempotent=False,
                     coin=coin,
                     amount=str(amount),
                     product_id=best_product.product_id
@@ -143,7 +250,7 @@ class InvestmentService:
             positions = []
 
             # Get staking positions
-            response = self.session.get_staking_positions()
+            response = await self._call(self.session.get_staking_positions)
             if response and 'result' in response:
                 for pos in response['result']['list']:
                     positions.append(InvestmentPosition(
@@ -167,7 +274,7 @@ class InvestmentService:
             symbol = f"{from_coin}{to_coin}"
 
             # Check if trading pair exists
-            response = self.session.get_tickers(symbol=symbol)
+            response = await self._call(self.session.get_tickers, symbol=symbol)
             if not response or 'result' not in response:
                 return {
                     "status": "error",
@@ -175,7 +282,9 @@ class InvestmentService:
                 }
 
             # Execute market order
-            order = self.session.place_order(
+            order = await self._call(
+                self.session.place_order,
+                idempotent=False,
                 symbol=symbol,
                 side="SELL",
                 orderType="MARKET",
@@ -0,0 +1,289 @@
+"""Streaming market data feeds with an in-memory last-price table"""
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import time
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataFeed(ABC):
+    """Base WebSocket feed that tracks prices for recently used symbols
+
+    Prices are written only by the feed's own task on the event loop, so
+    readers can look them up without locking.
+    """
+
+    heartbeat_interval: Optional[float] = None
+
+    def __init__(
+            self,
+            url: str,
+            max_age: float = 5.0,
+            idle_timeout: float = 300.0,
+            reconnect_delay: float = 1.0
+    ):
+        self.url = url
+        self.max_age = max_age
+        self.idle_timeout = idle_timeout
+        self.reconnect_delay = reconnect_delay
+
+        # symbol -> (price, monotonic timestamp)
+        self.prices: Dict[str, Tuple[Decimal, float]] = {}
+        self._last_used: Dict[str, float] = {}
+        self._subscribed: Set[str] = set()
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Set[asyncio.Task] = set()
+        self._request_id = 0
+
+    def get_price(self, symbol: str) -> Optional[Decimal]:
+        """Get the streamed price if it is fresh enough, otherwise None"""
+        entry = self.prices.get(symbol)
+        if entry is None:
+            return None
+
+        price, updated_at = entry
+        if time.monotonic() - updated_at > self.max_age:
+            return None
+
+        self._last_used[symbol] = time.monotonic()
+        return price
+
+    def update_price(self, symbol: str, price: Decimal) -> None:
+        """Store a price observed outside the stream (e.g. a REST fallback)"""
+        self.prices[symbol] = (price, time.monotonic())
+
+    def touch(self, symbol: str) -> None:
+        """Mark a symbol as in use and subscribe to it if needed"""
+        self._last_used[symbol] = time.monotonic()
+        if not self._tasks:
+            self.start()
+        if symbol in self._subscribed:
+            return
+
+        self._subscribed.add(symbol)
+        if self._connected():
+            self._send_later(self._subscribe_payload([symbol]))
+
+    def start(self) -> None:
+        """Start the stream and the idle-symbol janitor"""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._run()),
+            asyncio.create_task(self._expire_idle_symbols())
+        ]
+
+    async def stop(self) -> None:
+        """Stop the stream"""
+        for task in self._tasks + list(self._pending):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._pending, return_exceptions=True)
+        self._tasks = []
+        self._pending.clear()
+
+    async def _run(self) -> None:
+        """Keep a connection open, resubscribing after every reconnect"""
+        while True:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(self.url, heartbeat=30) as ws:
+                        self._ws = ws
+                        logger.info(f"Market data stream connected: {self.url}")
+                        if self._subscribed:
+                            await ws.send_str(self._subscribe_payload(sorted(self._subscribed)))
+                        self._on_connect()
+
+                        heartbeat = None
+                        if self.heartbeat_interval:
+                            heartbeat = asyncio.create_task(self._heartbeat(ws))
+                        try:
+                            async for msg in ws:
+                                if msg.type == aiohttp.WSMsgType.TEXT:
+                                    self._dispatch(msg.data)
+                                elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                    break
+                        finally:
+                            if heartbeat:
+                                heartbeat.cancel()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Market data stream error: {str(e)}")
+            finally:
+                self._ws = None
+
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _heartbeat(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        """Send application-level pings for exchanges that require them"""
+        while not ws.closed:
+            await asyncio.sleep(self.heartbeat_interval)
+            payload = self._heartbeat_payload()
+            if payload is not None:
+                await ws.send_str(payload)
+
+    async def _expire_idle_symbols(self) -> None:
+        """Unsubscribe from symbols nobody has asked about recently"""
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 60.0))
+            now = time.monotonic()
+            idle = [
+                symbol for symbol in self._subscribed
+                if now - self._last_used.get(symbol, 0) > self.idle_timeout
+            ]
+            if not idle:
+                continue
+
+            for symbol in idle:
+                self._subscribed.discard(symbol)
+                self._forget(symbol)
+            logger.info(f"Unsubscribing idle symbols: {', '.join(idle)}")
+            if self._connected():
+                self._send_later(self._unsubscribe_payload(idle))
+
+    def _on_connect(self) -> None:
+        """Hook for feeds that must resync state after a reconnect"""
+
+    def _forget(self, symbol: str) -> None:
+        """Drop cached state for an unsubscribed symbol"""
+        self._last_used.pop(symbol, None)
+        self.prices.pop(symbol, None)
+
+    def _connected(self) -> bool:
+        return self._ws is not None and not self._ws.closed
+
+    def _send_later(self, payload: str) -> None:
+        """Send a control message; reconnects resubscribe everything anyway"""
+        task = asyncio.create_task(self._ws.send_str(payload))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _dispatch(self, raw: str) -> None:
+        """Decode a frame and hand it to the exchange-specific parser"""
+        try:
+            self._handle_message(json.loads(raw))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Malformed market data message: {str(e)}")
+
+    def _next_id(self) -> int:
+        self._request_id += 1
+        return self._request_id
+
+    @abstractmethod
+    def _subscribe_payload(self, symbols: List[str]) -> str:
+        """Control message subscribing to symbols"""
+
+    @abstractmethod
+    def _unsubscribe_payload(self, symbols: List[str]) -> str:
+        """Control message unsubscribing from symbols"""
+
+    def _heartbeat_payload(self) -> Optional[str]:
+        """Application-level ping sent every ``heartbeat_interval``; None sends nothing"""
+        return None
+
+    @abstractmethod
+    def _handle_message(self, data: Dict) -> None:
+        """Apply one decoded message from the exchange"""
+
+
+class BinanceMarketDataFeed(MarketDataFeed):
+    """Binance miniTicker + bookTicker feed"""
+
+    def __init__(self, url: str = "wss://stream.testnet.binance.vision/ws", **kwargs):
+        super().__init__(url, **kwargs)
+        # symbol -> (bid, ask, monotonic timestamp)
+        self.quotes: Dict[str, Tuple[Decimal, Decimal, float]] = {}
+
+    def get_price(self, symbol: str) -> Optional[Decimal]:
+        """Get last trade price, falling back to the book mid price"""
+        price = super().get_price(symbol)
+        if price is not None:
+            return price
+
+        quote = self.quotes.get(symbol)
+        if quote is None or time.monotonic() - quote[2] > self.max_age:
+            return None
+
+        self._last_used[symbol] = time.monotonic()
+        return (quote[0] + quote[1]) / 2
+
+    def _forget(self, symbol: str) -> None:
+        super()._forget(symbol)
+        self.quotes.pop(symbol, None)
+
+    @staticmethod
+    def _streams(symbols: List[str]) -> List[str]:
+        streams = []
+        for symbol in symbols:
+            name = symbol.lower()
+            streams.append(f"{name}@miniTicker")
+            streams.append(f"{name}@bookTicker")
+        return streams
+
+    def _subscribe_payload(self, symbols: List[str]) -> str:
+        return json.dumps({
+            "method": "SUBSCRIBE",
+            "params": self._streams(symbols),
+            "id": self._next_id()
+        })
+
+    def _unsubscribe_payload(self, symbols: List[str]) -> str:
+        return json.dumps({
+            "method": "UNSUBSCRIBE",
+            "params": self._streams(symbols),
+            "id": self._next_id()
+        })
+
+    def _handle_message(self, data: Dict) -> None:
+        if "result" in data:
+            # Acknowledgement of a SUBSCRIBE/UNSUBSCRIBE request
+            return
+
+        if data.get("e") == "24hrMiniTicker":
+            self.prices[data["s"]] = (Decimal(data["c"]), time.monotonic())
+        elif "b" in data and "a" in data and "u" in data:
+            self.quotes[data["s"]] = (
+                Decimal(data["b"]),
+                Decimal(data["a"]),
+                time.monotonic()
+            )
+
+
+class BybitMarketDataFeed(MarketDataFeed):
+    """Bybit spot tickers feed"""
+
+    heartbeat_interval = 20.0
+
+    def __init__(self, url: str = "wss://stream-testnet.bybit.com/v5/public/spot", **kwargs):
+        super().__init__(url, **kwargs)
+
+    def _subscribe_payload(self, symbols: List[str]) -> str:
+        return json.dumps({
+            "op": "subscribe",
+            "args": [f"tickers.{symbol}" for symbol in symbols]
+        })
+
+    def _unsubscribe_payload(self, symbols: List[str]) -> str:
+        return json.dumps({
+            "op": "unsubscribe",
+            "args": [f"tickers.{symbol}" for symbol in symbols]
+        })
+
+    def _heartbeat_payload(self) -> str:
+        return json.dumps({"op": "ping"})
+
+    def _handle_message(self, data: Dict) -> None:
+        topic = data.get("topic", "")
+        if not topic.startswith("tickers."):
+            return
+
+        ticker = data["data"]
+        if "lastPrice" in ticker:
+            self.prices[ticker["symbol"]] = (Decimal(ticker["lastPrice"]), time.monotonic())
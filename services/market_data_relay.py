@@ -0,0 +1,212 @@
+"""Share one exchange price feed between bot processes over a local socket"""
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import socket
+import time
+from .market_data import MarketDataFeed
+
+logger = logging.getLogger(__name__)
+
+
+def default_address(data_dir: str) -> str:
+    """A Unix socket in data_dir, or a loopback port where those are unsupported"""
+    if hasattr(socket, "AF_UNIX"):
+        return f"{data_dir}/market_data.sock"
+    return "127.0.0.1:47651"
+
+
+def _tcp(address: str) -> Optional[Tuple[str, int]]:
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return host, int(port)
+    return None
+
+
+async def open_connection(address: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    tcp = _tcp(address)
+    if tcp:
+        return await asyncio.open_connection(*tcp)
+    return await asyncio.open_unix_connection(address)
+
+
+async def start_server(handler, address: str) -> asyncio.AbstractServer:
+    tcp = _tcp(address)
+    if tcp:
+        return await asyncio.start_server(handler, *tcp)
+    Path(address).parent.mkdir(parents=True, exist_ok=True)
+    return await asyncio.start_unix_server(handler, address)
+
+
+class MarketDataHub:
+    """Publishes prices from one feed to every connected bot process
+
+    Each connection subscribes to the symbols its process uses; the hub
+    keeps the union subscribed on the exchange and sends a connection a
+    price when it changes, and at least every ``refresh`` seconds so the
+    receiver's copy does not go stale.
+
+    Protocol: newline-delimited JSON. Clients send
+    ``{"op": "subscribe" | "unsubscribe", "symbols": [...]}``; the hub
+    sends ``{"prices": {symbol: price}}``.
+    """
+
+    def __init__(
+            self,
+            feed: MarketDataFeed,
+            address: str,
+            publish_interval: float = 0.1,
+            refresh: float = 1.0
+    ):
+        self.feed = feed
+        self.address = address
+        self.publish_interval = publish_interval
+        self.refresh = refresh
+        self._clients: Dict[asyncio.StreamWriter, Set[str]] = {}
+        # symbol -> (price, monotonic time last published)
+        self._published: Dict[str, Tuple[Decimal, float]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.messages = 0
+
+    async def start(self) -> None:
+        self._server = await start_server(self._handle_client, self.address)
+        self._task = asyncio.create_task(self._publish())
+        logger.info(f"Market data hub listening on {self.address}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in list(self._clients):
+            writer.close()
+        self._clients.clear()
+        await self.feed.stop()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        symbols: Set[str] = set()
+        self._clients[writer] = symbols
+        try:
+            async for line in reader:
+                try:
+                    request = json.loads(line)
+                    names = [str(symbol) for symbol in request["symbols"]]
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning(f"Malformed market data request: {str(e)}")
+                    continue
+                if request.get("op") == "subscribe":
+                    symbols.update(names)
+                    for symbol in names:
+                        self.feed.touch(symbol)
+                        # New subscribers get the current price right away
+                        self._published.pop(symbol, None)
+                elif request.get("op") == "unsubscribe":
+                    symbols.difference_update(names)
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+    async def _publish(self) -> None:
+        while True:
+            await asyncio.sleep(self.publish_interval)
+            wanted: Set[str] = set().union(*self._clients.values()) if self._clients else set()
+            now = time.monotonic()
+            changed: Dict[str, str] = {}
+            for symbol in wanted:
+                # Keeps the symbol subscribed while any process uses it
+                self.feed.touch(symbol)
+                price = self.feed.get_price(symbol)
+                if price is None:
+                    continue
+                last = self._published.get(symbol)
+                if last is None or last[0] != price or now - last[1] >= self.refresh:
+                    self._published[symbol] = (price, now)
+                    changed[symbol] = str(price)
+            for symbol in [s for s in self._published if s not in wanted]:
+                del self._published[symbol]
+            if not changed:
+                continue
+
+            for writer, symbols in list(self._clients.items()):
+                prices = {s: p for s, p in changed.items() if s in symbols}
+                if not prices or writer.is_closing():
+                    continue
+                writer.write(json.dumps({"prices": prices}).encode() + b"\n")
+                self.messages += 1
+
+
+class RemoteMarketDataFeed(MarketDataFeed):
+    """Price feed backed by a MarketDataHub in another process
+
+    Drop-in for an exchange feed: subscriptions and idle expiry work the
+    same way, but prices arrive from the hub instead of the exchange.
+    """
+
+    def __init__(self, address: str, **kwargs):
+        super().__init__(address, **kwargs)
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _run(self) -> None:
+        """Keep a connection to the hub open, resubscribing after every reconnect"""
+        while True:
+            try:
+                reader, self._writer = await open_connection(self.url)
+                logger.info(f"Connected to market data hub: {self.url}")
+                if self._subscribed:
+                    self._send_later(self._subscribe_payload(sorted(self._subscribed)))
+                async for line in reader:
+                    self._dispatch(line.decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Market data hub connection error: {str(e)}")
+            finally:
+                if self._writer is not None:
+                    self._writer.close()
+                self._writer = None
+
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def _send_later(self, payload: str) -> None:
+        self._writer.write(payload.encode() + b"\n")
+
+    def _subscribe_payload(self, symbols) -> str:
+        return json.dumps({"op": "subscribe", "symbols": symbols})
+
+    def _unsubscribe_payload(self, symbols) -> str:
+        return json.dumps({"op": "unsubscribe", "symbols": symbols})
+
+    def _handle_message(self, data: Dict) -> None:
+        now = time.monotonic()
+        for symbol, price in data["prices"].items():
+            self.prices[symbol] = (Decimal(price), now)
+
+
+async def serve_feeder(address: str, ws_url: str, max_age: float, idle_timeout: float) -> None:
+    """Stream prices from the exchange and serve them on address until cancelled"""
+    from .market_data import BinanceMarketDataFeed
+
+    hub = MarketDataHub(
+        BinanceMarketDataFeed(ws_url, max_age=max_age, idle_timeout=idle_timeout),
+        address
+    )
+    await hub.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await hub.stop()
@@ -0,0 +1,68 @@
+"""Periodic reporting of service metrics to the log"""
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Returns a service's current metrics, or None while it isn't running
+MetricsSource = Callable[[], Optional[Dict[str, Any]]]
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{k}={_format_value(v)}" for k, v in value.items()) + "}"
+    return str(value)
+
+
+class MetricsReporter:
+    """Logs every registered source's metrics every ``interval`` seconds
+
+    Each source gets one INFO line on this module's logger; with
+    LOG_FORMAT=json the values are also attached as a ``metrics`` field.
+    Sources that return None (a service not started yet) are skipped,
+    and a failing source never stops the others.
+    """
+
+    def __init__(self, interval: float = 60.0):
+        self.interval = interval
+        self.sources: Dict[str, MetricsSource] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add_source(self, name: str, fetch: MetricsSource) -> None:
+        self.sources[name] = fetch
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.report()
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Get the current metrics of every source that has some"""
+        result = {}
+        for name, fetch in list(self.sources.items()):
+            try:
+                values = fetch()
+            except Exception as e:
+                logger.warning(f"Failed to collect {name} metrics: {str(e)}")
+                continue
+            if values is not None:
+                result[name] = values
+        return result
+
+    def report(self) -> None:
+        for name, values in self.collect().items():
+            line = ", ".join(f"{key}={_format_value(value)}" for key, value in values.items())
+            logger.info(f"Metrics {name}: {line}", extra={"metrics": {name: values}})
@@ -0,0 +1,276 @@
+"""Local order book mirrors for depth-aware fill estimates"""
+from bisect import bisect_left
+from collections import deque
+from decimal import Decimal
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+from .market_data import MarketDataFeed
+
+logger = logging.getLogger(__name__)
+
+
+class BookSide:
+    """One side of a book as parallel sorted arrays
+
+    Levels are kept sorted best-first. Bids are stored under negated
+    prices so both sides share ascending-key bisect logic. Cumulative
+    quantity and notional arrays are rebuilt lazily after updates, which
+    lets fill queries run in O(log n).
+    """
+
+    __slots__ = ("descending", "keys", "qtys", "_cum_qty", "_cum_notional", "_dirty")
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self.keys: List[float] = []
+        self.qtys: List[float] = []
+        self._cum_qty: List[float] = []
+        self._cum_notional: List[float] = []
+        self._dirty = True
+
+    def _key(self, price: float) -> float:
+        return -price if self.descending else price
+
+    def _price(self, key: float) -> float:
+        return -key if self.descending else key
+
+    def load(self, levels: List[List[str]]) -> None:
+        pairs = sorted((self._key(float(p)), float(q)) for p, q in levels if float(q) > 0)
+        self.keys = [k for k, _ in pairs]
+        self.qtys = [q for _, q in pairs]
+        self._dirty = True
+
+    def update(self, price: float, qty: float) -> None:
+        key = self._key(price)
+        i = bisect_left(self.keys, key)
+        exists = i < len(self.keys) and self.keys[i] == key
+        if qty == 0:
+            if exists:
+                del self.keys[i]
+                del self.qtys[i]
+        elif exists:
+            self.qtys[i] = qty
+        else:
+            self.keys.insert(i, key)
+            self.qtys.insert(i, qty)
+        self._dirty = True
+
+    def best(self) -> Optional[float]:
+        return self._price(self.keys[0]) if self.keys else None
+
+    def _rebuild(self) -> None:
+        cum_qty = []
+        cum_notional = []
+        total_qty = 0.0
+        total_notional = 0.0
+        for key, qty in zip(self.keys, self.qtys):
+            total_qty += qty
+            total_notional += qty * self._price(key)
+            cum_qty.append(total_qty)
+            cum_notional.append(total_notional)
+        self._cum_qty = cum_qty
+        self._cum_notional = cum_notional
+        self._dirty = False
+
+    def fill(self, quantity: float) -> Tuple[float, float]:
+        """Get (average price, filled quantity) for walking quantity into the book"""
+        if self._dirty:
+            self._rebuild()
+        if not self._cum_qty:
+            return 0.0, 0.0
+
+        i = bisect_left(self._cum_qty, quantity)
+        if i == len(self._cum_qty):
+            # Not enough depth: report what the visible book can fill
+            return self._cum_notional[-1] / self._cum_qty[-1], self._cum_qty[-1]
+
+        prev_qty = self._cum_qty[i - 1] if i else 0.0
+        prev_notional = self._cum_notional[i - 1] if i else 0.0
+        notional = prev_notional + (quantity - prev_qty) * self._price(self.keys[i])
+        return notional / quantity, quantity
+
+
+class OrderBook:
+    """Snapshot plus diff-depth mirror, following Binance's sync procedure
+
+    Diffs that arrive while the book is unsynced are buffered (up to
+    ``buffer_size``). A snapshot is applied only if the buffered events
+    continue it: events with ``u <= lastUpdateId`` are dropped and the
+    first remaining one must satisfy ``U <= lastUpdateId + 1 <= u``.
+    """
+
+    def __init__(self, symbol: str, buffer_size: int = 1000):
+        self.symbol = symbol
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.last_update_id = 0
+        self.synced = False
+        self._buffer: Deque[Dict] = deque(maxlen=buffer_size)
+
+    def reset(self) -> None:
+        """Mark the book unsynced and forget buffered diffs (e.g. after a reconnect)"""
+        self.synced = False
+        self._buffer.clear()
+
+    def apply_snapshot(self, snapshot: Dict) -> bool:
+        """Load a REST snapshot and replay buffered diffs on top of it
+
+        Returns False when the snapshot is older than the buffered diffs
+        can bridge, in which case a newer snapshot is needed; buffering
+        continues meanwhile.
+        """
+        last_update_id = int(snapshot["lastUpdateId"])
+        pending = [event for event in self._buffer if event["u"] > last_update_id]
+        if pending and pending[0]["U"] > last_update_id + 1:
+            return False
+
+        self.bids.load(snapshot["bids"])
+        self.asks.load(snapshot["asks"])
+        self.last_update_id = last_update_id
+        self.synced = True
+        self._buffer.clear()
+        for event in pending:
+            if not self.apply_diff(event):
+                return False
+        return True
+
+    def apply_diff(self, event: Dict) -> bool:
+        """Apply a depthUpdate event; returns False when a gap requires a resync"""
+        if not self.synced:
+            self._buffer.append(event)
+            return True
+        if event["u"] <= self.last_update_id:
+            return True
+        if event["U"] > self.last_update_id + 1:
+            # Events after the gap are kept for the next snapshot
+            self.synced = False
+            self._buffer.append(event)
+            return False
+
+        for price, qty in event["b"]:
+            self.bids.update(float(price), float(qty))
+        for price, qty in event["a"]:
+            self.asks.update(float(price), float(qty))
+        self.last_update_id = event["u"]
+        return True
+
+    def estimate_fill(self, side: str, quantity: Decimal) -> Optional[Tuple[Decimal, Decimal]]:
+        """Get (average fill price, fillable quantity) for a market order"""
+        if not self.synced:
+            return None
+        book = self.asks if side == "BUY" else self.bids
+        avg_price, filled = book.fill(float(quantity))
+        if filled == 0:
+            return None
+        return Decimal(str(avg_price)), Decimal(str(filled))
+
+
+class OrderBookManager(MarketDataFeed):
+    """Keeps order books for recently used symbols in sync via diff-depth streams"""
+
+    def __init__(
+            self,
+            binance_client,
+            url: str = "wss://stream.testnet.binance.vision/ws",
+            snapshot_limit: int = 1000,
+            resync_delay: float = 1.0,
+            **kwargs
+    ):
+        super().__init__(url, **kwargs)
+        self.client = binance_client
+        self.snapshot_limit = snapshot_limit
+        self.resync_delay = resync_delay
+        self.books: Dict[str, OrderBook] = {}
+        self._resyncing: Set[str] = set()
+        self.updates_applied = 0
+        self.resyncs = 0
+
+    def touch(self, symbol: str) -> None:
+        """Start mirroring a symbol's book (or keep it alive)"""
+        is_new = symbol not in self.books
+        if is_new:
+            self.books[symbol] = OrderBook(symbol)
+        super().touch(symbol)
+        if is_new:
+            self._schedule_resync(symbol, delay=0.0)
+
+    def estimate_fill(
+            self,
+            symbol: str,
+            side: str,
+            quantity: Decimal
+    ) -> Optional[Tuple[Decimal, Decimal]]:
+        """Get (average fill price, fillable quantity) if the book is in sync"""
+        book = self.books.get(symbol)
+        if book is None:
+            return None
+        return book.estimate_fill(side, quantity)
+
+    def _subscribe_payload(self, symbols: List[str]) -> str:
+        return json.dumps({
+            "method": "SUBSCRIBE",
+            "params": [f"{symbol.lower()}@depth@100ms" for symbol in symbols],
+            "id": self._next_id()
+        })
+
+    def _unsubscribe_payload(self, symbols: List[str]) -> str:
+        return json.dumps({
+            "method": "UNSUBSCRIBE",
+            "params": [f"{symbol.lower()}@depth@100ms" for symbol in symbols],
+            "id": self._next_id()
+        })
+
+    def _handle_message(self, data: Dict) -> None:
+        if data.get("e") != "depthUpdate":
+            return
+
+        book = self.books.get(data["s"])
+        if book is None:
+            return
+        if book.apply_diff(data):
+            if book.synced:
+                self.updates_applied += 1
+        else:
+            logger.info(f"Order book gap for {book.symbol}, resyncing")
+            self._schedule_resync(book.symbol, delay=self.resync_delay)
+
+    def _on_connect(self) -> None:
+        # Diffs were missed while disconnected
+        for symbol, book in self.books.items():
+            book.reset()
+            self._schedule_resync(symbol, delay=0.0)
+
+    def _forget(self, symbol: str) -> None:
+        super()._forget(symbol)
+        self.books.pop(symbol, None)
+
+    def _schedule_resync(self, symbol: str, delay: float) -> None:
+        if symbol in self._resyncing:
+            return
+        self._resyncing.add(symbol)
+        task = asyncio.create_task(self._resync(symbol, delay))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _resync(self, symbol: str, delay: float) -> None:
+        """Fetch a REST snapshot and replay the diffs buffered while it was in flight"""
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            snapshot = await self.client.get_order_book(symbol, limit=self.snapshot_limit)
+        finally:
+            self._resyncing.discard(symbol)
+
+        book = self.books.get(symbol)
+        if book is None:
+            return
+        if snapshot is None:
+            self._schedule_resync(symbol, delay=self.resync_delay)
+            return
+
+        self.resyncs += 1
+        if not book.apply_snapshot(snapshot):
+            logger.info(f"Order book snapshot for {symbol} is behind the stream, resyncing")
+            self._schedule_resync(symbol, delay=self.resync_delay)
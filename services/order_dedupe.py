@@ -0,0 +1,110 @@
+"""Client order IDs and a dedupe store for idempotent order submission"""
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def make_client_order_id(*parts) -> str:
+    """Derive a deterministic client order ID (valid for Binance and Bybit)"""
+    digest = hashlib.sha256(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f"tb-{digest[:32]}"
+
+
+class OrderDedupeStore:
+    """Remembers results of submitted orders by client order ID
+
+    Entries live in memory for ``ttl`` seconds. With ``db_path`` they are
+    also written to SQLite so a restarted process still recognises
+    orders it has already sent.
+    """
+
+    def __init__(self, ttl: float = 86400.0, db_path: Optional[Path] = None):
+        self.ttl = ttl
+        self.db_path = db_path
+        self._entries: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        if db_path:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS submitted_orders ("
+                "client_order_id TEXT PRIMARY KEY, "
+                "result TEXT NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM submitted_orders WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    async def lookup(self, client_order_id: str) -> Optional[Dict[str, str]]:
+        """Get the stored result for an order that was already submitted"""
+        entry = self._entries.get(client_order_id)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at >= time.time():
+                self.hits += 1
+                return result
+            del self._entries[client_order_id]
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._db_lookup, client_order_id)
+            if row is not None:
+                self.hits += 1
+                self._entries[client_order_id] = row
+                return row[1]
+
+        self.misses += 1
+        return None
+
+    async def remember(self, client_order_id: str, result: Dict[str, str]) -> None:
+        """Store the result of a submitted order"""
+        expires_at = time.time() + self.ttl
+        self._entries[client_order_id] = (expires_at, result)
+        self._purge_expired()
+        if self._db is not None:
+            await asyncio.to_thread(self._db_store, client_order_id, result, expires_at)
+
+    def _purge_expired(self) -> None:
+        # Amortised cleanup: scan once every 1024 writes
+        self._writes += 1
+        if self._writes % 1024:
+            return
+        now = time.time()
+        for key in [k for k, (expires_at, _) in self._entries.items() if expires_at < now]:
+            del self._entries[key]
+
+    def _db_lookup(self, client_order_id: str) -> Optional[Tuple[float, Dict[str, str]]]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT expires_at, result FROM submitted_orders WHERE client_order_id = ?",
+                (client_order_id,)
+            ).fetchone()
+        if row is None or row[0] < time.time():
+            return None
+        return row[0], json.loads(row[1])
+
+    def _db_store(self, client_order_id: str, result: Dict[str, str], expires_at: float) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO submitted_orders VALUES (?, ?, ?)",
+                (client_order_id, json.dumps(result), expires_at)
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,207 @@
+"""Concurrent order submission pipeline with batching"""
+from collections import deque
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import logging
+import time
+import uuid
+from .order_dedupe import OrderDedupeStore, make_client_order_id
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OrderRequest:
+    symbol: str
+    side: str
+    quantity: Decimal
+    price: Optional[Decimal] = None
+    source: str = "fsm"
+    client_order_id: Optional[str] = None
+    submitted_at: float = field(default_factory=time.monotonic)
+    # Account to place the order on; the pipeline's backend when unset
+    backend: Optional[Any] = field(default=None, repr=False, compare=False)
+
+
+class OrderPipeline:
+    """Validate, batch and dispatch orders from any source
+
+    Orders are queued and picked up by a pool of workers. Each worker
+    drains up to ``batch_size`` orders at once. Backends that expose
+    ``place_test_orders`` (e.g. Bybit's batch endpoint) get the whole
+    batch in one call when it is all theirs; otherwise orders go out
+    concurrently, each on its own backend. Rate limits are enforced by
+    the backend's own limiter.
+
+    Every order carries a client order ID. Resubmitting an ID that is in
+    flight joins the pending future, and resubmitting one that already
+    succeeded returns the stored result without touching the exchange.
+    """
+
+    def __init__(
+            self,
+            backend,
+            symbol_catalog=None,
+            dedupe_store: Optional[OrderDedupeStore] = None,
+            workers: int = 4,
+            batch_size: int = 10,
+            linger: float = 0.005
+    ):
+        self.backend = backend
+        self.symbol_catalog = symbol_catalog
+        self.dedupe_store = dedupe_store
+        self.workers = workers
+        self.batch_size = batch_size
+        self.linger = linger
+
+        self._queue: "asyncio.Queue[tuple]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.deduplicated = 0
+        self._latencies: Deque[float] = deque(maxlen=1000)
+        self._completed_at: Deque[float] = deque(maxlen=10000)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(i))
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, order: OrderRequest) -> "asyncio.Future[Dict[str, str]]":
+        """Queue an order and return a future for its result"""
+        self.start()
+        self.submitted += 1
+        if not order.client_order_id:
+            order.client_order_id = make_client_order_id(order.source, uuid.uuid4().hex)
+
+        pending = self._inflight.get(order.client_order_id)
+        if pending is not None:
+            self.deduplicated += 1
+            return pending
+
+        # Register before any await so concurrent duplicates join this future
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[order.client_order_id] = future
+
+        if self.dedupe_store:
+            try:
+                previous = await self.dedupe_store.lookup(order.client_order_id)
+            except Exception as e:
+                # Don't leave later duplicates waiting on a future nobody resolves
+                self._inflight.pop(order.client_order_id, None)
+                future.set_exception(e)
+                return future
+            if previous is not None:
+                self.deduplicated += 1
+                self._inflight.pop(order.client_order_id, None)
+                future.set_result(previous)
+                return future
+
+        error = self._validate(order)
+        if error:
+            self.rejected += 1
+            self._inflight.pop(order.client_order_id, None)
+            future.set_result({"status": "error", "message": f"❌ {error}"})
+            return future
+
+        self._queue.put_nowait((order, future))
+        return future
+
+    async def place(self, order: OrderRequest) -> Dict[str, str]:
+        """Submit an order and wait for its result"""
+        return await asyncio.shield(await self.submit(order))
+
+    def _validate(self, order: OrderRequest) -> Optional[str]:
+        if order.quantity <= 0:
+            return "Quantity must be positive"
+        if self.symbol_catalog is None or not self.symbol_catalog.loaded:
+            return None
+
+        order.quantity = self.symbol_catalog.round_quantity(order.symbol, order.quantity)
+        return self.symbol_catalog.validate_order(order.symbol, order.quantity, order.price)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            if self.linger:
+                await asyncio.sleep(self.linger)
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await self._dispatch(batch)
+            except Exception as e:
+                logger.error(f"Order worker {index} failed: {str(e)}")
+                for order, future in batch:
+                    self._inflight.pop(order.client_order_id, None)
+                    if not future.done():
+                        future.set_result({
+                            "status": "error",
+                            "message": "❌ Failed to place test order"
+                        })
+
+    async def _dispatch(self, batch: List[tuple]) -> None:
+        orders = [order for order, _ in batch]
+        backends = [order.backend or self.backend for order in orders]
+        place_batch = getattr(backends[0], "place_test_orders", None)
+
+        if place_batch is not None and len(orders) > 1 and all(b is backends[0] for b in backends):
+            results = await place_batch(orders)
+        else:
+            results = await asyncio.gather(*[
+                backend.place_test_order(
+                    symbol=order.symbol,
+                    side=order.side,
+                    quantity=order.quantity,
+                    client_order_id=order.client_order_id
+                )
+                for order, backend in zip(orders, backends)
+            ])
+
+        now = time.monotonic()
+        for (order, future), result in zip(batch, results):
+            self.completed += 1
+            self._latencies.append(now - order.submitted_at)
+            self._completed_at.append(now)
+            if self.dedupe_store and result.get("status") == "success":
+                # Only successes are final; failed orders may be retried
+                try:
+                    await self.dedupe_store.remember(order.client_order_id, result)
+                except Exception as e:
+                    # The order is placed either way; report it as placed
+                    logger.error(f"Failed to record order {order.client_order_id}: {str(e)}")
+            self._inflight.pop(order.client_order_id, None)
+            if not future.done():
+                future.set_result(result)
+
+    def metrics(self) -> Dict[str, float]:
+        """Get throughput and submit-latency metrics"""
+        now = time.monotonic()
+        recent = sum(1 for t in self._completed_at if now - t <= 60.0)
+        latencies = sorted(self._latencies)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "deduplicated": self.deduplicated,
+            "queue_depth": self._queue.qsize(),
+            "orders_per_second": recent / 60.0,
+            "p99_latency": p99
+        }
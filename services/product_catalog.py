@@ -0,0 +1,190 @@
+"""Versioned investment product catalog with stale-while-revalidate caching"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import logging
+import time
+from utils.atomic_file import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[List[Dict]]]
+
+
+@dataclass
+class CatalogDiff:
+    key: str
+    version: int
+    added: List[Dict] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[Dict] = field(default_factory=list)
+
+
+@dataclass
+class CatalogEntry:
+    rows: List[Dict]
+    version: int
+    fetched_at: float
+
+
+def _row_id(row: Dict) -> str:
+    for name in ("id", "productId", "product_id"):
+        if name in row:
+            return str(row[name])
+    return json.dumps(row, sort_keys=True)
+
+
+class ProductCatalog:
+    """Raw product lists per key (e.g. "binance:STAKING"), refreshed in the background
+
+    Reads never wait on the network once a key has data: entries older
+    than ``ttl`` are served as-is while a refresh runs in the background,
+    and only entries older than ``max_stale`` block on a reload. Each
+    change bumps the key's version and is published as a CatalogDiff.
+    """
+
+    def __init__(
+            self,
+            ttl: float = 300.0,
+            max_stale: float = 86400.0,
+            cache_path: Optional[Path] = None
+    ):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.cache_path = cache_path
+
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._loaders: Dict[str, Loader] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._diffs: Dict[str, CatalogDiff] = {}
+        self._listeners: List[Callable[[CatalogDiff, List[Dict]], None]] = []
+        self._disk_loaded = False
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: Callable[[CatalogDiff, List[Dict]], None]) -> None:
+        """Call listener(diff, rows) whenever a key's contents change"""
+        self._listeners.append(listener)
+
+    async def get(self, key: str, loader: Loader) -> List[Dict]:
+        """Get rows for key, loading them only if nothing usable is cached"""
+        self._loaders[key] = loader
+        if not self._disk_loaded:
+            self._disk_loaded = True
+            if self.cache_path and self.cache_path.exists():
+                await asyncio.to_thread(self._load_from_disk)
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+        entry = self._entries.get(key)
+        age = time.time() - entry.fetched_at if entry else None
+        if entry is None or age > self.max_stale:
+            await self.refresh(key)
+            entry = self._entries.get(key)
+            if entry is None:
+                raise LookupError(f"No data available for {key}")
+        elif age > self.ttl:
+            self._start_refresh(key)
+        return entry.rows
+
+    def version(self, key: str) -> int:
+        entry = self._entries.get(key)
+        return entry.version if entry else 0
+
+    def latest_diff(self, key: str) -> Optional[CatalogDiff]:
+        return self._diffs.get(key)
+
+    async def refresh(self, key: str) -> None:
+        """Reload one key; concurrent refreshes of the same key are shared"""
+        await asyncio.shield(self._start_refresh(key))
+
+    def _start_refresh(self, key: str) -> asyncio.Task:
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._reload(key))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return task
+
+    async def _reload(self, key: str) -> None:
+        try:
+            rows = await self._loaders[key]()
+        except Exception as e:
+            logger.error(f"Error refreshing product catalog {key}: {str(e)}")
+            return
+
+        entry = self._entries.get(key)
+        if not rows and entry is not None and entry.rows:
+            # Sources swallow errors into empty lists; don't wipe good data
+            logger.warning(f"Product catalog {key} refresh returned nothing, keeping version {entry.version}")
+            return
+
+        if self._apply(key, rows) and self.cache_path:
+            snapshot = {
+                key: {"rows": e.rows, "version": e.version, "fetched_at": e.fetched_at}
+                for key, e in self._entries.items()
+            }
+            await asyncio.to_thread(self._save_to_disk, snapshot)
+
+    def _apply(self, key: str, rows: List[Dict]) -> bool:
+        """Store rows, bumping the version and publishing a diff if they changed"""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = CatalogEntry(rows, 1, now)
+            diff = CatalogDiff(key, 1, added=list(rows))
+        else:
+            old = {_row_id(row): row for row in entry.rows}
+            new = {_row_id(row): row for row in rows}
+            diff = CatalogDiff(
+                key,
+                entry.version + 1,
+                added=[row for row_id, row in new.items() if row_id not in old],
+                removed=[row_id for row_id in old if row_id not in new],
+                changed=[row for row_id, row in new.items() if row_id in old and old[row_id] != row]
+            )
+            if not (diff.added or diff.removed or diff.changed):
+                entry.fetched_at = now
+                return False
+            self._entries[key] = CatalogEntry(rows, diff.version, now)
+
+        self._diffs[key] = diff
+        for listener in self._listeners:
+            try:
+                listener(diff, rows)
+            except Exception as e:
+                logger.error(f"Product catalog listener failed: {str(e)}")
+        return True
+
+    async def _refresh_loop(self) -> None:
+        """Revalidate every known key once per ttl so reads stay warm"""
+        while True:
+            await asyncio.sleep(self.ttl)
+            for key in list(self._loaders):
+                self._start_refresh(key)
+
+    async def stop(self) -> None:
+        tasks = list(self._refreshing.values())
+        if self._refresh_task:
+            tasks.append(self._refresh_task)
+            self._refresh_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _load_from_disk(self) -> None:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            for key, item in data.items():
+                self._entries[key] = CatalogEntry(item["rows"], item["version"], item["fetched_at"])
+            logger.info(f"Product catalog restored from {self.cache_path}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable product cache: {str(e)}")
+
+    def _save_to_disk(self, snapshot: Dict[str, Dict]) -> None:
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.cache_path, json.dumps(snapshot))
+        except (OSError, TypeError) as e:
+            logger.warning(f"Failed to save product cache: {str(e)}")
@@ -0,0 +1,149 @@
+"""Incremental indexes for ranking investment products"""
+from bisect import bisect_left, insort
+from decimal import Decimal
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+import heapq
+
+
+class CoinIntervalIndex:
+    """Best-APY lookup by amount for one coin's products
+
+    Every product is eligible for amounts in [min_amount, max_amount]
+    (open-ended without a max). The distinct bounds split the amount axis
+    into elementary slots: each bound itself, and the open gaps between
+    them. Eligibility is constant within a slot, so the best product per
+    slot is precomputed and a query is a single bisect.
+    """
+
+    __slots__ = ("points", "best")
+
+    def __init__(self, products: Iterable[Any]):
+        products = list(products)
+        self.points: List[Decimal] = sorted(
+            {p.min_amount for p in products}
+            | {p.max_amount for p in products if p.max_amount is not None}
+        )
+        slots = 2 * len(self.points) + 1
+        self.best: List[Optional[Any]] = [None] * slots
+
+        # Paint slots highest APY first; "next unpainted slot" links make
+        # each slot painted once, so the build is near-linear.
+        next_free = list(range(slots + 1))
+
+        def find(slot: int) -> int:
+            while next_free[slot] != slot:
+                next_free[slot] = next_free[next_free[slot]]
+                slot = next_free[slot]
+            return slot
+
+        for product in sorted(products, key=lambda p: p.apy, reverse=True):
+            first = self._slot(product.min_amount)
+            last = slots - 1 if product.max_amount is None else self._slot(product.max_amount)
+            slot = find(first)
+            while slot <= last:
+                self.best[slot] = product
+                next_free[slot] = slot + 1
+                slot = find(slot + 1)
+
+    def _slot(self, amount: Decimal) -> int:
+        i = bisect_left(self.points, amount)
+        if i < len(self.points) and self.points[i] == amount:
+            return 2 * i + 1
+        return 2 * i
+
+    def best_for(self, amount: Decimal) -> Optional[Any]:
+        return self.best[self._slot(amount)]
+
+
+class ProductIndex:
+    """Products ranked by APY, updated incrementally per group
+
+    Products are stored per group (e.g. a product source or a coin) and
+    identified within it by ``id_of``. A global list kept sorted by
+    descending APY makes top-K reads O(K); per-coin interval indexes are
+    rebuilt lazily, and only for coins whose products changed.
+    """
+
+    def __init__(self, id_of: Callable[[Any], Hashable]):
+        self.id_of = id_of
+        self._groups: Dict[str, Dict[Hashable, Any]] = {}
+        self._ranked: List[Tuple[Decimal, int, str, Hashable]] = []
+        self._rank_keys: Dict[Tuple[str, Hashable], Tuple[Decimal, int, str, Hashable]] = {}
+        self._by_coin: Dict[str, Dict[Tuple[str, Hashable], Any]] = {}
+        self._coin_index: Dict[str, CoinIntervalIndex] = {}
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._rank_keys)
+
+    def replace(self, group: str, products: Iterable[Any]) -> None:
+        """Make group contain exactly products"""
+        products = list(products)
+        keep = {self.id_of(p) for p in products}
+        stale = [item_id for item_id in self._groups.get(group, {}) if item_id not in keep]
+        self.remove(group, stale)
+        self.upsert(group, products)
+
+    def upsert(self, group: str, products: Iterable[Any]) -> None:
+        """Add products to group, replacing any with the same id"""
+        items = self._groups.setdefault(group, {})
+        for product in products:
+            item_id = self.id_of(product)
+            current = items.get(item_id)
+            if current is not None:
+                if current == product:
+                    continue
+                self._discard(group, item_id, current)
+
+            items[item_id] = product
+            self._seq += 1
+            rank_key = (-product.apy, self._seq, group, item_id)
+            insort(self._ranked, rank_key)
+            self._rank_keys[(group, item_id)] = rank_key
+            self._by_coin.setdefault(product.coin, {})[(group, item_id)] = product
+            self._coin_index.pop(product.coin, None)
+
+    def remove(self, group: str, item_ids: Iterable[Hashable]) -> None:
+        """Remove products from group by id"""
+        items = self._groups.get(group)
+        if not items:
+            return
+        for item_id in item_ids:
+            product = items.pop(item_id, None)
+            if product is not None:
+                self._discard(group, item_id, product)
+
+    def _discard(self, group: str, item_id: Hashable, product: Any) -> None:
+        rank_key = self._rank_keys.pop((group, item_id))
+        del self._ranked[bisect_left(self._ranked, rank_key)]
+        coin_products = self._by_coin[product.coin]
+        del coin_products[(group, item_id)]
+        if not coin_products:
+            del self._by_coin[product.coin]
+        self._coin_index.pop(product.coin, None)
+
+    def top(self, k: int, exclude: Optional[Set[str]] = None) -> List[Any]:
+        """Get the k highest-APY products, skipping excluded groups"""
+        result = []
+        for _, _, group, item_id in self._ranked:
+            if len(result) >= k:
+                break
+            if exclude and group in exclude:
+                continue
+            result.append(self._groups[group][item_id])
+        return result
+
+    def top_for_coin(self, coin: str, k: int) -> List[Any]:
+        """Get the k highest-APY products for one coin"""
+        return heapq.nlargest(k, self._by_coin.get(coin, {}).values(), key=lambda p: p.apy)
+
+    def best_for_amount(self, coin: str, amount: Decimal) -> Optional[Any]:
+        """Get the highest-APY product for coin that accepts amount"""
+        index = self._coin_index.get(coin)
+        if index is None:
+            products = self._by_coin.get(coin)
+            if not products:
+                return None
+            index = CoinIntervalIndex(products.values())
+            self._coin_index[coin] = index
+        return index.best_for(amount)
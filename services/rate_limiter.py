@@ -0,0 +1,215 @@
+"""Request-weight scheduler keeping exchange calls inside rate limits"""
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, List, Mapping, Optional
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    ORDER = 0
+    BALANCE = 1
+    MARKET_DATA = 2
+    ANALYTICS = 3
+
+
+# REQUEST_WEIGHT of the Binance spot endpoints behind python-binance methods
+BINANCE_WEIGHTS: Dict[str, int] = {
+    "get_account": 20,
+    "get_symbol_ticker": 2,
+    "get_exchange_info": 20,
+    "get_order_book": 50,
+    "get_server_time": 1,
+    "create_test_order": 1,
+    "create_order": 1,
+    "stream_get_listen_key": 2,
+    "stream_keepalive": 2,
+}
+
+
+@dataclass
+class _Waiter:
+    priority: int
+    seq: int
+    weight: int
+    endpoint: str
+    enqueued_at: float
+    future: asyncio.Future = field(compare=False)
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class RateLimiter:
+    """Token bucket over request weight with priority-ordered waiting
+
+    The bucket refills continuously at ``limit / interval`` weight per
+    second. When the exchange reports its own view of used weight through
+    response headers, the local bucket is pulled down to match, and
+    429/418 responses pause all dispatching until the ban expires.
+    """
+
+    def __init__(
+            self,
+            limit: int,
+            interval: float,
+            weights: Optional[Mapping[str, int]] = None,
+            name: str = "exchange"
+    ):
+        self.limit = limit
+        self.interval = interval
+        self.rate = limit / interval
+        self.weights = dict(weights or {})
+        self.name = name
+
+        self.tokens = float(limit)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self.endpoint_weight: Dict[str, int] = {}
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled_responses = 0
+
+    def weight_for(self, endpoint: str) -> int:
+        return self.weights.get(endpoint, 1)
+
+    async def acquire(self, endpoint: str, priority: Priority = Priority.MARKET_DATA) -> None:
+        """Wait until the endpoint's weight fits in the bucket"""
+        self._loop = asyncio.get_running_loop()
+        weight = self.weight_for(endpoint)
+        self._refill()
+
+        if not self._queue and self._paused_until <= time.monotonic() and self.tokens >= weight:
+            self._consume(endpoint, weight)
+            return
+
+        waiter = _Waiter(
+            priority=int(priority),
+            seq=next(self._seq),
+            weight=weight,
+            endpoint=endpoint,
+            enqueued_at=time.monotonic(),
+            future=self._loop.create_future()
+        )
+        heapq.heappush(self._queue, waiter)
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        await waiter.future
+
+        wait = time.monotonic() - waiter.enqueued_at
+        self.waited += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    async def _dispatch(self) -> None:
+        """Release queued callers in priority order as weight frees up"""
+        while self._queue:
+            self._wakeup.clear()
+            head = self._queue[0]
+            if head.future.done():
+                # Caller was cancelled while waiting
+                heapq.heappop(self._queue)
+                continue
+
+            self._refill()
+            now = time.monotonic()
+            if self._paused_until > now:
+                delay = self._paused_until - now
+            elif self.tokens >= head.weight:
+                heapq.heappop(self._queue)
+                self._consume(head.endpoint, head.weight)
+                head.future.set_result(None)
+                continue
+            else:
+                delay = (head.weight - self.tokens) / self.rate
+
+            try:
+                # A new, higher-priority waiter may arrive while sleeping
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.limit, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _consume(self, endpoint: str, weight: int) -> None:
+        self.tokens -= weight
+        self.endpoint_weight[endpoint] = self.endpoint_weight.get(endpoint, 0) + weight
+
+    def attach(self, session) -> None:
+        """Observe rate-limit headers on every response of a requests.Session"""
+        session.hooks["response"].append(self._on_response)
+
+    def _on_response(self, response, *args, **kwargs) -> None:
+        # Called from executor threads; hand the data over to the loop
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(
+            self.observe,
+            response.status_code,
+            dict(response.headers)
+        )
+
+    def observe(self, status: int, headers: Mapping[str, str]) -> None:
+        """Sync the bucket with exchange-reported usage and bans"""
+        headers = {k.lower(): v for k, v in headers.items()}
+        self._refill()
+
+        used = headers.get("x-mbx-used-weight-1m") or headers.get("x-mbx-used-weight")
+        if used is not None:
+            self.tokens = min(self.tokens, self.limit - int(used))
+
+        remaining = headers.get("x-bapi-limit-status")
+        if remaining is not None:
+            reset_ms = headers.get("x-bapi-limit-reset-timestamp")
+            if int(remaining) <= 0 and reset_ms:
+                self._pause((int(reset_ms) / 1000) - time.time())
+
+        if status in (418, 429) or (status == 403 and remaining is not None):
+            self.throttled_responses += 1
+            retry_after = float(headers.get("retry-after", self.interval))
+            logger.warning(f"{self.name} rate limit hit ({status}), pausing {retry_after}s")
+            self._pause(retry_after)
+
+        self._wakeup.set()
+
+    def _pause(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        self.tokens = min(self.tokens, 0.0)
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def metrics(self) -> Dict[str, object]:
+        """Get queue depth, wait time and weight usage metrics"""
+        depth: Dict[str, int] = {p.name: 0 for p in Priority}
+        for waiter in self._queue:
+            if not waiter.future.done():
+                depth[Priority(waiter.priority).name] += 1
+
+        return {
+            "tokens": round(self.tokens, 2),
+            "queue_depth": depth,
+            "waited": self.waited,
+            "avg_wait": self.total_wait / self.waited if self.waited else 0.0,
+            "max_wait": self.max_wait,
+            "paused_for": max(0.0, self._paused_until - time.monotonic()),
+            "throttled_responses": self.throttled_responses,
+            "endpoint_weight": dict(self.endpoint_weight)
+        }
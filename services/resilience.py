@@ -0,0 +1,247 @@
+"""Timeouts, retries, hedging and circuit breaking for exchange calls"""
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Optional
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when an endpoint's breaker is open and nothing is cached"""
+
+
+class BreakerState(Enum):
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
+@dataclass
+class EndpointPolicy:
+    timeout: float = 10.0
+    retries: int = 2
+    backoff_base: float = 0.2
+    backoff_cap: float = 5.0
+    hedge_after: Optional[float] = None  # seconds; idempotent reads only
+
+
+DEFAULT_POLICIES: Dict[str, EndpointPolicy] = {
+    # Binance
+    "get_symbol_ticker": EndpointPolicy(timeout=3.0, hedge_after=0.5),
+    "get_account": EndpointPolicy(timeout=5.0, hedge_after=1.5),
+    "get_order_book": EndpointPolicy(timeout=5.0),
+    "get_exchange_info": EndpointPolicy(timeout=15.0, retries=3),
+    # Orders outlive the clients' HTTP timeouts (15s Binance, 10s Bybit) so a
+    # timed-out attempt is never still in flight when the caller moves on
+    "create_test_order": EndpointPolicy(timeout=20.0, retries=3),
+    # Bybit
+    "get_tickers": EndpointPolicy(timeout=3.0, hedge_after=0.5),
+    "get_instruments_info": EndpointPolicy(timeout=15.0, retries=3),
+    "place_order": EndpointPolicy(timeout=20.0, retries=3),
+    "place_batch_order": EndpointPolicy(timeout=20.0, retries=3),
+}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient network/server errors are retryable; request errors are not"""
+    if isinstance(error, (asyncio.TimeoutError, OSError)):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS
+
+
+def is_ambiguous(error: BaseException) -> bool:
+    """Failures after which the request may still have reached the exchange
+
+    Resending an order after one of these can fill it twice: exchanges only
+    reject a duplicate client order ID while the first order is still open.
+    """
+    if isinstance(error, ConnectionRefusedError):
+        return False
+    if isinstance(error, (asyncio.TimeoutError, OSError)):
+        return True
+    return getattr(error, "status_code", None) not in (None, 429)
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.changed_at = time.monotonic()
+        self.transitions: Dict[str, int] = {state.value: 0 for state in BreakerState}
+        self.time_in_state: Dict[str, float] = {state.value: 0.0 for state in BreakerState}
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state is BreakerState.OPEN:
+            if time.monotonic() - self.changed_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            # Let a probe through
+            self._transition(BreakerState.HALF_OPEN)
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self.state is not BreakerState.CLOSED:
+            self._transition(BreakerState.CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state is BreakerState.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state is not BreakerState.OPEN:
+                logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+            self._transition(BreakerState.OPEN)
+
+    def _transition(self, state: BreakerState) -> None:
+        now = time.monotonic()
+        self.time_in_state[self.state.value] += now - self.changed_at
+        self.state = state
+        self.changed_at = now
+        self.transitions[state.value] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        time_in_state = dict(self.time_in_state)
+        time_in_state[self.state.value] += time.monotonic() - self.changed_at
+        return {
+            "state": self.state.value,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "transitions": dict(self.transitions),
+            "time_in_state": time_in_state
+        }
+
+
+class Resilience:
+    """Per-endpoint timeouts, jittered retries, hedging and circuit breakers
+
+    While an endpoint's breaker is open, calls return the last good
+    result for the same call key (if any) instead of hitting the
+    exchange, and raise CircuitOpenError otherwise.
+    """
+
+    def __init__(
+            self,
+            policies: Optional[Mapping[str, EndpointPolicy]] = None,
+            default_policy: Optional[EndpointPolicy] = None,
+            failure_threshold: int = 5,
+            reset_timeout: float = 30.0
+    ):
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self.default_policy = default_policy or EndpointPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._last_good: Dict[Hashable, Any] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.fallbacks = 0
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(endpoint, self.failure_threshold, self.reset_timeout)
+            self.breakers[endpoint] = breaker
+        return breaker
+
+    async def call(
+            self,
+            endpoint: str,
+            func: Callable[[], Awaitable[Any]],
+            idempotent: bool = True,
+            cache_key: Optional[Hashable] = None
+    ) -> Any:
+        """Run func under the endpoint's policy and breaker"""
+        policy = self.policies.get(endpoint, self.default_policy)
+        breaker = self.breaker(endpoint)
+
+        if not breaker.allow():
+            return self._fallback(endpoint, cache_key)
+
+        attempt = 0
+        while True:
+            try:
+                if idempotent and policy.hedge_after:
+                    result = await self._hedged(func, policy)
+                else:
+                    result = await asyncio.wait_for(func(), timeout=policy.timeout)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                breaker.record_failure()
+                # Non-idempotent calls (orders) are only resent when the
+                # exchange certainly did not act on them
+                if not idempotent and is_ambiguous(e):
+                    raise
+                if attempt >= policy.retries or not breaker.allow():
+                    if idempotent and cache_key is not None and cache_key in self._last_good:
+                        return self._fallback(endpoint, cache_key)
+                    raise
+
+                delay = random.uniform(0, min(policy.backoff_cap, policy.backoff_base * 2 ** attempt))
+                logger.warning(f"{endpoint} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+                continue
+
+            breaker.record_success()
+            if idempotent and cache_key is not None:
+                self._last_good[cache_key] = result
+            return result
+
+    async def _hedged(self, func: Callable[[], Awaitable[Any]], policy: EndpointPolicy) -> Any:
+        """Send a second identical request if the first is slow; first success wins"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + policy.timeout
+        first = asyncio.ensure_future(func())
+        done, _ = await asyncio.wait({first}, timeout=policy.hedge_after)
+        if done:
+            return first.result()
+
+        self.hedges += 1
+        pending = {first, asyncio.ensure_future(func())}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=remaining,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise error or asyncio.TimeoutError()
+
+    def _fallback(self, endpoint: str, cache_key: Optional[Hashable]) -> Any:
+        if cache_key is not None and cache_key in self._last_good:
+            self.fallbacks += 1
+            logger.warning(f"Serving cached result for {endpoint} while circuit is open")
+            return self._last_good[cache_key]
+        raise CircuitOpenError(f"{endpoint} is temporarily unavailable")
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get retry/hedge counters and per-endpoint breaker state"""
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "fallbacks": self.fallbacks,
+            "breakers": {name: b.metrics() for name, b in self.breakers.items()}
+        }
@@ -1,14 +1,23 @@
 """Factory for creating and managing services with shared dependencies"""
+from pathlib import Path
 from pybit.unified_trading import HTTP
-from config import BYBIT_API_KEY, BYBIT_API_SECRET
-from .bybit_service import BybitService
+from config import BYBIT_API_KEY, BYBIT_API_SECRET, DATA_DIR
 from .trading_service import TradingService
+from .investment_service import InvestmentService
+from .market_data import BybitMarketDataFeed
+from .rate_limiter import RateLimiter
+from .resilience import Resilience
+from .client_registry import ClientRegistry
+from utils.time_sync import install_pybit_clock
 
 class ServiceFactory:
     _instance = None
     _bybit_session = None
-    _bybit_service = None
     _trading_service = None
+    _investment_service = None
+    _market_data = None
+    _rate_limiter = None
+    _resilience = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -17,20 +26,58 @@ class ServiceFactory:
             cls._bybit_session = HTTP(
                 api_key=BYBIT_API_KEY,
                 api_secret=BYBIT_API_SECRET,
-                testnet=True  # Using testnet for all operations
+                testnet=True,  # Using testnet for all operations
+                max_retries=1  # Retries are handled by the resilience layer
             )
+            # Sign Bybit requests with the shared corrected clock
+            session = cls._bybit_session
+            clock = ClientRegistry().clock
+            clock.add_source("bybit", lambda: int(session.get_server_time()["result"]["timeNano"]) / 1e6)
+            install_pybit_clock(clock)
         return cls._instance
 
-    @property
-    def bybit_service(self) -> BybitService:
-        """Get or create BybitService instance"""
-        if self._bybit_service is None:
-            self._bybit_service = BybitService(self._bybit_session)
-        return self._bybit_service
-
     @property
     def trading_service(self) -> TradingService:
         """Get or create TradingService instance"""
         if self._trading_service is None:
-            self._trading_service = TradingService(self._bybit_session)
-        return self._trading_service
\ No newline at end of file
+            self._trading_service = TradingService(
+                self._bybit_session,
+                self.market_data,
+                self.rate_limiter,
+                symbol_cache_path=Path(DATA_DIR) / "bybit_instruments.json",
+                resilience=self.resilience
+            )
+        return self._trading_service
+
+    @property
+    def investment_service(self) -> InvestmentService:
+        """Get or create InvestmentService instance"""
+        if self._investment_service is None:
+            self._investment_service = InvestmentService(
+                self._bybit_session,
+                self.resilience,
+                ClientRegistry().product_catalog,
+                rate_limiter=self.rate_limiter
+            )
+        return self._investment_service
+
+    @property
+    def market_data(self) -> BybitMarketDataFeed:
+        """Get or create the shared Bybit ticker feed"""
+        if self._market_data is None:
+            self._market_data = BybitMarketDataFeed()
+        return self._market_data
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Get or create the shared Bybit rate limiter (600 requests / 5s per IP)"""
+        if self._rate_limiter is None:
+            self._rate_limiter = RateLimiter(600, 5.0, name="bybit")
+        return self._rate_limiter
+
+    @property
+    def resilience(self) -> Resilience:
+        """Get or create the shared Bybit retry/circuit-breaker layer"""
+        if self._resilience is None:
+            self._resilience = Resilience()
+        return self._resilience
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""Run the bot as several processes sharded by chat ID"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import time
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# Raw update fields that carry the chat, checked in order
+_CHAT_PATHS = (
+    ("message", "chat"),
+    ("edited_message", "chat"),
+    ("channel_post", "chat"),
+    ("edited_channel_post", "chat"),
+    ("callback_query", "message", "chat"),
+    ("my_chat_member", "chat"),
+    ("chat_member", "chat"),
+    ("chat_join_request", "chat")
+)
+
+
+def raw_route_key(update: Dict[str, Any]) -> int:
+    """Get the chat (or user) of an undecoded update
+
+    Matches ``update_pipeline.route_key`` without building aiogram
+    models, so the ingress process stays cheap.
+    """
+    for path in _CHAT_PATHS:
+        node: Any = update
+        for name in path:
+            node = node.get(name) if isinstance(node, dict) else None
+        if isinstance(node, dict) and "id" in node:
+            return node["id"]
+    for value in update.values():
+        if isinstance(value, dict) and isinstance(value.get("from"), dict):
+            return value["from"]["id"]
+    return update.get("update_id", 0)
+
+
+@dataclass
+class Worker:
+    name: str
+    target: Callable[..., None]
+    args: Tuple[Any, ...]
+    env: Dict[str, str]
+    process: Optional[multiprocessing.Process] = None
+    started_at: float = 0.0
+    restarts: int = 0
+    restart_at: float = 0.0
+
+
+class ShardSupervisor:
+    """Starts shard processes and a market data feeder and restarts them if they die
+
+    Updates are routed to ``shard_target(index, queue)`` processes by
+    ``chat_id % shards``, so every chat is handled by one process and its
+    FSM state never moves between caches. Crashed processes are restarted
+    with exponential backoff; updates already queued for a shard wait for
+    its replacement.
+    """
+
+    def __init__(
+            self,
+            shard_target: Callable[[int, Any], None],
+            shards: int,
+            feeder: Optional[Tuple[Callable[..., None], Tuple[Any, ...]]] = None,
+            queue_size: int = 1000,
+            max_backoff: float = 30.0,
+            env: Optional[Dict[str, str]] = None
+    ):
+        self.shards = shards
+        self.max_backoff = max_backoff
+        self._context = multiprocessing.get_context("spawn")
+        self.queues = [self._context.Queue(queue_size) for _ in range(shards)]
+        self.workers: List[Worker] = []
+        if feeder is not None:
+            self.workers.append(Worker("feeder", feeder[0], feeder[1], {}))
+        for index in range(shards):
+            self.workers.append(Worker(
+                f"shard-{index}",
+                shard_target,
+                (index, self.queues[index]),
+                {**(env or {}), "BOT_SHARDS": str(shards), "BOT_SHARD_INDEX": str(index)}
+            ))
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Metrics
+        self.routed = 0
+        self.rejected = 0
+        self.restarts = 0
+
+    def start(self) -> None:
+        for worker in self.workers:
+            self._spawn(worker)
+        self._task = asyncio.create_task(self._monitor())
+
+    def _spawn(self, worker: Worker) -> None:
+        # Spawned children read their shard settings from the environment
+        saved = {key: os.environ.get(key) for key in worker.env}
+        os.environ.update(worker.env)
+        try:
+            worker.process = self._context.Process(
+                target=worker.target,
+                args=worker.args,
+                name=worker.name,
+                daemon=True
+            )
+            worker.process.start()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        worker.started_at = time.monotonic()
+        logger.info(f"Started {worker.name} (pid {worker.process.pid})")
+
+    async def _monitor(self) -> None:
+        while not self._stopping:
+            await asyncio.sleep(1.0)
+            now = time.monotonic()
+            for worker in self.workers:
+                if worker.process.is_alive() or self._stopping:
+                    continue
+                if not worker.restart_at:
+                    if now - worker.started_at > 60.0:
+                        # It ran fine for a while; start backoff over
+                        worker.restarts = 0
+                    delay = min(self.max_backoff, 2.0 ** worker.restarts)
+                    worker.restart_at = now + delay
+                    logger.error(
+                        f"{worker.name} exited with code {worker.process.exitcode}, "
+                        f"restarting in {delay:.0f}s"
+                    )
+                elif now >= worker.restart_at:
+                    worker.restart_at = 0.0
+                    worker.restarts += 1
+                    self.restarts += 1
+                    self._spawn(worker)
+
+    def dispatch(self, update: Dict[str, Any]) -> bool:
+        """Queue a raw update for its chat's shard; False if that shard is full"""
+        try:
+            self.queues[raw_route_key(update) % self.shards].put_nowait(update)
+        except queue.Full:
+            self.rejected += 1
+            return False
+        self.routed += 1
+        return True
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Ask shards to finish their queues, then stop every process"""
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        deadline = time.monotonic() + timeout
+        for updates in self.queues:
+            try:
+                # Behind everything already queued, so shards drain first
+                await asyncio.to_thread(updates.put, None, True, max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                pass
+        for worker in self.workers:
+            if worker.name == "feeder":
+                continue
+            await asyncio.to_thread(worker.process.join, max(0.0, deadline - time.monotonic()))
+        for worker in self.workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+                await asyncio.to_thread(worker.process.join, 5.0)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get routing counters and process health"""
+        return {
+            "routed": self.routed,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+            "alive": sum(1 for worker in self.workers if worker.process and worker.process.is_alive()),
+            "processes": len(self.workers)
+        }
+
+
+async def poll_updates(
+        supervisor: ShardSupervisor,
+        token: str,
+        allowed_updates: Optional[Sequence[str]] = None,
+        timeout: int = 30,
+        api_url: str = "https://api.telegram.org"
+) -> None:
+    """Long-poll getUpdates and route raw updates to shards until cancelled"""
+    offset = None
+    url = f"{api_url}/bot{token}/getUpdates"
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout + 10)) as session:
+        while True:
+            params: Dict[str, Any] = {"timeout": timeout}
+            if offset is not None:
+                params["offset"] = offset
+            if allowed_updates is not None:
+                params["allowed_updates"] = json.dumps(list(allowed_updates))
+            try:
+                async with session.get(url, params=params) as response:
+                    body = await response.json()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"getUpdates failed: {str(e)}")
+                await asyncio.sleep(1.0)
+                continue
+            if not body.get("ok"):
+                logger.warning(f"getUpdates error: {body.get('description')}")
+                await asyncio.sleep((body.get("parameters") or {}).get("retry_after", 1.0))
+                continue
+
+            for update in body["result"]:
+                # A full shard holds back the offset, so nothing is lost
+                while not supervisor.dispatch(update):
+                    await asyncio.sleep(0.05)
+                offset = update["update_id"] + 1
+
+
+def build_ingress_app(
+        supervisor: ShardSupervisor,
+        path: str,
+        secret_token: Optional[str] = None
+) -> web.Application:
+    """Create an aiohttp app that routes webhook updates to shards undecoded"""
+
+    async def handle_update(request: web.Request) -> web.Response:
+        if secret_token and request.headers.get(SECRET_HEADER) != secret_token:
+            return web.Response(status=401)
+        try:
+            update = await request.json()
+        except ValueError as e:
+            logger.warning(f"Rejected malformed update: {str(e)}")
+            return web.Response(status=400)
+        if not isinstance(update, dict):
+            return web.Response(status=400)
+
+        if not supervisor.dispatch(update):
+            return web.Response(status=503)
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(path, handle_update)
+    return app
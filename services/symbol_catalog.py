@@ -0,0 +1,253 @@
+"""Locally indexed catalog of tradable symbols and their order filters"""
+from dataclasses import asdict, dataclass, fields
+from decimal import Decimal, ROUND_DOWN
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import bisect
+import difflib
+import json
+import logging
+import time
+from utils.atomic_file import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SymbolFilters:
+    symbol: str
+    base_asset: str
+    quote_asset: str
+    tick_size: Decimal
+    min_price: Decimal
+    max_price: Decimal
+    step_size: Decimal
+    min_qty: Decimal
+    max_qty: Decimal
+    min_notional: Decimal
+
+    def to_dict(self) -> Dict[str, str]:
+        return {key: str(value) for key, value in asdict(self).items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> "SymbolFilters":
+        values = {}
+        for f in fields(cls):
+            values[f.name] = data[f.name] if f.type is str else Decimal(data[f.name])
+        return cls(**values)
+
+
+def _decimal(value: Optional[str]) -> Decimal:
+    return Decimal(value) if value not in (None, "") else Decimal("0")
+
+
+def parse_binance_exchange_info(info: Dict) -> List[SymbolFilters]:
+    """Build filters for every TRADING symbol in a Binance exchangeInfo payload"""
+    result = []
+    for item in info.get("symbols", []):
+        if item.get("status") != "TRADING":
+            continue
+
+        filters = {f["filterType"]: f for f in item.get("filters", [])}
+        price = filters.get("PRICE_FILTER", {})
+        lot = filters.get("LOT_SIZE", {})
+        # Newer symbols publish NOTIONAL instead of MIN_NOTIONAL
+        notional = filters.get("MIN_NOTIONAL") or filters.get("NOTIONAL") or {}
+
+        result.append(SymbolFilters(
+            symbol=item["symbol"],
+            base_asset=item["baseAsset"],
+            quote_asset=item["quoteAsset"],
+            tick_size=_decimal(price.get("tickSize")),
+            min_price=_decimal(price.get("minPrice")),
+            max_price=_decimal(price.get("maxPrice")),
+            step_size=_decimal(lot.get("stepSize")),
+            min_qty=_decimal(lot.get("minQty")),
+            max_qty=_decimal(lot.get("maxQty")),
+            min_notional=_decimal(notional.get("minNotional"))
+        ))
+    return result
+
+
+def parse_bybit_instruments(response: Dict) -> List[SymbolFilters]:
+    """Build filters for every trading spot instrument in a Bybit response"""
+    result = []
+    for item in response.get("result", {}).get("list", []):
+        if item.get("status") != "Trading":
+            continue
+
+        lot = item.get("lotSizeFilter", {})
+        price = item.get("priceFilter", {})
+        result.append(SymbolFilters(
+            symbol=item["symbol"],
+            base_asset=item["baseCoin"],
+            quote_asset=item["quoteCoin"],
+            tick_size=_decimal(price.get("tickSize")),
+            min_price=Decimal("0"),
+            max_price=Decimal("0"),
+            step_size=_decimal(lot.get("basePrecision")),
+            min_qty=_decimal(lot.get("minOrderQty")),
+            max_qty=_decimal(lot.get("maxOrderQty")),
+            min_notional=_decimal(lot.get("minOrderAmt"))
+        ))
+    return result
+
+
+class SymbolCatalog:
+    """Symbol index with O(1) validation, suggestions and order-filter checks
+
+    The catalog is refreshed in the background every ``ttl`` seconds and
+    written to ``cache_path`` so a restart can serve lookups immediately.
+    """
+
+    def __init__(
+            self,
+            loader: Callable[[], Awaitable[Optional[List[SymbolFilters]]]],
+            cache_path: Optional[Path] = None,
+            ttl: float = 3600.0
+    ):
+        self.loader = loader
+        self.cache_path = cache_path
+        self.ttl = ttl
+
+        self.symbols: Dict[str, SymbolFilters] = {}
+        self._sorted_names: List[str] = []
+        self.loaded_at = 0.0
+        self._load_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self.symbols)
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.loaded_at > self.ttl
+
+    async def ensure_loaded(self) -> bool:
+        """Make sure the catalog has data, loading from disk or the exchange"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        if self.loaded:
+            return True
+
+        async with self._load_lock:
+            if not self.loaded and self.cache_path and self.cache_path.exists():
+                await asyncio.to_thread(self._load_from_disk)
+            if not self.loaded:
+                await self.refresh()
+        return self.loaded
+
+    async def refresh(self) -> None:
+        """Reload the catalog from the exchange, keeping old data on failure"""
+        try:
+            filters = await self.loader()
+        except Exception as e:
+            logger.error(f"Error loading symbol catalog: {str(e)}")
+            return
+
+        if not filters:
+            logger.warning("Symbol catalog refresh returned no symbols")
+            return
+
+        self._index(filters, time.time())
+        logger.info(f"Symbol catalog loaded with {len(self.symbols)} symbols")
+        if self.cache_path:
+            await asyncio.to_thread(self._save_to_disk)
+
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            # A warm cache from disk may already be due for a refresh
+            delay = max(0.0, self.loaded_at + self.ttl - time.time()) if self.loaded else self.ttl
+            await asyncio.sleep(delay)
+            await self.refresh()
+
+    def _index(self, filters: List[SymbolFilters], loaded_at: float) -> None:
+        # Swap whole structures so readers never see a half-built index
+        self.symbols = {f.symbol: f for f in filters}
+        self._sorted_names = sorted(self.symbols)
+        self.loaded_at = loaded_at
+
+    def _load_from_disk(self) -> None:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            filters = [SymbolFilters.from_dict(item) for item in data["symbols"]]
+            self._index(filters, float(data["loaded_at"]))
+            logger.info(f"Symbol catalog restored from {self.cache_path}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable symbol cache: {str(e)}")
+
+    def _save_to_disk(self) -> None:
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.cache_path, json.dumps({
+                "loaded_at": self.loaded_at,
+                "symbols": [f.to_dict() for f in self.symbols.values()]
+            }))
+        except OSError as e:
+            logger.warning(f"Failed to save symbol cache: {str(e)}")
+
+    def is_valid(self, symbol: str) -> bool:
+        return symbol in self.symbols
+
+    def get(self, symbol: str) -> Optional[SymbolFilters]:
+        return self.symbols.get(symbol)
+
+    def symbol_names(self) -> List[str]:
+        return list(self._sorted_names)
+
+    def suggest(self, text: str, limit: int = 5) -> List[str]:
+        """Suggest symbols by prefix first, then by fuzzy match"""
+        names = self._sorted_names
+        start = bisect.bisect_left(names, text)
+        suggestions = []
+        for name in names[start:start + limit]:
+            if not name.startswith(text):
+                break
+            suggestions.append(name)
+
+        if len(suggestions) < limit:
+            for name in difflib.get_close_matches(text, names, n=limit, cutoff=0.7):
+                if name not in suggestions:
+                    suggestions.append(name)
+        return suggestions[:limit]
+
+    def round_quantity(self, symbol: str, quantity: Decimal) -> Decimal:
+        """Round a quantity down to the symbol's LOT_SIZE step"""
+        filters = self.symbols.get(symbol)
+        if not filters or filters.step_size <= 0:
+            return quantity
+        steps = (quantity / filters.step_size).to_integral_value(rounding=ROUND_DOWN)
+        # Keep the step's exponent so the result prints as plain digits (100.00, not 1E+2)
+        return (steps * filters.step_size).quantize(filters.step_size)
+
+    def validate_order(
+            self,
+            symbol: str,
+            quantity: Decimal,
+            price: Optional[Decimal] = None
+    ) -> Optional[str]:
+        """Check an order against cached filters, returning an error message"""
+        filters = self.symbols.get(symbol)
+        if filters is None:
+            return f"Unknown trading pair {symbol}" if self.loaded else None
+
+        if quantity <= 0:
+            return f"Quantity for {symbol} must be at least one lot of {filters.step_size.normalize():f}"
+        if quantity < filters.min_qty:
+            return f"Minimum quantity for {symbol} is {filters.min_qty.normalize():f}"
+        if filters.max_qty > 0 and quantity > filters.max_qty:
+            return f"Maximum quantity for {symbol} is {filters.max_qty.normalize():f}"
+        if price is not None and filters.min_notional > 0 and quantity * price < filters.min_notional:
+            return (
+                f"Order value must be at least {filters.min_notional.normalize():f} "
+                f"{filters.quote_asset}"
+            )
+        return None
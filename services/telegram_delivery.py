@@ -0,0 +1,304 @@
+"""Outbound Telegram delivery with flood-control-aware rate limiting"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import EditMessageText
+
+logger = logging.getLogger(__name__)
+
+
+class Lane(IntEnum):
+    """Delivery priority; lower values are sent first"""
+    INTERACTIVE = 0  # replies to the user's own commands
+    NOTIFICATION = 1  # scheduled notifications
+    BULK = 2  # announcements
+
+
+_lane: ContextVar[Lane] = ContextVar("delivery_lane", default=Lane.INTERACTIVE)
+
+
+@contextmanager
+def delivery_lane(lane: Lane) -> Iterator[None]:
+    """Send every Telegram request made inside the block on lane"""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+
+@dataclass
+class DeliveryJob:
+    method: Any
+    make_request: Any
+    lane: Lane
+    seq: int
+    enqueued_at: float
+    bot: Any = None
+    futures: List[asyncio.Future] = field(default_factory=list)
+    edit_key: Optional[Tuple[Any, int]] = None
+    attempts: int = 0
+
+
+class ChatQueue:
+    __slots__ = ("jobs", "bucket", "blocked_until", "scheduled")
+
+    def __init__(self, bucket: TokenBucket):
+        self.jobs: Deque[DeliveryJob] = deque()
+        self.bucket = bucket
+        self.blocked_until = 0.0
+        self.scheduled = False
+
+
+class DeliveryMiddleware(BaseRequestMiddleware):
+    """Queues chat-bound requests behind per-chat and global token buckets
+
+    Requests that target a chat (sends and edits) wait their turn; others
+    (getUpdates, answerCallbackQuery, ...) pass straight through. Chats
+    are served by lane, then in arrival order, and a chat that is waiting
+    for its bucket never blocks the others. A queued edit of a message
+    that is edited again before it goes out is replaced by the newer one.
+    On RetryAfter the chat is paused for the requested time and the
+    request is retried.
+    """
+
+    def __init__(
+            self,
+            global_rate: float = 30.0,
+            chat_rate: float = 1.0,
+            chat_burst: float = 3.0,
+            group_rate: float = 20.0 / 60.0,
+            max_retries: int = 3
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+
+        self._chats: Dict[Any, ChatQueue] = {}
+        self._ready: List[Tuple[int, int, Any]] = []  # (lane, seq, chat_id)
+        self._waiting: List[Tuple[float, int, Any]] = []  # (ready_at, seq, chat_id)
+        self._edits: Dict[Tuple[Any, int], DeliveryJob] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._sending: set = set()
+        self._dispatched = 0
+
+        # Metrics
+        self.sent = 0
+        self.coalesced = 0
+        self.retry_afters = 0
+        self._latencies: Deque[float] = deque(maxlen=1000)
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        edit_key = None
+        if isinstance(method, EditMessageText) and method.message_id is not None:
+            edit_key = (chat_id, method.message_id)
+            pending = self._edits.get(edit_key)
+            if pending is not None:
+                # Still queued: send only the newest text
+                pending.method = method
+                pending.futures.append(future)
+                self.coalesced += 1
+                return await future
+
+        job = DeliveryJob(
+            method,
+            make_request,
+            _lane.get(),
+            next(self._seq),
+            time.monotonic(),
+            bot,
+            [future],
+            edit_key
+        )
+        self._enqueue(chat_id, job)
+        return await future
+
+    def _start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, *self._sending, return_exceptions=True)
+            self._task = None
+
+    def _chat(self, chat_id: Any) -> ChatQueue:
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            chat = ChatQueue(TokenBucket(rate, self.chat_burst))
+            self._chats[chat_id] = chat
+        return chat
+
+    def _enqueue(self, chat_id: Any, job: DeliveryJob, front: bool = False) -> None:
+        if job.edit_key and job.edit_key not in self._edits:
+            self._edits[job.edit_key] = job
+        chat = self._chat(chat_id)
+        if front:
+            chat.jobs.appendleft(job)
+        else:
+            chat.jobs.append(job)
+        self._schedule(chat_id, chat)
+        self._wakeup.set()
+
+    def _schedule(self, chat_id: Any, chat: ChatQueue) -> None:
+        if chat.scheduled or not chat.jobs:
+            return
+        chat.scheduled = True
+        now = time.monotonic()
+        ready_at = max(now + chat.bucket.wait_time(now), chat.blocked_until)
+        heapq.heappush(self._waiting, (ready_at, next(self._seq), chat_id))
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            while self._waiting and self._waiting[0][0] <= now:
+                _, _, chat_id = heapq.heappop(self._waiting)
+                head = self._chats[chat_id].jobs[0]
+                heapq.heappush(self._ready, (head.lane, head.seq, chat_id))
+
+            if not self._ready:
+                timeout = self._waiting[0][0] - now if self._waiting else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            delay = self.global_bucket.wait_time(now)
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+
+            _, _, chat_id = heapq.heappop(self._ready)
+            chat = self._chats[chat_id]
+            chat.scheduled = False
+            if time.monotonic() < chat.blocked_until:
+                # Paused by a RetryAfter after it became ready
+                self._schedule(chat_id, chat)
+                continue
+
+            job = chat.jobs.popleft()
+            if job.edit_key:
+                self._edits.pop(job.edit_key, None)
+            now = time.monotonic()
+            self.global_bucket.take(now)
+            chat.bucket.take(now)
+            task = asyncio.create_task(self._send(chat_id, job))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+            self._schedule(chat_id, chat)
+            self._dispatched += 1
+            if self._dispatched % 1024 == 0:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Forget idle chats whose buckets have refilled (amortised)"""
+        for chat_id in [
+            chat_id for chat_id, chat in self._chats.items()
+            if not chat.jobs and not chat.scheduled and chat.blocked_until <= now
+            and chat.bucket.wait_time(now) == 0 and chat.bucket.tokens >= chat.bucket.capacity
+        ]:
+            del self._chats[chat_id]
+
+    async def _send(self, chat_id: Any, job: DeliveryJob) -> None:
+        try:
+            result = await job.make_request(job.bot, job.method)
+        except TelegramRetryAfter as e:
+            self.retry_afters += 1
+            if job.attempts < self.max_retries:
+                logger.warning(f"Flood control in chat {chat_id}, retrying in {e.retry_after}s")
+                chat = self._chat(chat_id)
+                chat.blocked_until = time.monotonic() + e.retry_after
+                job.attempts += 1
+                self._enqueue(chat_id, job, front=True)
+                return
+            self._finish(job, error=e)
+            return
+        except Exception as e:
+            self._finish(job, error=e)
+            return
+
+        self.sent += 1
+        self._latencies.append(time.monotonic() - job.enqueued_at)
+        self._finish(job, result=result)
+
+    @staticmethod
+    def _finish(job: DeliveryJob, result: Any = None, error: Optional[BaseException] = None) -> None:
+        for future in job.futures:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def metrics(self) -> Dict[str, float]:
+        """Get queue depth and delivery latency metrics"""
+        latencies = sorted(self._latencies)
+
+        def percentile(q: float) -> float:
+            return latencies[min(len(latencies) - 1, int(len(latencies) * q))] if latencies else 0.0
+
+        depth = {lane.name.lower(): 0 for lane in Lane}
+        for chat in self._chats.values():
+            for job in chat.jobs:
+                depth[job.lane.name.lower()] += 1
+
+        return {
+            "queue_depth": sum(depth.values()),
+            "queue_depth_by_lane": depth,
+            "queued_chats": sum(1 for chat in self._chats.values() if chat.jobs),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "retry_afters": self.retry_afters,
+            "p50_latency": percentile(0.5),
+            "p99_latency": percentile(0.99)
+        }
@@ -1,19 +1,78 @@
 from decimal import Decimal
-from typing import Dict, Optional, List
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, List
+import asyncio
 import logging
+from utils.single_flight import SingleFlight
+from .market_data import BybitMarketDataFeed
+from .rate_limiter import Priority, RateLimiter
+from .resilience import Resilience
+from .symbol_catalog import SymbolCatalog, SymbolFilters, parse_bybit_instruments
 
 logger = logging.getLogger(__name__)
 
 
 class TradingService:
-    def __init__(self, session):
+    def __init__(
+            self,
+            session,
+            market_data: Optional[BybitMarketDataFeed] = None,
+            rate_limiter: Optional[RateLimiter] = None,
+            symbol_cache_path: Optional[Path] = None,
+            resilience: Optional[Resilience] = None
+    ):
         self.session = session
+        self.market_data = market_data
+        self.single_flight = SingleFlight()
+        self.rate_limiter = rate_limiter
+        if rate_limiter:
+            rate_limiter.attach(session.client)
+        self.symbol_catalog = SymbolCatalog(self._load_symbol_filters, symbol_cache_path)
+        self.resilience = resilience
+
+    async def _call(
+            self,
+            func: Callable[..., Any],
+            priority: Priority = Priority.MARKET_DATA,
+            **kwargs
+    ) -> Any:
+        """Run a blocking pybit call off the event loop"""
+        endpoint = func.__name__
+
+        async def attempt() -> Any:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(endpoint, priority)
+            return await asyncio.to_thread(func, **kwargs)
+
+        if self.resilience is None:
+            return await attempt()
+        return await self.resilience.call(
+            endpoint,
+            attempt,
+            idempotent=priority is not Priority.ORDER,
+            cache_key=(endpoint, *sorted((k, str(v)) for k, v in kwargs.items()))
+        )
+
+    async def _shared(
+            self,
+            func: Callable[..., Any],
+            priority: Priority = Priority.MARKET_DATA,
+            **kwargs
+    ) -> Any:
+        """Run a read-only call, sharing it with identical concurrent callers"""
+        key = (func.__name__, *sorted(kwargs.items()))
+        return await self.single_flight.do(
+            key,
+            lambda: self._call(func, priority=priority, **kwargs)
+        )
 
     async def get_testnet_funds(self) -> Dict[str, str]:
         """Get testnet funds from Bybit"""
         try:
             # Create test USDT deposit
-            response = self.session.create_internal_deposit(
+            response = await self._call(
+                self.session.create_internal_deposit,
+                priority=Priority.BALANCE,
                 coin="USDT",
                 amount="1000",
                 accountType="UNIFIED"
@@ -42,62 +101,86 @@ class TradingService:
                 "message": "❌ Error requesting testnet funds. Please try again later."
             }
 
-    async def get_available_symbols(self) -> List[str]:
-        """Get list of available trading pairs"""
+    async def _load_symbol_filters(self) -> Optional[List[SymbolFilters]]:
+        """Load spot instrument filters for the symbol catalog"""
         try:
-            response = self.session.get_tickers(
+            response = await self._shared(
+                self.session.get_instruments_info,
+                priority=Priority.ANALYTICS,
                 category="spot"
             )
 
             if response and response.get("retCode") == 0:
-                return [
-                    item["symbol"]
-                    for item in response["result"]["list"]
-                    if "symbol" in item
-                ]
-            return []
+                return parse_bybit_instruments(response)
+            return None
 
         except Exception as e:
-            logger.error(f"Error fetching symbols: {str(e)}")
-            return []
+            logger.error(f"Error fetching instruments: {str(e)}")
+            return None
+
+    async def get_available_symbols(self) -> List[str]:
+        """Get list of available trading pairs"""
+        await self.symbol_catalog.ensure_loaded()
+        return self.symbol_catalog.symbol_names()
+
+    @staticmethod
+    def _order_params(
+            symbol: str,
+            side: str,
+            quantity: Decimal,
+            price: Optional[Decimal] = None,
+            client_order_id: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Build Bybit order parameters"""
+        params = {
+            "symbol": symbol,
+            "side": side,
+            "orderType": "MARKET" if price is None else "LIMIT",
+            "qty": str(quantity),
+        }
+
+        if price is not None:
+            params["price"] = str(price)
+        if client_order_id:
+            params["orderLinkId"] = client_order_id
+        return params
+
+    @staticmethod
+    def _order_result(params: Dict[str, str], order_id: Optional[str]) -> Dict[str, str]:
+        return {
+            "status": "success",
+            "message": (
+                f"✅ Test order placed successfully!\n"
+                f"Order Type: {params['orderType']}\n"
+                f"Symbol: {params['symbol']}\n"
+                f"Quantity: {params['qty']}\n"
+                f"Order ID: {order_id}\n\n"
+                "Note: This is a testnet order, no real funds were used."
+            )
+        }
 
     async def place_test_order(
             self,
             symbol: str,
             side: str,
             quantity: Decimal,
-            price: Optional[Decimal] = None
+            price: Optional[Decimal] = None,
+            client_order_id: Optional[str] = None
     ) -> Dict[str, str]:
         """Place a test order on Bybit testnet"""
         try:
-            order_type = "MARKET" if price is None else "LIMIT"
-
-            params = {
-                "category": "spot",
-                "symbol": symbol,
-                "side": side,
-                "orderType": order_type,
-                "qty": str(quantity),
-            }
-
-            if price is not None:
-                params["price"] = str(price)
+            params = self._order_params(symbol, side, quantity, price, client_order_id)
 
-            response = self.session.place_order(**params)
+            response = await self._call(
+                self.session.place_order,
+                priority=Priority.ORDER,
+                category="spot",
+                **params
+            )
 
             if response and response.get("retCode") == 0:
                 order_id = response.get("result", {}).get("orderId")
-                return {
-                    "status": "success",
-                    "message": (
-                        f"✅ Test order placed successfully!\n"
-                        f"Order Type: {order_type}\n"
-                        f"Symbol: {symbol}\n"
-                        f"Quantity: {quantity}\n"
-                        f"Order ID: {order_id}\n\n"
-                        "Note: This is a testnet order, no real funds were used."
-                    )
-                }
+                return self._order_result(params, order_id)
             else:
                 error_msg = response.get("retMsg", "Unknown error")
                 logger.error(f"Order placement failed: {error_msg}")
@@ -113,16 +196,71 @@ class TradingService:
                 "message": "❌ Failed to place test order. Please try again."
             }
 
+    async def place_test_orders(self, orders: List) -> List[Dict[str, str]]:
+        """Place several test orders with Bybit's batch endpoint (10 per call)"""
+        results: List[Dict[str, str]] = []
+        for start in range(0, len(orders), 10):
+            chunk = orders[start:start + 10]
+            requests = [
+                self._order_params(o.symbol, o.side, o.quantity, o.price, o.client_order_id)
+                for o in chunk
+            ]
+
+            try:
+                response = await self._call(
+                    self.session.place_batch_order,
+                    priority=Priority.ORDER,
+                    category="spot",
+                    request=requests
+                )
+            except Exception as e:
+                logger.error(f"Error placing batch order: {str(e)}")
+                response = None
+
+            if not response or response.get("retCode") != 0:
+                error_msg = response.get("retMsg", "Unknown error") if response else "Request failed"
+                logger.error(f"Batch order placement failed: {error_msg}")
+                results.extend(
+                    {"status": "error", "message": f"❌ Order failed: {error_msg}"}
+                    for _ in chunk
+                )
+                continue
+
+            placed = response.get("result", {}).get("list", [])
+            statuses = response.get("retExtInfo", {}).get("list", [])
+            for i, params in enumerate(requests):
+                status = statuses[i] if i < len(statuses) else {"code": 0}
+                if status.get("code") == 0:
+                    order_id = placed[i].get("orderId") if i < len(placed) else None
+                    results.append(self._order_result(params, order_id))
+                else:
+                    results.append({
+                        "status": "error",
+                        "message": f"❌ Order failed: {status.get('msg', 'Unknown error')}"
+                    })
+
+        return results
+
     async def get_market_price(self, symbol: str) -> Optional[Decimal]:
         """Get current market price for a symbol"""
+        if self.market_data:
+            price = self.market_data.get_price(symbol)
+            if price is not None:
+                return price
+
         try:
-            response = self.session.get_tickers(
+            response = await self._shared(
+                self.session.get_tickers,
                 category="spot",
                 symbol=symbol
             )
 
             if response and response.get("retCode") == 0 and response["result"]["list"]:
-                return Decimal(response["result"]["list"][0]["lastPrice"])
+                price = Decimal(response["result"]["list"][0]["lastPrice"])
+                if self.market_data:
+                    self.market_data.update_price(symbol, price)
+                    self.market_data.touch(symbol)
+                return price
             return None
 
         except Exception as e:
@@ -0,0 +1,163 @@
+"""Webhook ingestion with per-chat ordered update workers"""
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import logging
+import time
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def route_key(update: Update) -> int:
+    """Get the chat (or user) an update belongs to"""
+    try:
+        event = update.event
+    except Exception:
+        # Update types newer than this aiogram version
+        return update.update_id
+    chat = getattr(event, "chat", None)
+    if chat is None:
+        message = getattr(event, "message", None)
+        chat = getattr(message, "chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return user.id
+    return update.update_id
+
+
+class UpdatePipeline:
+    """Feeds webhook updates to the dispatcher on a fixed set of workers
+
+    Each chat always lands on the same worker, so one chat's updates are
+    handled in order while different chats run concurrently. Worker
+    queues are bounded; when a queue stays full the webhook answers 503
+    and Telegram redelivers the update later.
+    """
+
+    def __init__(
+            self,
+            dispatcher: Dispatcher,
+            bot: Bot,
+            workers: int = 8,
+            queue_size: int = 1000,
+            put_timeout: Optional[float] = 1.0
+    ):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.workers = workers
+        self.put_timeout = put_timeout
+        per_worker = max(1, queue_size // workers)
+        self._queues: List[asyncio.Queue] = [asyncio.Queue(per_worker) for _ in range(workers)]
+        self._tasks: List[asyncio.Task] = []
+
+        # Metrics
+        self.received = 0
+        self.processed = 0
+        self.rejected = 0
+        self.failed = 0
+        self._processed_at: Deque[float] = deque(maxlen=10000)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(i, queue))
+            for i, queue in enumerate(self._queues)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def drain(self) -> None:
+        """Wait until every queued update has been handled"""
+        await asyncio.gather(*(queue.join() for queue in self._queues))
+
+    async def submit(self, update: Update) -> bool:
+        """Queue an update on its chat's worker; False if it stays full"""
+        self.received += 1
+        queue = self._queues[route_key(update) % self.workers]
+        try:
+            await asyncio.wait_for(queue.put(update), timeout=self.put_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+
+    async def _worker(self, index: int, queue: asyncio.Queue) -> None:
+        while True:
+            update = await queue.get()
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Update worker {index} failed on update {update.update_id}: {str(e)}")
+            self.processed += 1
+            self._processed_at.append(time.monotonic())
+            queue.task_done()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get intake counters, queue depth and throughput"""
+        now = time.monotonic()
+        recent = sum(1 for t in self._processed_at if now - t <= 10.0)
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "queue_depth": sum(queue.qsize() for queue in self._queues),
+            "updates_per_second": recent / 10.0
+        }
+
+
+def build_webhook_app(
+        pipeline: UpdatePipeline,
+        path: str,
+        secret_token: Optional[str] = None,
+        drain_timeout: float = 10.0
+) -> web.Application:
+    """Create an aiohttp app that accepts Telegram updates on path
+
+    Updates are acknowledged once queued, and Telegram won't send them
+    again, so shutdown waits up to ``drain_timeout`` seconds for the
+    queues to empty before stopping the workers.
+    """
+
+    async def handle_update(request: web.Request) -> web.Response:
+        if secret_token and request.headers.get(SECRET_HEADER) != secret_token:
+            return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": pipeline.bot})
+        except ValueError as e:
+            logger.warning(f"Rejected malformed update: {str(e)}")
+            return web.Response(status=400)
+
+        if not await pipeline.submit(update):
+            return web.Response(status=503)
+        return web.Response()
+
+    async def on_startup(_: web.Application) -> None:
+        pipeline.start()
+
+    async def on_shutdown(_: web.Application) -> None:
+        try:
+            await asyncio.wait_for(pipeline.drain(), drain_timeout)
+        except asyncio.TimeoutError:
+            depth = pipeline.metrics()["queue_depth"]
+            logger.warning(f"Stopping update workers with {depth} updates still queued")
+        await pipeline.stop()
+
+    app = web.Application()
+    app.router.add_post(path, handle_update)
+    app.on_startup.append(on_startup)
+    app.on_shutdown.append(on_shutdown)
+    return app
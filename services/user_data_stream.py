@@ -0,0 +1,260 @@
+"""Binance user-data stream feeding an in-memory balance ledger"""
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import time
+import aiohttp
+from .rate_limiter import Priority
+
+logger = logging.getLogger(__name__)
+
+
+class BalanceLedger:
+    """Account balances kept current from stream events
+
+    Each asset remembers the exchange time of its last update so events
+    that arrive after a newer REST snapshot can't roll it back.
+    """
+
+    def __init__(self):
+        # asset -> (free, locked, exchange update time in ms)
+        self.balances: Dict[str, Tuple[Decimal, Decimal, int]] = {}
+        # clientOrderId -> latest executionReport fields we care about
+        self.orders: Dict[str, Dict[str, str]] = {}
+        self.synced = False
+        self.updated_at = 0.0
+
+    def load_snapshot(self, account: Dict) -> int:
+        """Replace balances with a REST account snapshot; returns assets that drifted"""
+        update_time = int(account.get("updateTime", 0))
+        was_synced = self.synced
+        fresh = {
+            b["asset"]: (Decimal(b["free"]), Decimal(b["locked"]), update_time)
+            for b in account["balances"]
+        }
+        drifted = 0
+        for asset, (free, locked, updated) in self.balances.items():
+            if updated > update_time:
+                # Stream saw a newer change than the snapshot
+                fresh[asset] = (free, locked, updated)
+            elif asset not in fresh or fresh[asset][:2] != (free, locked):
+                drifted += 1
+
+        self.balances = fresh
+        self.synced = True
+        self.updated_at = time.monotonic()
+        return drifted if was_synced else 0
+
+    def apply_account_position(self, event: Dict) -> None:
+        """Apply an outboundAccountPosition event"""
+        update_time = int(event["u"])
+        for balance in event["B"]:
+            current = self.balances.get(balance["a"])
+            if current is not None and current[2] > update_time:
+                continue
+            self.balances[balance["a"]] = (Decimal(balance["f"]), Decimal(balance["l"]), update_time)
+        self.updated_at = time.monotonic()
+
+    def apply_balance_update(self, event: Dict) -> None:
+        """Apply a balanceUpdate event (deposits, withdrawals, transfers)"""
+        asset = event["a"]
+        event_time = int(event["T"])
+        free, locked, updated = self.balances.get(asset, (Decimal("0"), Decimal("0"), 0))
+        if updated >= event_time:
+            # Already included in a snapshot or account position at least as new
+            return
+        self.balances[asset] = (free + Decimal(event["d"]), locked, event_time)
+        self.updated_at = time.monotonic()
+
+    def apply_execution_report(self, event: Dict) -> None:
+        """Record order progress; balances follow in outboundAccountPosition"""
+        self.orders[event["c"]] = {
+            "symbol": event["s"],
+            "side": event["S"],
+            "status": event["X"],
+            "filled": event["z"],
+            "order_id": str(event["i"])
+        }
+        if len(self.orders) > 1000:
+            # Oldest first: dicts keep insertion order
+            del self.orders[next(iter(self.orders))]
+
+    def as_rows(self) -> List[Dict[str, str]]:
+        """Balances in get_account's format"""
+        return [
+            {"asset": asset, "free": str(free), "locked": str(locked)}
+            for asset, (free, locked, _) in self.balances.items()
+        ]
+
+
+class UserDataStream:
+    """Keeps a listenKey alive and applies account events to a ledger
+
+    A REST snapshot is loaded after every (re)connect and again every
+    ``reconcile_interval`` seconds to correct drift from missed events.
+    Until the first snapshot lands the ledger reports ``synced = False``
+    and callers should fall back to REST; ``wait_first_sync`` lets the
+    first caller wait for that snapshot instead of fetching its own.
+    """
+
+    def __init__(
+            self,
+            binance_client,
+            url: str = "wss://stream.testnet.binance.vision/ws",
+            keepalive_interval: float = 1800.0,
+            reconcile_interval: float = 300.0,
+            reconnect_delay: float = 1.0,
+            first_sync_timeout: float = 5.0
+    ):
+        self.client = binance_client
+        self.url = url
+        self.keepalive_interval = keepalive_interval
+        self.reconcile_interval = reconcile_interval
+        self.reconnect_delay = reconnect_delay
+        self.first_sync_timeout = first_sync_timeout
+        self.ledger = BalanceLedger()
+        self.listen_key: Optional[str] = None
+        self._tasks: List[asyncio.Task] = []
+        # Set once the first connection attempt has synced the ledger or failed
+        self._first_attempt = asyncio.Event()
+
+        # Metrics
+        self.events = 0
+        self.reconciliations = 0
+        self.drift_corrections = 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._run()),
+            asyncio.create_task(self._reconcile_periodically())
+        ]
+
+    async def wait_first_sync(self) -> bool:
+        """Wait (up to ``first_sync_timeout``) for the first connection attempt
+
+        Returns whether the ledger is synced. Only the first callers wait;
+        once an attempt has finished this returns at once.
+        """
+        try:
+            await asyncio.wait_for(self._first_attempt.wait(), self.first_sync_timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.ledger.synced
+
+    def close(self) -> None:
+        """Cancel the stream tasks; the listenKey expires on its own"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def stop(self) -> None:
+        tasks = self._tasks
+        self.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.listen_key:
+            try:
+                await self.client._run(
+                    self.client.client.stream_close,
+                    listenKey=self.listen_key,
+                    priority=Priority.BALANCE
+                )
+            except Exception as e:
+                logger.warning(f"Failed to close listenKey: {str(e)}")
+            self.listen_key = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.listen_key = await self.client._run(
+                    self.client.client.stream_get_listen_key,
+                    priority=Priority.BALANCE
+                )
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(f"{self.url}/{self.listen_key}", heartbeat=30) as ws:
+                        logger.info("User data stream connected")
+                        keepalive = asyncio.create_task(self._keepalive())
+                        try:
+                            # Events missed while disconnected are covered by a fresh snapshot
+                            await self.reconcile()
+                            async for msg in ws:
+                                if msg.type == aiohttp.WSMsgType.TEXT:
+                                    if not self._dispatch(msg.data):
+                                        break
+                                elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                    break
+                        finally:
+                            keepalive.cancel()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"User data stream error: {str(e)}")
+
+            self._first_attempt.set()
+            self.ledger.synced = False
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _keepalive(self) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await self.client._run(
+                    self.client.client.stream_keepalive,
+                    listenKey=self.listen_key,
+                    priority=Priority.BALANCE
+                )
+            except Exception as e:
+                logger.warning(f"listenKey keepalive failed: {str(e)}")
+
+    async def _reconcile_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            if not self.ledger.synced:
+                continue
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.warning(f"Balance reconciliation failed: {str(e)}")
+
+    async def reconcile(self) -> None:
+        """Load a REST snapshot into the ledger, counting drifted assets"""
+        # Shared with concurrent REST balance fallbacks
+        account = await self.client._shared(self.client.client.get_account, priority=Priority.BALANCE)
+        drifted = self.ledger.load_snapshot(account)
+        self._first_attempt.set()
+        self.reconciliations += 1
+        if drifted:
+            self.drift_corrections += drifted
+            logger.warning(f"Balance reconciliation corrected {drifted} assets")
+
+    def _dispatch(self, raw: str) -> bool:
+        """Apply one event; returns False when the stream must be reopened"""
+        try:
+            event = json.loads(raw)
+            kind = event.get("e")
+            if kind == "outboundAccountPosition":
+                self.ledger.apply_account_position(event)
+            elif kind == "balanceUpdate":
+                self.ledger.apply_balance_update(event)
+            elif kind == "executionReport":
+                self.ledger.apply_execution_report(event)
+            elif kind == "listenKeyExpired":
+                logger.info("listenKey expired, reconnecting")
+                return False
+            self.events += 1
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Malformed user data event: {str(e)}")
+        return True
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "synced": self.ledger.synced,
+            "events": self.events,
+            "reconciliations": self.reconciliations,
+            "drift_corrections": self.drift_corrections,
+            "assets": len(self.ledger.balances)
+        }
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import struct
+import time
+from typing import Optional
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+NTP_EPOCH_OFFSET = 2208988800  # seconds from 1900-01-01 to 1970-01-01
+
+
+def _ntp_timestamp(unix_time: float) -> bytes:
+    seconds = unix_time + NTP_EPOCH_OFFSET
+    return struct.pack("!II", int(seconds), int((seconds % 1) * 2 ** 32))
+
+
+class _NtpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server: "FakeTimeServer"):
+        self.server = server
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if len(data) < 48:
+            return
+        self.server.requests += 1
+        received = self.server.now()
+        reply = bytearray(48)
+        reply[0] = 0x24  # no leap warning, version 4, server mode
+        reply[1] = 1  # stratum
+        reply[24:32] = data[40:48]  # originate = client's transmit time
+        reply[32:40] = _ntp_timestamp(received)
+        reply[40:48] = _ntp_timestamp(self.server.now())
+        self.transport.sendto(bytes(reply), addr)
+
+
+class FakeTimeServer:
+    """Local NTP and exchange time endpoints whose clock is off by ``skew_ms``
+
+    Serves NTP on UDP, Binance's ``/api/v3/time`` and Bybit's
+    ``/v5/market/time`` over HTTP, and can delay HTTP replies to mimic
+    network latency. Ports are picked by the OS unless given.
+    """
+
+    def __init__(
+            self,
+            skew_ms: float = 0.0,
+            host: str = "127.0.0.1",
+            ntp_port: int = 0,
+            http_port: int = 0,
+            delay: float = 0.0
+    ):
+        self.skew_ms = skew_ms
+        self.host = host
+        self.ntp_port = ntp_port
+        self.http_port = http_port
+        self.delay = delay
+        self.requests = 0
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    def now(self) -> float:
+        """The server's (skewed) Unix time in seconds"""
+        return time.time() + self.skew_ms / 1000
+
+    @property
+    def ntp_address(self) -> str:
+        return f"{self.host}:{self.ntp_port}"
+
+    @property
+    def http_url(self) -> str:
+        return f"http://{self.host}:{self.http_port}"
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _NtpProtocol(self),
+            local_addr=(self.host, self.ntp_port)
+        )
+        self.ntp_port = self._transport.get_extra_info("sockname")[1]
+
+        app = web.Application()
+        app.router.add_get("/api/v3/time", self._binance_time)
+        app.router.add_get("/v5/market/time", self._bybit_time)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.http_port).start()
+        self.http_port = self._runner.addresses[0][1]
+        logger.info(f"Fake time server on ntp {self.ntp_address}, http {self.http_url} (skew {self.skew_ms}ms)")
+
+    async def stop(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _binance_time(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        return web.json_response({"serverTime": int(self.now() * 1000)})
+
+    async def _bybit_time(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        now = self.now()
+        return web.json_response({
+            "retCode": 0,
+            "retMsg": "OK",
+            "result": {"timeSecond": str(int(now)), "timeNano": str(int(now * 1e9))},
+            "time": int(now * 1000)
+        })
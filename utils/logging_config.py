@@ -1,28 +1,196 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
 from pathlib import Path
+from typing import IO, List, Optional
 
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_writer: Optional["BatchingLogWriter"] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra= fields are included as keys"""
+
+    _reserved = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in self._reserved:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records as they are; formatting happens on the writer thread
+
+    Never blocks: when the queue is full the record is dropped and
+    counted, and the writer reports the count.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingLogWriter(threading.Thread):
+    """Drains the log queue in batches to the console and a size-rotated file"""
+
+    def __init__(
+            self,
+            log_queue: queue.Queue,
+            handler: LazyQueueHandler,
+            formatter: logging.Formatter,
+            path: Path,
+            stream: IO[str] = sys.stdout,
+            max_bytes: int = 10 * 1024 * 1024,
+            backup_count: int = 5,
+            batch_size: int = 512
+    ):
+        super().__init__(name="log-writer", daemon=True)
+        self.queue = log_queue
+        self.handler = handler
+        self.formatter = formatter
+        self.path = path
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._reported_drops = 0
+
+    def run(self) -> None:
+        while True:
+            batch: List[Optional[logging.LogRecord]] = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            try:
+                self._write([record for record in batch if record is not None])
+            except Exception as e:
+                # Never let the thread die: a dead writer fills the queue
+                sys.stderr.write(f"Log writer error: {e}\n")
+            if stop:
+                self._file.close()
+                return
+
+    def _write(self, records: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                lines.append(f"Unformattable log record from {record.name}: {record.msg!r}")
+        dropped = self.handler.dropped
+        if dropped != self._reported_drops:
+            lines.append(f"Logging queue full, dropped {dropped - self._reported_drops} records")
+            self._reported_drops = dropped
+        if not lines:
+            return
+
+        text = "\n".join(lines) + "\n"
+        try:
+            self.stream.write(text)
+            self.stream.flush()
+        except (OSError, ValueError):
+            pass
+
+        data = text.encode("utf-8")
+        if self._size and self._size + len(data) > self.max_bytes:
+            try:
+                self._rotate()
+            except OSError as e:
+                # Keep appending to the current file; rotation is retried next batch
+                sys.stderr.write(f"Failed to rotate log file: {e}\n")
+        try:
+            if self._file.closed:
+                self._reopen()
+            self._file.write(text)
+            self._file.flush()
+            self._size += len(data)
+        except (OSError, ValueError) as e:
+            sys.stderr.write(f"Failed to write log file: {e}\n")
+
+    def _reopen(self) -> None:
+        """Open the log file again in append mode, e.g. after a failed rotation"""
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def _rotate(self) -> None:
+        """bot.log -> bot.log.1 -> ... -> bot.log.<backup_count>"""
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{i}")
+            if source.exists():
+                os.replace(source, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backup_count:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink(missing_ok=True)
+        self._reopen()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write everything still queued, then end the thread"""
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            # The writer is stuck or gone; don't hang interpreter exit
+            return
+        self.join(timeout)
+
+
+def setup_logging(
+        name: str = "bot",
+        log_format: str = "text",
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        queue_size: int = 10000
+):
+    """Configure logging with proper formatting
+
+    Log calls only put the record on a queue; a background thread formats
+    records and writes them in batches to stdout and ``logs/<name>.log``,
+    rotating the file at ``max_bytes``. ``log_format`` is "text" or
+    "json" (one JSON object per line).
+    """
+    global _writer
 
-def setup_logging():
-    """Configure logging with proper formatting"""
     # Create logs directory if it doesn't exist
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
 
     # Configure formatters
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-
-    # Configure handlers
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-
-    file_handler = logging.FileHandler(
-        log_dir / "bot.log",
-        encoding='utf-8'
-    )
-    file_handler.setFormatter(formatter)
+    if log_format == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT)
 
     # Configure root logger
     root_logger = logging.getLogger()
@@ -30,7 +198,25 @@ def setup_logging():
 
     # Remove existing handlers to avoid duplicates
     root_logger.handlers.clear()
+    if _writer is not None:
+        _writer.stop()
+
+    # Add the queue handler and start the writer
+    log_queue: queue.Queue = queue.Queue(queue_size)
+    handler = LazyQueueHandler(log_queue)
+    root_logger.addHandler(handler)
+    _writer = BatchingLogWriter(
+        log_queue,
+        handler,
+        formatter,
+        log_dir / f"{name}.log",
+        max_bytes=max_bytes,
+        backup_count=backup_count
+    )
+    _writer.start()
+
 
-    # Add handlers
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
\ No newline at end of file
+@atexit.register
+def _flush_logs() -> None:
+    if _writer is not None:
+        _writer.stop()
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FlightStats:
+    calls: int = 0
+    executed: int = 0
+    collapsed: int = 0
+
+
+class SingleFlight:
+    """Collapse concurrent identical calls into one in-flight request
+
+    Keys are tuples whose first item names the call, e.g.
+    ("get_symbol_ticker", "BTCUSDT"); statistics are kept per name.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[Hashable, ...], asyncio.Future] = {}
+        self._stats: Dict[str, FlightStats] = {}
+
+    async def do(self, key: Tuple[Hashable, ...], func: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the in-flight call for key, starting it if there is none"""
+        stats = self._stats.setdefault(str(key[0]), FlightStats())
+        stats.calls += 1
+
+        future = self._inflight.get(key)
+        if future is not None:
+            stats.collapsed += 1
+        else:
+            stats.executed += 1
+            future = asyncio.ensure_future(func())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._finish(key, f))
+
+        # Shield so one cancelled caller does not cancel the shared request
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Tuple[Hashable, ...], future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled() and future.exception() is not None:
+            logger.debug(f"Shared call {key[0]} failed: {future.exception()}")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get per-call counters of executed and collapsed requests"""
+        return {
+            name: {
+                "calls": s.calls,
+                "executed": s.executed,
+                "collapsed": s.collapsed
+            }
+            for name, s in self._stats.items()
+        }
@@ -1,10 +1,29 @@
 import time
 import ntplib
 import logging
-from typing import Optional, Tuple
+import asyncio
+import statistics
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Returns the source's current time in milliseconds
+TimeSource = Callable[[], float]
+
+
+def ntp_source(server: str, timeout: float = 2.0) -> TimeSource:
+    """Time source for an NTP server given as ``host`` or ``host:port``"""
+    host, _, port = server.partition(":")
+    client = ntplib.NTPClient()
+
+    def fetch() -> float:
+        return client.request(host, port=int(port) if port else "ntp", timeout=timeout).tx_time * 1000
+
+    return fetch
+
 
 class TimeSync:
     def __init__(self):
@@ -16,15 +35,22 @@ class TimeSync:
         ]
 
     def get_ntp_time(self) -> Optional[int]:
-        """Get current time from NTP server"""
-        for server in self.ntp_servers:
-            try:
-                response = self.ntp_client.request(server, timeout=5)
-                return int(response.tx_time * 1000)  # Convert to milliseconds
-            except Exception as e:
-                logger.warning(f"Failed to get time from {server}: {e}")
-                continue
-        return None
+        """Get current time from the first NTP server to answer (queried concurrently)"""
+        pool = ThreadPoolExecutor(max_workers=len(self.ntp_servers))
+        futures = {
+            pool.submit(self.ntp_client.request, server, timeout=5): server
+            for server in self.ntp_servers
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    return int(future.result().tx_time * 1000)  # Convert to milliseconds
+                except Exception as e:
+                    logger.warning(f"Failed to get time from {futures[future]}: {e}")
+            return None
+        finally:
+            # Don't wait for slower servers once one has answered
+            pool.shutdown(wait=False)
 
     def get_local_time(self) -> int:
         """Get current local time in milliseconds"""
@@ -43,4 +69,154 @@ class TimeSync:
             logger.warning(f"Time difference detected: {time_diff}ms")
             return False, f"System clock is off by {time_diff}ms"
 
-        return True, "Time is synchronized"
\ No newline at end of file
+        return True, "Time is synchronized"
+
+
+class ClockOffsetTracker:
+    """Tracks the local clock's offset from exchange and NTP time in the background
+
+    Every ``interval`` seconds all sources are sampled concurrently. A
+    sample's offset is the source time minus the local midpoint of the
+    request, so symmetric network delay cancels out; samples slower than
+    ``max_rtt`` are discarded. The median across sources is blended into
+    the running offset with weight ``alpha``, and jumps beyond
+    ``step_threshold`` are applied at once. Readers never wait: attached
+    python-binance clients get the offset as ``timestamp_offset``, and
+    ``now_ms()`` gives corrected time for everything else.
+    """
+
+    def __init__(
+            self,
+            sources: Optional[Dict[str, TimeSource]] = None,
+            interval: float = 60.0,
+            timeout: float = 2.0,
+            alpha: float = 0.3,
+            step_threshold: float = 1000.0,
+            max_rtt: float = 1000.0
+    ):
+        self.sources: Dict[str, TimeSource] = dict(sources or {})
+        self.interval = interval
+        self.timeout = timeout
+        self.alpha = alpha
+        self.step_threshold = step_threshold
+        self.max_rtt = max_rtt
+        self.offset_ms = 0.0
+        self.synced = False
+
+        self._clients: "weakref.WeakSet[Any]" = weakref.WeakSet()
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="clock-sync")
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_sync = 0.0
+
+        # Metrics
+        self.rounds = 0
+        self.failures: Dict[str, int] = {}
+        self._rtts: Deque[float] = deque(maxlen=100)
+
+    def add_source(self, name: str, fetch: TimeSource) -> None:
+        self.sources[name] = fetch
+
+    def attach(self, client: Any) -> None:
+        """Keep a python-binance client's timestamp_offset in step with the tracker"""
+        self._clients.add(client)
+        client.timestamp_offset = round(self.offset_ms)
+
+    def now_ms(self) -> int:
+        """Corrected time in milliseconds"""
+        return int(time.time() * 1000 + self.offset_ms)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+    def resync(self) -> None:
+        """Sample again soon, e.g. after the exchange rejected a timestamp"""
+        if self._wakeup is not None and time.monotonic() - self._last_sync > 5.0:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sample()
+            except Exception as e:
+                logger.warning(f"Clock sync failed: {str(e)}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def sample(self) -> Optional[float]:
+        """Sample every source once and update the offset; returns the round's median"""
+        self._last_sync = time.monotonic()
+        loop = asyncio.get_running_loop()
+        names = list(self.sources)
+        results = await asyncio.gather(*(
+            asyncio.wait_for(
+                loop.run_in_executor(self._executor, self._measure, self.sources[name]),
+                self.timeout
+            )
+            for name in names
+        ), return_exceptions=True)
+
+        offsets = []
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException) or result[1] > self.max_rtt:
+                self.failures[name] = self.failures.get(name, 0) + 1
+                continue
+            offsets.append(result[0])
+            self._rtts.append(result[1])
+        if not offsets:
+            logger.warning("Clock sync: no time source answered")
+            return None
+
+        self.rounds += 1
+        measured = statistics.median(offsets)
+        self._apply(measured)
+        return measured
+
+    @staticmethod
+    def _measure(fetch: TimeSource) -> Tuple[float, float]:
+        started = time.time() * 1000
+        remote = float(fetch())
+        finished = time.time() * 1000
+        return remote - (started + finished) / 2, finished - started
+
+    def _apply(self, measured: float) -> None:
+        if not self.synced or abs(measured - self.offset_ms) > self.step_threshold:
+            if self.synced:
+                logger.warning(f"Clock offset jumped from {self.offset_ms:.0f}ms to {measured:.0f}ms")
+            self.offset_ms = measured
+            self.synced = True
+        else:
+            self.offset_ms += self.alpha * (measured - self.offset_ms)
+
+        offset = round(self.offset_ms)
+        for client in list(self._clients):
+            client.timestamp_offset = offset
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get the current offset and sampling health"""
+        return {
+            "offset_ms": self.offset_ms,
+            "synced": self.synced,
+            "rounds": self.rounds,
+            "failures": dict(self.failures),
+            "median_rtt_ms": statistics.median(self._rtts) if self._rtts else 0.0
+        }
+
+
+def install_pybit_clock(tracker: ClockOffsetTracker) -> None:
+    """Make pybit sign requests (and compute rate-limit waits) with corrected time"""
+    from pybit import _helpers
+
+    _helpers.generate_timestamp = tracker.now_ms